@@ -0,0 +1,24 @@
+"""gunicorn settings, read by a plain ``gunicorn`` command.
+
+SERVER_MODE picks the interface:
+
+* ``wsgi`` (default): learning_tracker.wsgi on threaded sync workers.
+* ``asgi``: learning_tracker.asgi on uvicorn workers, so the async views
+  (dashboard, language detail) run their independent queries concurrently.
+"""
+import os
+
+SERVER_MODE = os.getenv('SERVER_MODE', 'wsgi')
+
+bind = f"0.0.0.0:{os.getenv('PORT', '8000')}"
+workers = int(os.getenv('WEB_CONCURRENCY', '2'))
+
+if SERVER_MODE == 'asgi':
+    wsgi_app = 'learning_tracker.asgi:application'
+    worker_class = 'uvicorn_worker.UvicornWorker'
+elif SERVER_MODE == 'wsgi':
+    wsgi_app = 'learning_tracker.wsgi:application'
+    worker_class = 'gthread'
+    threads = int(os.getenv('GUNICORN_THREADS', '4'))
+else:
+    raise ValueError(f"Unknown SERVER_MODE: {SERVER_MODE!r} (expected 'wsgi' or 'asgi')")
@@ -14,6 +14,8 @@ from pathlib import Path
 import os
 from dotenv import load_dotenv
 
+from .database_url import parse_database_url
+
 load_dotenv()
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -55,6 +57,8 @@ MIDDLEWARE = [
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
+    'tracker.caching.data_version_middleware',
+    'tracker.replicas.PinToPrimaryMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
@@ -87,6 +91,65 @@ DATABASES = {
         'NAME': BASE_DIR / 'db.sqlite3',
     }
 }
+if os.getenv('DATABASE_URL'):
+    DATABASES['default'] = parse_database_url(os.getenv('DATABASE_URL'))
+
+# Read replicas: a comma-separated list of DATABASE_URLs, configured as
+# replica1, replica2, ... The dashboard, list and language pages read from
+# them (see tracker/replicas.py). Tests use the primary's test database.
+for number, url in enumerate(filter(None, os.getenv('DATABASE_REPLICA_URLS', '').split(',')), 1):
+    DATABASES[f'replica{number}'] = {**parse_database_url(url.strip()), 'TEST': {'MIRROR': 'default'}}
+TRACKER_REPLICAS = [alias for alias in DATABASES if alias != 'default']
+DATABASE_ROUTERS = ['tracker.replicas.ReplicaRouter']
+# Seconds a browser reads from the primary after it writes; keep it above the replicas' lag.
+TRACKER_REPLICA_PIN_SECONDS = int(os.getenv('TRACKER_REPLICA_PIN_SECONDS', '10'))
+TRACKER_REPLICA_RETRY_SECONDS = int(os.getenv('TRACKER_REPLICA_RETRY_SECONDS', '30'))
+
+# Opt-in SQLite profile for serving with several gunicorn workers: WAL lets
+# readers run alongside the single writer, IMMEDIATE transactions take the
+# write lock up front (so waiting writers queue on the busy timeout instead
+# of failing with "database is locked"), and connections are reused.
+SQLITE_PRODUCTION_OPTIONS = {
+    'timeout': 20,
+    'transaction_mode': 'IMMEDIATE',
+    'init_command': (
+        'PRAGMA journal_mode=WAL;'
+        'PRAGMA synchronous=NORMAL;'
+        'PRAGMA busy_timeout=20000;'
+        'PRAGMA cache_size=-20000;'
+        'PRAGMA mmap_size=134217728;'
+        'PRAGMA temp_store=MEMORY;'
+    ),
+}
+for database in DATABASES.values():
+    if database['ENGINE'] == 'django.db.backends.sqlite3' and os.getenv('SQLITE_PRODUCTION', 'False') == 'True':
+        database.update({
+            'OPTIONS': {**SQLITE_PRODUCTION_OPTIONS, **database.get('OPTIONS', {})},
+            'CONN_MAX_AGE': int(os.getenv('CONN_MAX_AGE', '600')),
+            'CONN_HEALTH_CHECKS': True,
+        })
+
+# PostgreSQL: each worker process keeps a psycopg connection pool sized for its
+# threads. Set DB_POOL=False to fall back to persistent per-thread connections.
+for database in DATABASES.values():
+    if database['ENGINE'] == 'django.db.backends.postgresql':
+        if os.getenv('DB_POOL', 'True') == 'True':
+            database['OPTIONS']['pool'] = {
+                'min_size': int(os.getenv('DB_POOL_MIN_SIZE', '2')),
+                'max_size': int(os.getenv('DB_POOL_MAX_SIZE', '4')),
+                'timeout': int(os.getenv('DB_POOL_TIMEOUT', '10')),
+            }
+        else:
+            database.update({
+                'CONN_MAX_AGE': int(os.getenv('CONN_MAX_AGE', '600')),
+                'CONN_HEALTH_CHECKS': True,
+            })
+
+# SQLite replicas refuse writes, so nothing can be written to one by mistake.
+for alias in TRACKER_REPLICAS:
+    if DATABASES[alias]['ENGINE'] == 'django.db.backends.sqlite3':
+        options = DATABASES[alias].setdefault('OPTIONS', {})
+        options['init_command'] = options.get('init_command', '') + 'PRAGMA query_only=ON;'
 
 
 # Password validation
@@ -134,6 +197,57 @@ STATIC_ROOT = BASE_DIR / 'staticfiles'
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
+# List pagination (keyset based, see tracker/pagination.py)
+TRACKER_PAGE_SIZE = int(os.getenv('TRACKER_PAGE_SIZE', '25'))
+TRACKER_MAX_PAGE_SIZE = int(os.getenv('TRACKER_MAX_PAGE_SIZE', '200'))
+TRACKER_API_MAX_PAGE_SIZE = int(os.getenv('TRACKER_API_MAX_PAGE_SIZE', '1000'))
+# Upper bound on the points per series a trend chart request can ask for (see tracker/charts.py).
+TRACKER_CHART_MAX_POINTS = int(os.getenv('TRACKER_CHART_MAX_POINTS', '1000'))
+# Users with more topics than this pick them through autocomplete instead of a <select>.
+TRACKER_AUTOCOMPLETE_THRESHOLD = int(os.getenv('TRACKER_AUTOCOMPLETE_THRESHOLD', '300'))
+
+# Background jobs (see tracker/jobs.py). Imports larger than TRACKER_IMPORT_BACKGROUND_BYTES
+# are stored in the database (tracker/uploads.py) and handed to `manage.py run_jobs`
+# instead of running inside the request.
+TRACKER_IMPORT_BACKGROUND_BYTES = int(os.getenv('TRACKER_IMPORT_BACKGROUND_BYTES', str(1024 * 1024)))
+# Languages with more sessions than this are deleted by a background job.
+TRACKER_DELETE_BACKGROUND_ROWS = int(os.getenv('TRACKER_DELETE_BACKGROUND_ROWS', '20000'))
+TRACKER_JOB_LEASE = int(os.getenv('TRACKER_JOB_LEASE', '300'))  # Seconds without a heartbeat before a job is retried.
+TRACKER_JOB_RETENTION_DAYS = int(os.getenv('TRACKER_JOB_RETENTION_DAYS', '7'))
+
+# `manage.py archive_progress` moves sessions older than this many days to the archive table
+# (see tracker/archive.py).
+TRACKER_ARCHIVE_AFTER_DAYS = int(os.getenv('TRACKER_ARCHIVE_AFTER_DAYS', '365'))
+
+# Admin changelists of unfiltered tables larger than this show an estimated count instead of COUNT(*).
+TRACKER_ADMIN_EXACT_COUNT_LIMIT = int(os.getenv('TRACKER_ADMIN_EXACT_COUNT_LIMIT', '100000'))
+
+# Caches. Rendered page fragments go to the 'tracker' cache (see tracker/caching.py),
+# which is bounded by MAX_ENTRIES. Their keys hold the user's data version, which
+# lives in the database, so a per-process cache never serves another process's
+# stale fragments; set TRACKER_CACHE_DIR to share the fragments themselves.
+TRACKER_CACHE_DIR = os.getenv('TRACKER_CACHE_DIR')
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'tracker': {
+        'BACKEND': ('django.core.cache.backends.filebased.FileBasedCache' if TRACKER_CACHE_DIR
+                    else 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': TRACKER_CACHE_DIR or 'tracker',
+        'TIMEOUT': 60 * 60 * 24,
+        'OPTIONS': {
+            'MAX_ENTRIES': int(os.getenv('TRACKER_CACHE_MAX_ENTRIES', '10000')),
+            'CULL_FREQUENCY': 4,
+        },
+    },
+}
+# Each process adds its fragment cache hit and miss counts to the database at most this often (seconds).
+TRACKER_CACHE_STATS_FLUSH_SECONDS = int(os.getenv('TRACKER_CACHE_STATS_FLUSH_SECONDS', '10'))
+# Benchmarks set TRACKER_CACHE_DISABLED=True to measure the uncached pages.
+if os.getenv('TRACKER_CACHE_DISABLED', 'False') == 'True':
+    CACHES['tracker'] = {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'}
+
 # Authentication Redirects
 LOGIN_REDIRECT_URL = 'dashboard'
 LOGOUT_REDIRECT_URL = 'login'
@@ -46,3 +46,53 @@ document.addEventListener('DOMContentLoaded', () => {
         });
     });
 });
+
+// Autocomplete for choice fields too long to render as a full <select>
+document.addEventListener('DOMContentLoaded', () => {
+    document.querySelectorAll('select[data-autocomplete-url]').forEach(select => {
+        const search = document.createElement('input');
+        search.type = 'search';
+        search.className = 'form-control mb-1';
+        search.placeholder = 'Type to search...';
+        select.before(search);
+
+        let timer;
+        search.addEventListener('input', () => {
+            clearTimeout(timer);
+            timer = setTimeout(async () => {
+                const params = new URLSearchParams({ q: search.value });
+                const language = document.getElementById('id_language');
+                if (language && language.value) {
+                    params.set('language', language.value);
+                }
+                const response = await fetch(`${select.dataset.autocompleteUrl}?${params}`);
+                const { results } = await response.json();
+                const selected = select.value;
+                select.querySelectorAll('option:not([value=""])').forEach(option => option.remove());
+                results.forEach(({ id, text }) => {
+                    select.add(new Option(text, id, false, String(id) === selected));
+                });
+            }, 200);
+        });
+    });
+});
+
+// Background job progress, polled until the job finishes and the page can show its result
+document.addEventListener('DOMContentLoaded', () => {
+    document.querySelectorAll('[data-job-status-url]').forEach(card => {
+        const poll = async () => {
+            const response = await fetch(card.dataset.jobStatusUrl);
+            const job = await response.json();
+            if (job.finished) {
+                window.location.reload();
+                return;
+            }
+            card.querySelector('[data-job-field="progress"]').style.width = `${job.progress}%`;
+            if (job.message) {
+                card.querySelector('[data-job-field="message"]').textContent = job.message;
+            }
+            setTimeout(poll, 1000);
+        };
+        setTimeout(poll, 1000);
+    });
+});
@@ -1,26 +1,198 @@
-from django.contrib import admin
+"""Admin for the tracker models, sized for tables with millions of rows.
+
+Changelists load their foreign keys in the same query, count unfiltered
+tables from the database's statistics rather than with COUNT(*), and filter
+by user and language through an id box backed by an index instead of a list
+of every user or language. Edit forms pick related objects through
+autocomplete, and the bulk actions run as set-based updates.
+"""
+from django import forms
+from django.conf import settings
+from django.contrib import admin, messages
+from django.contrib.admin import helpers
+from django.core.paginator import Paginator
+from django.db import transaction
+from django.template.response import TemplateResponse
+from django.utils.functional import cached_property
+
+from . import caching, reviews, rollups
+from .db import estimated_count
 from .models import Language, Topic, DailyProgress, Resource, Milestone, Goal
 
+
+class EstimatedCountPaginator(Paginator):
+    """Takes the size of an unfiltered changelist from table statistics when the table is large.
+
+    An estimate above the real count only means the last pages come out empty.
+    """
+
+    @cached_property
+    def count(self):
+        if not self.object_list.query.where:
+            estimate = estimated_count(self.object_list.model)
+            if estimate is not None and estimate > settings.TRACKER_ADMIN_EXACT_COUNT_LIMIT:
+                return estimate
+        return super().count
+
+
+class IdFilter(admin.SimpleListFilter):
+    """Filters on a foreign key id typed into a box, instead of listing every related object."""
+    template = 'admin/tracker/id_filter.html'
+
+    def lookups(self, request, model_admin):
+        return [(None, self.title)]  # One entry, so the filter is shown.
+
+    def queryset(self, request, queryset):
+        value = self.value()
+        if value is None or value == '':
+            return queryset
+        if not value.isdigit():
+            raise admin.options.IncorrectLookupParameters(f"{self.title} must be an id.")
+        return queryset.filter(**{self.parameter_name: int(value)})
+
+    def get_facet_counts(self, pk_attname, filtered_qs):
+        return {}
+
+    def choices(self, changelist):
+        yield {
+            'value': self.value() or '',
+            'hidden': [(name, value) for name, value in changelist.params.items() if name != self.parameter_name],
+        }
+
+
+class UserIdFilter(IdFilter):
+    title = 'user id'
+    parameter_name = 'user_id'
+
+
+class LanguageIdFilter(IdFilter):
+    title = 'language id'
+    parameter_name = 'language_id'
+
+
+class LargeTableAdmin(admin.ModelAdmin):
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    show_facets = admin.ShowFacets.NEVER
+
+
+class ReassignLanguageForm(forms.Form):
+    language = forms.ModelChoiceField(queryset=Language.objects.none())
+
+    def __init__(self, *args, user_id, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.fields['language'].queryset = Language.objects.filter(user_id=user_id).order_by('name')
+
+
+def _days_by_user(queryset):
+    days = {}
+    for user_id, day in queryset.values_list('user_id', 'date').order_by().distinct():
+        days.setdefault(user_id, []).append(day)
+    return days
+
+
+def refresh_rollups(queryset):
+    """Recompute the rollup buckets of every (user, day) with a session in ``queryset``."""
+    for user_id, days in _days_by_user(queryset).items():
+        rollups.refresh(user_id, days)
+        caching.bump_version(user_id)
+
+
+def move_progress(queryset, language):
+    """Move the sessions of ``queryset`` to ``language``; returns how many.
+
+    Sessions filed under a topic of another language lose the topic, and
+    those topics' review schedules are replayed without them.
+    """
+    with transaction.atomic():
+        days = _days_by_user(queryset)
+        foreign_topics = queryset.filter(topic__isnull=False).exclude(topic__language=language)
+        topic_ids = set(foreign_topics.values_list('topic_id', flat=True).order_by().distinct())
+        foreign_topics.update(topic=None)
+        moved = queryset.update(language=language)
+        for user_id, user_days in days.items():
+            rollups.refresh(user_id, user_days)
+            caching.bump_version(user_id)
+        reviews.replay(topic_ids)
+    return moved
+
+
 @admin.register(Language)
 class LanguageAdmin(admin.ModelAdmin):
-    list_display = ('name', 'difficulty_level', 'date_started')
+    list_display = ('name', 'user', 'difficulty_level', 'date_started')
+    list_select_related = ('user',)
+    list_filter = (UserIdFilter, 'difficulty_level')
+    search_fields = ('name',)
+    autocomplete_fields = ('user',)
+    date_hierarchy = 'date_started'
 
 @admin.register(Topic)
-class TopicAdmin(admin.ModelAdmin):
-    list_display = ('name', 'language')
+class TopicAdmin(LargeTableAdmin):
+    list_display = ('name', 'language', 'user', 'next_review')
+    list_select_related = ('language', 'user')
+    list_filter = (UserIdFilter, LanguageIdFilter)
+    search_fields = ('name',)
+    autocomplete_fields = ('user', 'language')
 
 @admin.register(DailyProgress)
-class DailyProgressAdmin(admin.ModelAdmin):
-    list_display = ('date', 'language', 'topic', 'time_spent_minutes', 'confidence_level')
+class DailyProgressAdmin(LargeTableAdmin):
+    list_display = ('date', 'user', 'language', 'topic', 'time_spent_minutes', 'confidence_level')
+    # Topic.__str__ shows its language.
+    list_select_related = ('user', 'language', 'topic__language')
+    list_filter = (UserIdFilter, LanguageIdFilter)
+    autocomplete_fields = ('user', 'language', 'topic')
+    date_hierarchy = 'date'
+    actions = ('recompute_rollups', 'reassign_language')
+
+    @admin.action(description="Recompute rollups of the selected sessions' days")
+    def recompute_rollups(self, request, queryset):
+        refresh_rollups(queryset)
+        self.message_user(request, "Rollups recomputed.", messages.SUCCESS)
+
+    @admin.action(description="Move the selected sessions to another language")
+    def reassign_language(self, request, queryset):
+        user_ids = list(queryset.values_list('user_id', flat=True).order_by().distinct()[:2])
+        if len(user_ids) != 1 or user_ids[0] is None:
+            self.message_user(request, "Select the sessions of a single user.", messages.ERROR)
+            return None
+        form = ReassignLanguageForm(request.POST if 'apply' in request.POST else None, user_id=user_ids[0])
+        if form.is_valid():
+            language = form.cleaned_data['language']
+            moved = move_progress(queryset, language)
+            self.message_user(request, f"Moved {moved} session(s) to {language}.", messages.SUCCESS)
+            return None
+        return TemplateResponse(request, 'admin/tracker/reassign_language.html', {
+            **self.admin_site.each_context(request),
+            'title': "Move sessions to another language",
+            'opts': self.model._meta,
+            'form': form,
+            'action': 'reassign_language',
+            'action_checkbox_name': helpers.ACTION_CHECKBOX_NAME,
+            'selected': request.POST.getlist(helpers.ACTION_CHECKBOX_NAME),
+            'select_across': request.POST.get('select_across', '0'),
+        })
 
 @admin.register(Resource)
-class ResourceAdmin(admin.ModelAdmin):
+class ResourceAdmin(LargeTableAdmin):
     list_display = ('title', 'language', 'resource_type')
+    list_select_related = ('language',)
+    list_filter = (UserIdFilter, LanguageIdFilter, 'resource_type')
+    search_fields = ('title',)
+    autocomplete_fields = ('user', 'language')
 
 @admin.register(Milestone)
-class MilestoneAdmin(admin.ModelAdmin):
+class MilestoneAdmin(LargeTableAdmin):
     list_display = ('title', 'language', 'is_completed', 'date_created')
+    list_select_related = ('language',)
+    list_filter = (UserIdFilter, LanguageIdFilter, 'is_completed')
+    search_fields = ('title',)
+    autocomplete_fields = ('user', 'language')
+    date_hierarchy = 'date_created'
 
 @admin.register(Goal)
 class GoalAdmin(admin.ModelAdmin):
     list_display = ('title', 'target_date', 'is_completed')
+    list_filter = (UserIdFilter, 'is_completed')
+    search_fields = ('title',)
+    autocomplete_fields = ('user',)
+    date_hierarchy = 'target_date'
@@ -0,0 +1,127 @@
+"""Read-only JSON API, version 1, under ``/api/v1/``.
+
+Requests are authenticated with the site's session. Every response carries a
+strong ETag built from the user's data version (see tracker/caching.py) and
+the request path, so a client revalidating with ``If-None-Match`` gets a 304
+from one query while nothing of theirs has changed. The version is read from
+the database, so a write made by another worker or by the job runner changes
+the ETag as well.
+
+Rows are read with ``values()`` and encoded with orjson when it is
+installed, falling back to the standard library encoder.
+"""
+import dataclasses
+import hashlib
+import json
+from functools import wraps
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import Http404, HttpResponse
+from django.urls import reverse
+from django.views.decorators.cache import cache_control
+from django.views.decorators.http import condition, require_safe
+
+from . import caching
+from .archive import sources
+from .models import Language, Topic, DailyProgress, Resource, Milestone, Goal
+from .pagination import paginate
+from .stats import dashboard_stats
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+API_VERSION = 'v1'
+CONTENT_TYPE = 'application/json'
+
+# Resource name -> (model, fields, keyset ordering). Resources without an
+# ordering are returned whole; the others are paginated like the HTML lists.
+RESOURCES = {
+    'languages': (Language, ('id', 'name', 'description', 'difficulty_level', 'date_started'), None),
+    'topics': (Topic, ('id', 'language_id', 'name', 'description', 'last_reviewed', 'next_review'), ('id',)),
+    'progress': (DailyProgress, (
+        'id', 'date', 'language_id', 'topic_id', 'what_i_learned', 'time_spent_minutes', 'confidence_level',
+    ), ('-date', '-id')),
+    'goals': (Goal, ('id', 'title', 'details', 'target_date', 'is_completed'), ('id',)),
+    'milestones': (Milestone, ('id', 'language_id', 'title', 'details', 'is_completed', 'date_created'), ('id',)),
+    'resources': (Resource, ('id', 'language_id', 'title', 'link', 'resource_type'), ('id',)),
+}
+
+
+def dumps(data):
+    """Compact JSON bytes for ``data``."""
+    if orjson is not None:
+        return orjson.dumps(data)
+    return json.dumps(data, cls=DjangoJSONEncoder, separators=(',', ':'), ensure_ascii=False).encode()
+
+
+def json_response(data, status=200):
+    return HttpResponse(dumps(data), content_type=CONTENT_TYPE, status=status)
+
+
+def api_etag(request, *args, **kwargs):
+    """The ETag of the requested resource, or None for anonymous requests."""
+    if not request.user.is_authenticated:
+        return None
+    version = caching.data_version(request.user.pk)
+    key = f'{API_VERSION}:{request.user.pk}:{version}:{request.get_full_path()}'
+    return hashlib.md5(key.encode(), usedforsecurity=False).hexdigest()
+
+
+def api_view(view):
+    """Session-authenticated, conditional GET endpoint; 401 instead of a login redirect."""
+    @require_safe
+    @cache_control(private=True, no_cache=True)
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        if not request.user.is_authenticated:
+            return json_response({'detail': "Authentication required."}, status=401)
+        return conditional(request, *args, **kwargs)
+    conditional = condition(etag_func=api_etag)(view)
+    return wrapper
+
+
+@api_view
+def index(request):
+    endpoints = {name: reverse('api_list', args=[name]) for name in RESOURCES}
+    endpoints['stats'] = reverse('api_stats')
+    return json_response({'version': API_VERSION, 'endpoints': endpoints})
+
+
+@api_view
+def resource_list(request, resource):
+    if resource not in RESOURCES:
+        raise Http404("Unknown API resource.")
+    model, fields, ordering = RESOURCES[resource]
+    rows = model.objects.filter(user=request.user).values(*fields)
+    if ordering is None:
+        return json_response({'results': list(rows.order_by('pk'))})
+    if len(sources(model)) > 1:  # Archived progress is listed with the rest.
+        rows = [source.objects.filter(user=request.user).values(*fields) for source in sources(model)]
+    page = paginate(request, rows, ordering, settings.TRACKER_API_MAX_PAGE_SIZE)
+    return json_response({
+        'results': page.object_list,
+        'next': f'{request.path}?{page.next_query}' if page.has_next else None,
+        'previous': f'{request.path}?{page.previous_query}' if page.has_previous else None,
+    })
+
+
+@api_view
+def stats(request):
+    data = dashboard_stats(request.user)
+    return json_response({
+        'total_languages': data.total_languages,
+        'total_progress_entries': data.total_progress_entries,
+        'language_totals': [dataclasses.asdict(total) for total in data.language_totals],
+        'upcoming_goals': [
+            {'id': goal.pk, 'title': goal.title, 'target_date': goal.target_date}
+            for goal in data.upcoming_goals
+        ],
+        'recent_milestones': [
+            {'id': milestone.pk, 'language_id': milestone.language_id, 'title': milestone.title,
+             'date_created': milestone.date_created}
+            for milestone in data.recent_milestones
+        ],
+    })
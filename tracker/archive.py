@@ -0,0 +1,102 @@
+"""Moving old study sessions out of the DailyProgress table and back.
+
+Nearly every read of DailyProgress is about the last few months, while the
+table, its indexes and every backup carry the whole history. ``archive``
+moves the sessions dated before a horizon into ArchivedProgress, a table of
+the same columns with a single index, ``BATCH_SIZE`` rows per INSERT ...
+SELECT and DELETE pair, each pair in its own short transaction.
+``unarchive`` moves them back the same way.
+
+Moved rows keep their ids, so search documents and links still point at
+them, and the rollups are computed from both tables (see tracker/rollups.py),
+so archiving leaves every rollup bucket as it was. Readers of the full
+history (the progress list and API, export, search and review replays) read
+both tables: ``sources(DailyProgress)`` lists the models to read.
+
+An archived session is moved back when an edit or deletion of it is
+submitted. Opening its form only reads it, through ``peek``.
+"""
+import datetime
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from . import caching
+from .db import copy_rows, delete_rows
+from .models import DailyProgress, ArchivedProgress
+
+BATCH_SIZE = 5000
+ARCHIVES = {DailyProgress: ArchivedProgress}
+
+
+def sources(model):
+    """``model`` followed by its archive model, if it has one."""
+    return [model, ARCHIVES[model]] if model in ARCHIVES else [model]
+
+
+def horizon(today=None):
+    """The first day kept in DailyProgress by ``archive`` with the default settings."""
+    today = today or timezone.localdate()
+    return today - datetime.timedelta(days=settings.TRACKER_ARCHIVE_AFTER_DAYS)
+
+
+def _move(rows, target, batch_size, on_batch):
+    """Move the rows of ``rows`` into ``target``'s table in batches; returns how many."""
+    moved = 0
+    users = set()
+    while True:
+        with transaction.atomic():
+            ids = list(rows.order_by('pk').values_list('pk', flat=True)[:batch_size])
+            if not ids:
+                break
+            batch = rows.filter(pk__gte=ids[0], pk__lte=ids[-1])
+            users.update(batch.values_list('user_id', flat=True).order_by().distinct())
+            copy_rows(batch, target)
+            # Delete only what was copied, whatever was written since the ids were read.
+            copied = target.objects.filter(pk__gte=ids[0], pk__lte=ids[-1])
+            count = delete_rows(rows.model.objects.filter(pk__in=copied.values('pk')))
+        moved += count
+        if on_batch is not None:
+            on_batch(moved)
+    for user_id in users - {None}:
+        caching.bump_version(user_id)
+    return moved
+
+
+def archive(before=None, user_id=None, batch_size=BATCH_SIZE, on_batch=None):
+    """Move the sessions dated before ``before`` (default: ``horizon()``) to the archive; returns how many.
+
+    ``on_batch(moved)`` is called after every batch.
+    """
+    rows = DailyProgress.objects.filter(date__lt=before or horizon())
+    if user_id is not None:
+        rows = rows.filter(user_id=user_id)
+    return _move(rows, ArchivedProgress, batch_size, on_batch)
+
+
+def unarchive(since=None, user_id=None, batch_size=BATCH_SIZE, on_batch=None):
+    """Move archived sessions dated on or after ``since`` (all when None) back; returns how many."""
+    rows = ArchivedProgress.objects.all()
+    if since is not None:
+        rows = rows.filter(date__gte=since)
+    if user_id is not None:
+        rows = rows.filter(user_id=user_id)
+    return _move(rows, DailyProgress, batch_size, on_batch)
+
+
+def restore(user, pk):
+    """Move ``user``'s archived session ``pk`` back to DailyProgress; returns whether there was one."""
+    return bool(_move(ArchivedProgress.objects.filter(pk=pk, user=user), DailyProgress, 1, None))
+
+
+def peek(user, pk):
+    """``user``'s archived session ``pk`` as an unsaved DailyProgress, or None; it stays in the archive."""
+    row = ArchivedProgress.objects.filter(pk=pk, user=user).select_related('language').first()
+    if row is None:
+        return None
+    progress = DailyProgress(**{field.attname: getattr(row, field.attname)
+                                for field in ArchivedProgress._meta.concrete_fields})
+    progress.language = row.language
+    progress.is_archived = True
+    return progress
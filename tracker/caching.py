@@ -0,0 +1,171 @@
+"""Per-user versioned cache for rendered page fragments.
+
+Every user has a data version that the signal receivers bump on any write
+to their languages, topics, progress, resources, milestones or goals.
+Fragment keys embed the version, so a write makes the user's old fragments
+unreachable and eviction reclaims them; nothing has to be deleted by key.
+
+The versions are rows of DataVersion, so a write made by any web worker or
+by the job runner is seen by all of them; the fragments themselves can stay
+in a per-process cache. ``data_version_middleware`` reads a version at most once
+per request. A bump made inside a transaction is rolled back with it.
+
+Fragments live in the ``tracker`` cache alias (falling back to ``default``).
+The settings bound it with MAX_ENTRIES: the local-memory backend evicts the
+least recently used entries, the file-based backend culls when full.
+
+Hits and misses are counted in memory and added to the CacheCounter rows at
+most every TRACKER_CACHE_STATS_FLUSH_SECONDS, so ``stats`` (and ``manage.py
+cache_stats``) sees the totals of every process, short of the counts a process
+has not flushed yet.
+"""
+import hashlib
+import threading
+import time
+from contextvars import ContextVar
+from inspect import iscoroutinefunction
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db.models import F
+from django.utils.decorators import sync_and_async_middleware
+
+from .models import CacheCounter, DataVersion
+
+CACHE_ALIAS = 'tracker'
+FRAGMENT_TIMEOUT = 60 * 60 * 24
+STATS = ('hits', 'misses')
+
+
+def get_cache():
+    return caches[CACHE_ALIAS if CACHE_ALIAS in settings.CACHES else 'default']
+
+
+# User id -> data version, for the duration of a request.
+_request_versions = ContextVar('tracker_data_versions', default=None)
+
+
+def data_version(user_id):
+    """The current data version of ``user_id``."""
+    versions = _request_versions.get()
+    if versions is not None and user_id in versions:
+        return versions[user_id]
+    rows = DataVersion.objects.filter(user_id=user_id).values_list('version', flat=True)
+    version = rows.first()
+    if version is None:
+        # Start from the clock rather than 1: if the row was deleted with its
+        # user, fragments cached under an earlier count must not become current again.
+        DataVersion.objects.bulk_create([DataVersion(user_id=user_id, version=time.time_ns())],
+                                        ignore_conflicts=True)
+        version = rows.first()
+    if versions is not None:
+        versions[user_id] = version
+    return version
+
+
+def bump_version(user_id):
+    """Invalidate every cached fragment of ``user_id``."""
+    if user_id is None:
+        return
+    versions = _request_versions.get()
+    if versions is not None:
+        versions.pop(user_id, None)
+    if not DataVersion.objects.filter(user_id=user_id).update(version=F('version') + 1):
+        DataVersion.objects.bulk_create([DataVersion(user_id=user_id, version=time.time_ns())],
+                                        ignore_conflicts=True)
+
+
+@sync_and_async_middleware
+def data_version_middleware(get_response):
+    """Remembers the data versions read while handling a request, so each costs one query."""
+    if iscoroutinefunction(get_response):
+        async def middleware(request):
+            token = _request_versions.set({})
+            try:
+                return await get_response(request)
+            finally:
+                _request_versions.reset(token)
+    else:
+        def middleware(request):
+            token = _request_versions.set({})
+            try:
+                return get_response(request)
+            finally:
+                _request_versions.reset(token)
+    return middleware
+
+
+def fragment_key(user_id, name, vary_on=()):
+    digest = hashlib.md5(':'.join(str(part) for part in vary_on).encode(), usedforsecurity=False).hexdigest()
+    return f'tracker:fragment:{user_id}:{data_version(user_id)}:{name}:{digest}'
+
+
+def get_fragment(user_id, name, vary_on=()):
+    """A cached fragment, or None; counts the hit or miss."""
+    value = get_cache().get(fragment_key(user_id, name, vary_on))
+    _count('misses' if value is None else 'hits')
+    return value
+
+
+def set_fragment(user_id, name, value, vary_on=()):
+    get_cache().set(fragment_key(user_id, name, vary_on), value, FRAGMENT_TIMEOUT)
+
+
+def cached_value(user_id, name, compute, vary_on=()):
+    """``compute()``, cached like a fragment until the user's next write."""
+    cache = get_cache()
+    key = fragment_key(user_id, f'value:{name}', vary_on)
+    value = cache.get(key)
+    if value is None:
+        value = compute()
+        cache.set(key, value, FRAGMENT_TIMEOUT)
+    return value
+
+
+def fragments_cached(user_id, names, vary_on=()):
+    """Whether every named fragment is cached; not counted as a hit or miss."""
+    keys = [fragment_key(user_id, name, vary_on) for name in names]
+    return len(get_cache().get_many(keys)) == len(keys)
+
+
+# Counts not yet added to the CacheCounter rows, and when they last were.
+_pending = dict.fromkeys(STATS, 0)
+_pending_lock = threading.Lock()
+_last_flush = time.monotonic()
+
+
+def _count(kind):
+    with _pending_lock:
+        _pending[kind] += 1
+        due = time.monotonic() - _last_flush >= settings.TRACKER_CACHE_STATS_FLUSH_SECONDS
+    if due:
+        flush_stats()
+
+
+def flush_stats():
+    """Add this process's pending hit and miss counts to the shared counters."""
+    global _last_flush
+    with _pending_lock:
+        counts = {kind: count for kind, count in _pending.items() if count}
+        _pending.update(dict.fromkeys(STATS, 0))
+        _last_flush = time.monotonic()
+    for kind, count in counts.items():
+        if not CacheCounter.objects.filter(name=kind).update(value=F('value') + count):
+            CacheCounter.objects.bulk_create([CacheCounter(name=kind)], ignore_conflicts=True)
+            CacheCounter.objects.filter(name=kind).update(value=F('value') + count)
+
+
+def stats():
+    """Fragment hits, misses and hit rate since the counters were last reset."""
+    flush_stats()
+    values = dict(CacheCounter.objects.filter(name__in=STATS).values_list('name', 'value'))
+    hits = values.get('hits', 0)
+    misses = values.get('misses', 0)
+    total = hits + misses
+    return {'hits': hits, 'misses': misses, 'hit_rate': hits / total if total else 0.0}
+
+
+def reset_stats():
+    with _pending_lock:
+        _pending.update(dict.fromkeys(STATS, 0))
+    CacheCounter.objects.filter(name__in=STATS).update(value=0)
@@ -0,0 +1,151 @@
+"""Trend chart data: study time per language and confidence per topic over time.
+
+Series are read from DailyRollup, which already holds DailyProgress (and its
+archive) summed per day, grouped into day, week or month buckets by the
+database's date truncation. That is one grouped query whatever the length of
+the history. Series with more buckets than the requested point budget are
+reduced with largest-triangle-three-buckets (LTTB), which keeps the peaks and
+dips that averaging neighbouring buckets would flatten.
+
+Ranges end on the current day in the timezone the browser reports, and results
+are cached per user data version, range, granularity and budget.
+"""
+import datetime
+from dataclasses import dataclass
+
+from django.db.models import DateField, Min, Sum
+from django.db.models.functions import Trunc
+
+from .models import DailyRollup
+
+METRICS = ('minutes', 'confidence')
+GRANULARITIES = ('day', 'week', 'month')
+# Range name -> days back from today; None for the whole history.
+RANGES = {'90d': 90, '1y': 365, '5y': 5 * 365, 'all': None}
+DEFAULT_POINTS = 200
+MAX_SERIES = 10
+
+
+@dataclass(frozen=True)
+class Series:
+    """One line of a chart: a language's minutes or a topic's average confidence per bucket."""
+    id: int
+    label: str
+    points: list  # (bucket start, value) pairs, oldest first.
+
+
+class BucketStart(Trunc):
+    """``Trunc`` of a date column to its day, week (from Monday) or month.
+
+    Django's SQLite backend truncates through a Python function called once
+    per row; SQLite's own date functions do the same on the ISO date strings
+    several times faster.
+    """
+
+    def as_sqlite(self, compiler, connection, **extra_context):
+        sql, params = compiler.compile(self.lhs)
+        if self.kind == 'month':
+            return f"strftime('%%Y-%%m-01', {sql})", params
+        if self.kind == 'week':
+            return f"date({sql}, 'weekday 0', '-6 days')", params
+        return sql, params
+
+
+def lttb(points, threshold):
+    """Downsample (x, y) ``points``, sorted by numeric x, to ``threshold`` points.
+
+    The first and last points are kept. The points in between are split into
+    ``threshold - 2`` buckets. From each bucket the point kept is the one
+    forming the largest triangle with the previously kept point and the
+    average of the next bucket.
+    """
+    if threshold >= len(points) or threshold < 3:
+        return list(points)
+    sampled = [points[0]]
+    every = (len(points) - 2) / (threshold - 2)
+    previous = points[0]
+    for i in range(threshold - 2):
+        following = points[int((i + 1) * every) + 1:min(int((i + 2) * every) + 1, len(points))]
+        average_x = sum(x for x, _ in following) / len(following)
+        average_y = sum(y for _, y in following) / len(following)
+        previous_x, previous_y = previous
+        best, best_area = None, -1
+        for point in points[int(i * every) + 1:int((i + 1) * every) + 1]:
+            x, y = point
+            area = abs((previous_x - average_x) * (y - previous_y) - (previous_x - x) * (average_y - previous_y))
+            if area > best_area:
+                best, best_area = point, area
+        sampled.append(best)
+        previous = best
+    sampled.append(points[-1])
+    return sampled
+
+
+def bucket_start(day, granularity):
+    if granularity == 'week':
+        return day - datetime.timedelta(days=day.weekday())
+    if granularity == 'month':
+        return day.replace(day=1)
+    return day
+
+
+def bucket_starts(start, end, granularity):
+    """Every bucket from the one holding ``start`` to the one holding ``end``."""
+    day = bucket_start(start, granularity)
+    while day <= end:
+        yield day
+        if granularity == 'month':
+            day = (day + datetime.timedelta(days=32)).replace(day=1)
+        else:
+            day += datetime.timedelta(days=7 if granularity == 'week' else 1)
+
+
+def date_range(user, range_name, today):
+    """(first day, today) of ``range_name``; the whole history starts at the user's first study day."""
+    days = RANGES[range_name]
+    if days is not None:
+        return today - datetime.timedelta(days=days - 1), today
+    first = DailyRollup.objects.filter(user=user).aggregate(first=Min('day'))['first']
+    return min(first or today, today), today
+
+
+def trend(user, metric, start, end, granularity, points=DEFAULT_POINTS, language_id=None, topic_id=None):
+    """The ``metric`` series of ``user`` from ``start`` to ``end``, at most ``points`` points each.
+
+    ``minutes`` has one series per language, with empty buckets as zero;
+    ``confidence`` one per topic, with only the buckets that have sessions.
+    At most MAX_SERIES series are returned: those with the most minutes or
+    sessions in the range.
+    """
+    key = 'language' if metric == 'minutes' else 'topic'
+    rows = DailyRollup.objects.filter(user=user, day__range=(start, end))
+    if language_id is not None:
+        rows = rows.filter(language_id=language_id)
+    if topic_id is not None:
+        rows = rows.filter(topic_id=topic_id)
+    if key == 'topic':
+        rows = rows.filter(topic__isnull=False)
+    rows = (
+        rows.annotate(bucket=BucketStart('day', granularity, output_field=DateField()))
+        .values('bucket', key, f'{key}__name')
+        .annotate(minutes=Sum('total_minutes'), sessions=Sum('session_count'), confidence=Sum('confidence_sum'))
+        .order_by()
+    )
+    buckets, labels, weights = {}, {}, {}
+    for row in rows:
+        series_id = row[key]
+        labels[series_id] = row[f'{key}__name']
+        weights[series_id] = weights.get(series_id, 0) + row['minutes' if key == 'language' else 'sessions']
+        value = row['minutes'] if key == 'language' else round(row['confidence'] / row['sessions'], 2)
+        buckets.setdefault(series_id, {})[row['bucket']] = value
+    chosen = sorted(weights, key=lambda series_id: (-weights[series_id], series_id))[:MAX_SERIES]
+    everything = list(bucket_starts(start, end, granularity))
+    series = []
+    for series_id in chosen:
+        values = buckets[series_id]
+        if key == 'language':
+            values = {day: values.get(day, 0) for day in everything}
+        sampled = lttb([(day.toordinal(), value) for day, value in sorted(values.items())], points)
+        series.append(Series(series_id, labels[series_id],
+                             [(datetime.date.fromordinal(x), value) for x, value in sampled]))
+    return series
@@ -0,0 +1,53 @@
+"""Per-user choice lists for the language and topic fields of the entry forms.
+
+The lists are cached like page fragments, under the user's data version
+(see tracker/caching.py), so any write to the user's languages or topics, in
+any process, retires them. Once warm, rendering a form only costs the version
+read. Users
+with more than ``TRACKER_AUTOCOMPLETE_THRESHOLD`` topics get an autocomplete
+field instead of a full ``<select>``, backed by ``autocomplete()``.
+"""
+from django.conf import settings
+
+from . import caching
+from .models import Language, Topic
+
+AUTOCOMPLETE_LIMIT = 20
+# Cached in place of a topic list that is too long to render.
+TOO_MANY = 'too-many'
+
+
+def autocomplete_threshold():
+    return getattr(settings, 'TRACKER_AUTOCOMPLETE_THRESHOLD', 300)
+
+
+def language_choices(user_id):
+    """``(pk, label)`` pairs for every language of the user, by name."""
+    return caching.cached_value(user_id, 'language-choices', lambda: list(
+        Language.objects.filter(user_id=user_id).order_by('name', 'pk').values_list('pk', 'name')))
+
+
+def topic_choices(user_id):
+    """``(pk, label)`` pairs for the user's topics, or None when there are too many to list."""
+    def compute():
+        limit = autocomplete_threshold()
+        rows = (Topic.objects.filter(user_id=user_id).order_by('language__name', 'name', 'pk')
+                .values_list('pk', 'name', 'language__name')[:limit + 1])
+        choices = [(pk, f"{name} ({language})") for pk, name, language in rows]
+        return TOO_MANY if len(choices) > limit else choices
+
+    choices = caching.cached_value(user_id, 'topic-choices', compute)
+    return None if choices == TOO_MANY else choices
+
+
+def autocomplete(user_id, kind, prefix, language_id=None, limit=AUTOCOMPLETE_LIMIT):
+    """Up to ``limit`` ``{'id', 'text'}`` dicts whose name starts with ``prefix``."""
+    if kind == 'language':
+        rows = (Language.objects.filter(user_id=user_id, name__istartswith=prefix)
+                .order_by('name', 'pk').values_list('pk', 'name')[:limit])
+        return [{'id': pk, 'text': name} for pk, name in rows]
+    topics = Topic.objects.filter(user_id=user_id, name__istartswith=prefix)
+    if language_id:
+        topics = topics.filter(language_id=language_id)
+    rows = topics.order_by('name', 'pk').values_list('pk', 'name', 'language__name')[:limit]
+    return [{'id': pk, 'text': f"{name} ({language})"} for pk, name, language in rows]
@@ -0,0 +1,138 @@
+"""Database helpers shared by the views.
+
+``run_with_retry`` retries write transactions that lose a race for SQLite's
+write lock. SQLite allows one writer at a time; writers wait up to the
+connection's busy timeout for the lock and then fail with "database is
+locked". Since the whole transaction is rolled back, it is safe to run it
+again.
+
+``gather_queries`` lets async views run independent read queries at the
+same time, each on its own connection.
+
+``estimated_count`` reads a table's size from the database's statistics
+instead of counting it.
+
+``delete_rows`` and ``copy_rows`` move rows with one set-based statement each.
+"""
+import asyncio
+import random
+import time
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+from django.db import OperationalError, close_old_connections, connection, transaction
+
+RETRY_ATTEMPTS = 5
+RETRY_DELAY = 0.05
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+
+def is_lock_error(exc):
+    message = str(exc).lower()
+    return 'database is locked' in message or 'database table is locked' in message
+
+
+def run_with_retry(func, attempts=RETRY_ATTEMPTS, delay=RETRY_DELAY):
+    """Call ``func`` in a transaction, retrying it if the database is locked.
+
+    Inside an outer transaction a lock error can only be handled by retrying
+    that transaction, so ``func`` is simply called.
+    """
+    if connection.in_atomic_block:
+        return func()
+    for attempt in range(attempts):
+        try:
+            with transaction.atomic():
+                return func()
+        except OperationalError as exc:
+            if not is_lock_error(exc) or attempt == attempts - 1:
+                raise
+        # Exponential backoff with jitter, so competing writers spread out.
+        time.sleep(delay * 2 ** attempt * random.uniform(0.5, 1.5))
+
+
+def retry_on_lock(view):
+    """Run a view's unsafe requests as one transaction, retried on lock contention."""
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        if request.method in SAFE_METHODS:
+            return view(request, *args, **kwargs)
+        return run_with_retry(lambda: view(request, *args, **kwargs))
+    return wrapper
+
+
+def _in_atomic_block():
+    return connection.in_atomic_block
+
+
+def _on_worker_thread(func):
+    def run():
+        try:
+            return func()
+        finally:
+            # Worker threads never see request_finished, so apply CONN_MAX_AGE here;
+            # with a pool this hands the connection back.
+            close_old_connections()
+    return sync_to_async(run, thread_sensitive=False)
+
+
+async def gather_queries(*funcs):
+    """Await the results of independent, read-only ORM callables.
+
+    Each callable runs in its own thread with its own connection. Inside a
+    transaction they run one after another on the transaction's connection
+    instead, as other connections could not see its uncommitted rows.
+    """
+    if await sync_to_async(_in_atomic_block)():
+        return [await sync_to_async(func)() for func in funcs]
+    return await asyncio.gather(*(_on_worker_thread(func)() for func in funcs))
+
+
+def estimated_count(model):
+    """Approximate number of rows in ``model``'s table, or None when there is nothing to estimate from.
+
+    PostgreSQL keeps the planner's estimate in ``pg_class.reltuples`` (-1 until
+    the table is first analyzed). SQLite has ``sqlite_stat1`` after ANALYZE:
+    one row per index, whose first number is the rows in that index. Partial
+    indexes hold fewer rows than the table, so the largest is taken.
+    """
+    table = model._meta.db_table
+    with connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            cursor.execute("SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass",
+                           [connection.ops.quote_name(table)])
+            row = cursor.fetchone()
+            return row[0] if row and row[0] >= 0 else None
+        if connection.vendor == 'sqlite':
+            cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'sqlite_stat1'")
+            if cursor.fetchone():
+                cursor.execute("SELECT stat FROM sqlite_stat1 WHERE tbl = %s", [table])
+                counts = [int(stat.split()[0]) for stat, in cursor.fetchall() if stat]
+                if counts:
+                    return max(counts)
+    return None
+
+
+def delete_rows(queryset):
+    """DELETE the rows of ``queryset`` in one statement, bypassing the collector and signals."""
+    subquery, params = queryset.values('pk').query.sql_with_params()
+    opts = queryset.model._meta
+    quote = connection.ops.quote_name
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {quote(opts.db_table)} WHERE {quote(opts.pk.column)} IN ({subquery})", params)
+        return cursor.rowcount
+
+
+def copy_rows(queryset, model):
+    """INSERT the rows of ``queryset`` into ``model``'s table with INSERT ... SELECT; returns how many.
+
+    ``model`` must have concrete fields of the same names as the queryset's model.
+    """
+    fields = model._meta.concrete_fields
+    columns = [field.column for field in fields]
+    select, params = queryset.values(*(field.attname for field in fields)).query.sql_with_params()
+    quote = connection.ops.quote_name
+    with connection.cursor() as cursor:
+        cursor.execute(f"INSERT INTO {quote(model._meta.db_table)} ({', '.join(map(quote, columns))}) {select}",
+                       params)
+        return cursor.rowcount
@@ -0,0 +1,83 @@
+"""Deleting a language together with its whole history.
+
+``Language.delete()`` has the ORM collect every dependent topic, session,
+resource and milestone into memory and send signals for each one before it
+deletes anything, which for years of sessions means minutes of work and
+hundreds of megabytes. ``delete_language`` removes the dependents itself
+instead, ``CHUNK_SIZE`` rows per set-based DELETE, each chunk with its search
+documents in its own short transaction, retried alone if the database is
+locked. Callers must not wrap it in a transaction of their own, which would
+make it one long one again. Rollup buckets are keyed by language,
+so they are dropped with one statement rather than recomputed, and the
+language row goes last through the ORM, whose cascade then finds nothing
+left and whose signals drop the cached choices and pages.
+
+Each step only looks at the rows still there, so an interrupted deletion is
+finished by running it again.
+"""
+from . import caching, rollups
+from .db import delete_rows, run_with_retry
+from .models import Topic, DailyProgress, ArchivedProgress, DailyRollup, Resource, Milestone, SearchDocument
+
+CHUNK_SIZE = 5000
+# Dependents in deletion order, with their kind of search document. Topics go
+# last: sessions and rollups refer to them.
+DEPENDENTS = [
+    (DailyProgress, 'progress'),
+    (ArchivedProgress, 'progress'),
+    (Resource, 'resource'),
+    (Milestone, 'milestone'),
+    (Topic, 'topic'),
+]
+
+
+def _delete_in_chunks(model, kind, language, chunk_size, on_chunk):
+    rows = model.objects.filter(language=language)
+    deleted = 0
+    def delete_chunk():
+        chunk = rows.order_by('pk')[:chunk_size]
+        SearchDocument.objects.filter(kind=kind, object_id__in=chunk.values('pk')).delete()
+        return delete_rows(chunk)
+
+    while True:
+        count = run_with_retry(delete_chunk)
+        if not count:
+            return deleted
+        deleted += count
+        caching.bump_version(language.user_id)
+        on_chunk(count)
+
+
+def delete_language(language, chunk_size=CHUNK_SIZE, on_progress=None):
+    """Delete ``language`` and everything recorded under it; returns {kind: rows deleted}.
+
+    ``on_progress(done, total)`` is called after every chunk.
+    """
+    total = sum(model.objects.filter(language=language).count() for model, _ in DEPENDENTS)
+    done = 0
+
+    def on_chunk(count):
+        nonlocal done
+        done += count
+        if on_progress is not None:
+            on_progress(done, total)
+
+    # Sessions of other languages filed under one of its topics lose the topic,
+    # as SET_NULL would have done, and move to the topic-less rollup bucket.
+    def detach_strays():
+        moved = set()
+        for model in (DailyProgress, ArchivedProgress):
+            strays = model.objects.filter(topic__language=language).exclude(language=language)
+            moved.update(strays.values_list('user_id', 'date').distinct())
+            model.objects.filter(pk__in=strays.values('pk')).update(topic=None)
+        for user_id in {user_id for user_id, _ in moved}:
+            rollups.refresh(user_id, [day for owner, day in moved if owner == user_id])
+
+    run_with_retry(detach_strays)
+    deleted = {}
+    for model, kind in DEPENDENTS:
+        if model is Topic:
+            run_with_retry(DailyRollup.objects.filter(language=language).delete)
+        deleted[kind] = deleted.get(kind, 0) + _delete_in_chunks(model, kind, language, chunk_size, on_chunk)
+    run_with_retry(language.delete)
+    return deleted
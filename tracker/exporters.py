@@ -0,0 +1,110 @@
+"""Constant-memory export of a user's data as CSV or JSON Lines.
+
+Rows are read with ``values_list().iterator()`` (a server-side cursor on
+PostgreSQL, chunked fetches on SQLite) with language and topic names joined
+in the same query, and encoded one line at a time for a streaming response.
+Progress is read from DailyProgress and its archive table together, merged
+by id.
+
+Under ASGI, Django reads a sync iterator passed to StreamingHttpResponse to
+the end before sending anything, so ``aiter_export`` hands the same lines
+over in batches from a worker thread instead.
+"""
+import csv
+import heapq
+import json
+from itertools import islice
+
+from asgiref.sync import sync_to_async
+
+from .archive import sources
+from .models import Language, Topic, DailyProgress, Resource, Milestone, Goal
+
+FORMATS = {
+    'csv': 'text/csv',
+    'jsonl': 'application/x-ndjson',
+}
+CHUNK_SIZE = 2000
+LINES_PER_BATCH = 500
+
+# Dataset name -> (model, [(column name, field lookup)]). The progress columns
+# match what tracker.importers expects, so an export can be imported again.
+DATASETS = {
+    'languages': (Language, [
+        ('name', 'name'), ('description', 'description'),
+        ('difficulty_level', 'difficulty_level'), ('date_started', 'date_started'),
+    ]),
+    'topics': (Topic, [
+        ('language', 'language__name'), ('name', 'name'), ('description', 'description'),
+    ]),
+    'progress': (DailyProgress, [
+        ('date', 'date'), ('language', 'language__name'), ('topic', 'topic__name'),
+        ('what_i_learned', 'what_i_learned'), ('time_spent_minutes', 'time_spent_minutes'),
+        ('confidence_level', 'confidence_level'),
+    ]),
+    'resources': (Resource, [
+        ('language', 'language__name'), ('title', 'title'), ('link', 'link'),
+        ('resource_type', 'resource_type'),
+    ]),
+    'milestones': (Milestone, [
+        ('language', 'language__name'), ('title', 'title'), ('details', 'details'),
+        ('is_completed', 'is_completed'), ('date_created', 'date_created'),
+    ]),
+    'goals': (Goal, [
+        ('title', 'title'), ('details', 'details'), ('target_date', 'target_date'),
+        ('is_completed', 'is_completed'),
+    ]),
+}
+
+
+class Echo:
+    """File-like object whose ``write`` returns the value, for csv.writer."""
+
+    def write(self, value):
+        return value
+
+
+def export_rows(user, dataset):
+    """Yield the header and value tuples of ``dataset`` for ``user``."""
+    model, columns = DATASETS[dataset]
+    yield tuple(name for name, _ in columns)
+    querysets = [
+        source.objects.filter(user=user).order_by('pk')
+        .values_list('pk', *(lookup for _, lookup in columns))
+        for source in sources(model)
+    ]
+    for row in heapq.merge(*(queryset.iterator(chunk_size=CHUNK_SIZE) for queryset in querysets)):
+        yield row[1:]
+
+
+def iter_csv(user, dataset):
+    writer = csv.writer(Echo())
+    for row in export_rows(user, dataset):
+        yield writer.writerow(row)
+
+
+def iter_jsonl(user, dataset):
+    rows = export_rows(user, dataset)
+    header = next(rows)
+    for row in rows:
+        yield json.dumps(dict(zip(header, row)), default=str) + '\n'
+
+
+def iter_export(user, dataset, fmt):
+    """Encoded lines of ``dataset`` in ``fmt``, for a StreamingHttpResponse."""
+    return iter_csv(user, dataset) if fmt == 'csv' else iter_jsonl(user, dataset)
+
+
+async def aiter_export(user, dataset, fmt, batch_size=LINES_PER_BATCH):
+    """``iter_export`` as an async iterator of ``batch_size`` lines at a time, for ASGI servers.
+
+    The lines are read on the request's thread, which holds the connection and
+    cursor the export reads from.
+    """
+    lines = iter_export(user, dataset, fmt)
+    read = sync_to_async(lambda: ''.join(islice(lines, batch_size)))
+    try:
+        while batch := await read():
+            yield batch
+    finally:
+        await sync_to_async(lines.close)()
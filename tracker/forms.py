@@ -1,6 +1,9 @@
 from django import forms
 from django.contrib.auth.forms import UserCreationForm
 from django.contrib.auth.models import User
+from django.urls import reverse
+from . import choices
+from .languages import LanguageResolver, normalize
 from .models import Language, Topic, DailyProgress, Resource, Milestone, Goal
 
 class CustomUserCreationForm(UserCreationForm):
@@ -29,7 +32,61 @@ class LanguageForm(forms.ModelForm):
             'description': forms.Textarea(attrs={'rows': 3}),
         }
 
-class TopicForm(forms.ModelForm):
+    def __init__(self, *args, user=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.user = user
+
+    def clean_name(self):
+        # The unique constraint ignores case and involves the user, which is not a
+        # form field, so ModelForm's own constraint validation skips it.
+        name = normalize(self.cleaned_data['name'])
+        if self.user is not None:
+            duplicates = Language.objects.filter(user=self.user, name__iexact=name).exclude(pk=self.instance.pk)
+            if duplicates.exists():
+                raise forms.ValidationError("You already have a language with this name.")
+        return name
+
+class UserChoicesMixin:
+    """Limits the language and topic fields to ``user``'s rows.
+
+    Options are rendered from the per-user choice cache instead of iterating
+    the querysets, which are still used to validate submitted values.
+    """
+
+    def __init__(self, *args, user=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.user = user
+        if 'topic' in self.fields:
+            # Topic labels include the language name; join it instead of one query per option.
+            self.fields['topic'].queryset = Topic.objects.select_related('language')
+        if user is not None:
+            self.scope_choices(user)
+
+    def scope_choices(self, user):
+        language = self.fields['language']
+        language.queryset = Language.objects.filter(user=user)
+        # Callable choices are only evaluated when the form is rendered.
+        language.choices = lambda: [('', language.empty_label)] + choices.language_choices(user.pk)
+        if 'topic' in self.fields:
+            topic = self.fields['topic']
+            topic.queryset = topic.queryset.filter(user=user)
+            topic_choices = choices.topic_choices(user.pk)
+            if topic_choices is None:
+                # Too many topics for a <select>: offer only the current one and let the
+                # autocomplete endpoint fill in the rest as the user types.
+                value = self['topic'].value()
+                current = topic.queryset.filter(pk=value) if str(value).isdigit() else []
+                topic_choices = [(obj.pk, str(obj)) for obj in current]
+                topic.widget.attrs['data-autocomplete-url'] = reverse('autocomplete', args=['topic'])
+            topic.choices = [('', topic.empty_label)] + topic_choices
+
+    def resolve_language(self, name):
+        """The user's language called ``name``, created if it does not exist yet."""
+        if not hasattr(self, 'language_resolver'):
+            self.language_resolver = LanguageResolver(self.user)
+        return self.language_resolver.resolve(name)
+
+class TopicForm(UserChoicesMixin, forms.ModelForm):
     new_language = forms.CharField(required=False, label="Or add new language", widget=forms.TextInput(attrs={'placeholder': 'Type new language name'}))
 
     class Meta:
@@ -52,13 +109,13 @@ class TopicForm(forms.ModelForm):
             raise forms.ValidationError("Please select a language or add a new one.")
         
         if new_language:
-            language, created = Language.objects.get_or_create(name=new_language)
+            language = self.resolve_language(new_language)
             cleaned_data['language'] = language
             self.instance.language = language
         
         return cleaned_data
 
-class DailyProgressForm(forms.ModelForm):
+class DailyProgressForm(UserChoicesMixin, forms.ModelForm):
     new_language = forms.CharField(required=False, label="Or add new language", widget=forms.TextInput(attrs={'placeholder': 'Type new language name'}))
 
     class Meta:
@@ -82,13 +139,13 @@ class DailyProgressForm(forms.ModelForm):
             raise forms.ValidationError("Please select a language or add a new one.")
         
         if new_language:
-            language, created = Language.objects.get_or_create(name=new_language)
+            language = self.resolve_language(new_language)
             cleaned_data['language'] = language
             self.instance.language = language
         
         return cleaned_data
 
-class ResourceForm(forms.ModelForm):
+class ResourceForm(UserChoicesMixin, forms.ModelForm):
     new_language = forms.CharField(required=False, label="Or add new language", widget=forms.TextInput(attrs={'placeholder': 'Type new language name'}))
 
     class Meta:
@@ -108,13 +165,13 @@ class ResourceForm(forms.ModelForm):
             raise forms.ValidationError("Please select a language or add a new one.")
         
         if new_language:
-            language, created = Language.objects.get_or_create(name=new_language)
+            language = self.resolve_language(new_language)
             cleaned_data['language'] = language
             self.instance.language = language
         
         return cleaned_data
 
-class MilestoneForm(forms.ModelForm):
+class MilestoneForm(UserChoicesMixin, forms.ModelForm):
     new_language = forms.CharField(required=False, label="Or add new language", widget=forms.TextInput(attrs={'placeholder': 'Type new language name'}))
 
     class Meta:
@@ -137,7 +194,7 @@ class MilestoneForm(forms.ModelForm):
             raise forms.ValidationError("Please select a language or add a new one.")
         
         if new_language:
-            language, created = Language.objects.get_or_create(name=new_language)
+            language = self.resolve_language(new_language)
             cleaned_data['language'] = language
             self.instance.language = language
         
@@ -151,3 +208,9 @@ class GoalForm(forms.ModelForm):
             'target_date': forms.DateInput(attrs={'type': 'date'}),
             'details': forms.Textarea(attrs={'rows': 3}),
         }
+
+class ProgressImportForm(forms.Form):
+    FORMAT_CHOICES = [('', 'Detect from file name'), ('csv', 'CSV'), ('jsonl', 'JSON Lines')]
+
+    file = forms.FileField(help_text="Columns: date, language, topic, what_i_learned, time_spent_minutes, confidence_level.")
+    format = forms.ChoiceField(choices=FORMAT_CHOICES, required=False)
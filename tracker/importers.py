@@ -0,0 +1,260 @@
+"""Streaming bulk import of study sessions from CSV or JSON Lines.
+
+Rows are parsed one at a time, validated with the same field rules as
+DailyProgressForm, and written in fixed-size chunks. Each chunk is its own
+transaction, so memory use is bounded by the chunk size and a bad row only
+costs that row.
+
+Expected columns: ``date``, ``language``, ``topic`` (optional),
+``what_i_learned``, ``time_spent_minutes`` and ``confidence_level``.
+Languages are matched by name regardless of case, topics by exact name;
+both are created when missing.
+"""
+import csv
+import datetime
+import io
+import json
+import re
+from collections import namedtuple
+from dataclasses import dataclass, field
+
+from django.core.exceptions import ValidationError
+from django.db import connection, transaction
+
+from . import caching, search
+from .forms import DailyProgressForm
+from .languages import LanguageResolver, normalize
+from .models import Topic, DailyProgress
+from .signals import progress_bulk_saved
+
+FORMATS = ('csv', 'jsonl')
+CHUNK_SIZE = 5000
+MAX_REPORTED_ERRORS = 1000
+VALUE_FIELDS = ('date', 'what_i_learned', 'time_spent_minutes', 'confidence_level')
+INSERT_COLUMNS = ('user_id', 'language_id', 'topic_id') + VALUE_FIELDS
+ISO_DATE = re.compile(r'\d{4}-\d{2}-\d{2}', re.ASCII)
+
+# What receivers of ``progress_bulk_saved`` get for each imported row: the
+# DailyProgress attributes they need, without the cost of a model instance.
+ImportedEntry = namedtuple('ImportedEntry', ('id',) + INSERT_COLUMNS)
+
+
+@dataclass
+class ImportResult:
+    """Outcome of an import; ``errors`` holds (line number, message) pairs."""
+    imported: int = 0
+    failed: int = 0
+    errors: list = field(default_factory=list)
+
+    def add_error(self, line, message):
+        self.failed += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append((line, message))
+
+
+def detect_format(filename):
+    """Guess the import format from a file name, defaulting to CSV."""
+    return 'jsonl' if filename.lower().endswith(('.jsonl', '.ndjson', '.json')) else 'csv'
+
+
+def iter_records(stream, fmt):
+    """Yield ``(line number, dict)`` pairs from a text stream.
+
+    Lines that cannot be parsed yield an exception instead of a dict.
+    """
+    if fmt == 'csv':
+        reader = csv.DictReader(stream)
+        for record in reader:
+            yield reader.line_num, record
+    elif fmt == 'jsonl':
+        for line_number, line in enumerate(stream, start=1):
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError as exc:
+                yield line_number, exc
+                continue
+            yield line_number, record if isinstance(record, dict) else ValueError("Expected a JSON object.")
+    else:
+        raise ValueError(f"Unsupported import format: {fmt!r}")
+
+
+class RowValidator:
+    """Applies DailyProgressForm's field rules to a raw record.
+
+    Well-formed values (ISO dates, plain digits) take a fast path that gives
+    the same result as the form field; anything else goes through the form
+    field itself so error messages match the web form. Minutes are also held
+    to the model field's validators, which bound them to what the database
+    column can store, so an oversized value fails its row rather than the
+    INSERT of the whole chunk.
+    """
+    CONFIDENCE = {str(level): level for level in range(1, 6)} | {level: level for level in range(1, 6)}
+
+    def __init__(self):
+        self.fields = DailyProgressForm.base_fields
+        self.minutes_field = DailyProgress._meta.get_field('time_spent_minutes')
+        self.max_minutes = connection.ops.integer_field_range(self.minutes_field.get_internal_type())[1]
+
+    def date(self, value):
+        # fromisoformat() alone also takes week dates such as 2024-W05-1, which the form refuses.
+        if isinstance(value, str) and ISO_DATE.fullmatch(value):
+            try:
+                return datetime.date.fromisoformat(value)
+            except ValueError:
+                pass
+        return self.fields['date'].clean(value)
+
+    def time_spent_minutes(self, value):
+        # isdigit() alone also accepts digits such as '²' that int() rejects.
+        if isinstance(value, str) and value.isascii() and value.isdigit() and len(value) <= 20:
+            value = int(value)
+        if type(value) is int and 0 <= value <= self.max_minutes:
+            return value
+        minutes = self.fields['time_spent_minutes'].clean(value)
+        self.minutes_field.run_validators(minutes)
+        return minutes
+
+    def confidence_level(self, value):
+        try:
+            return self.CONFIDENCE[value]
+        except (KeyError, TypeError):
+            return self.fields['confidence_level'].clean(value)
+
+    def what_i_learned(self, value):
+        return self.fields['what_i_learned'].clean(value)
+
+    def __call__(self, record):
+        """Return (language name, topic name, values) or raise ValidationError."""
+        if isinstance(record, Exception):
+            raise ValidationError(str(record))
+        language = str(record.get('language') or '').strip()
+        if not language:
+            raise ValidationError("Please select a language or add a new one.")
+        topic = str(record.get('topic') or '').strip() or None
+        values = []
+        errors = []
+        for name in VALUE_FIELDS:
+            try:
+                values.append(getattr(self, name)(record.get(name)))
+            except ValidationError as exc:
+                errors.extend(f"{name}: {message}" for message in exc.messages)
+            except (ValueError, TypeError, OverflowError):
+                errors.append(f"{name}: {self.fields[name].error_messages.get('invalid', 'Enter a valid value.')}")
+        if errors:
+            raise ValidationError(errors)
+        return language, topic, values
+
+
+class ProgressImporter:
+    """Imports progress entries for one user, caching name lookups across chunks."""
+
+    def __init__(self, user, chunk_size=CHUNK_SIZE):
+        self.user = user
+        self.chunk_size = chunk_size
+        self.validate = RowValidator()
+        self.resolver = LanguageResolver(user)
+        self.languages = {}
+        self.topics = {}
+
+    def run(self, stream, fmt, on_chunk=None):
+        """Import every record of ``stream``; ``on_chunk(result)`` is called after each chunk is written."""
+        result = ImportResult()
+        chunk = []
+        line_number = 0
+        try:
+            for line_number, record in iter_records(stream, fmt):
+                try:
+                    chunk.append(self.validate(record))
+                except ValidationError as exc:
+                    result.add_error(line_number, "; ".join(exc.messages))
+                    continue
+                if len(chunk) >= self.chunk_size:
+                    result.imported += self.write(chunk)
+                    chunk = []
+                    if on_chunk is not None:
+                        on_chunk(result)
+        except UnicodeDecodeError:
+            # Text is decoded in blocks, so the line is where the bad block starts at the earliest.
+            result.add_error(line_number + 1, "The file is not UTF-8 text; the rest of it was not imported.")
+        except csv.Error as exc:
+            result.add_error(line_number + 1, f"Unreadable CSV ({exc}); the rest of the file was not imported.")
+        if chunk:
+            result.imported += self.write(chunk)
+        return result
+
+    def resolve(self, chunk):
+        """Look up or create every language and topic named in ``chunk``."""
+        missing = {language for language, _, _ in chunk} - self.languages.keys()
+        if missing:
+            resolved = self.resolver.resolve_many(missing)
+            for name in missing:
+                self.languages[name] = resolved[normalize(name)].pk
+        missing = {(self.languages[language], topic) for language, topic, _ in chunk if topic} - self.topics.keys()
+        if missing:
+            names = {topic for _, topic in missing}
+            language_ids = {language_id for language_id, _ in missing}
+            for topic in Topic.objects.filter(user=self.user, language_id__in=language_ids, name__in=names):
+                self.topics.setdefault((topic.language_id, topic.name), topic.pk)
+            new = [Topic(user=self.user, language_id=language_id, name=name)
+                   for language_id, name in missing - self.topics.keys()]
+            created = Topic.objects.bulk_create(new)
+            for topic in created:
+                self.topics[(topic.language_id, topic.name)] = topic.pk
+            if created:
+                # bulk_create skips the signals that normally retire the cached form choices
+                # and index the topics for search.
+                caching.bump_version(self.user.pk)
+                search.index_many('topic', created)
+
+    def write(self, chunk):
+        with transaction.atomic():
+            self.resolve(chunk)
+            rows = []
+            for language_name, topic_name, values in chunk:
+                language_id = self.languages[language_name]
+                topic_id = self.topics[(language_id, topic_name)] if topic_name else None
+                rows.append((self.user.pk, language_id, topic_id, *values))
+            entries = insert_rows(rows)
+            progress_bulk_saved.send(sender=DailyProgress, user_id=self.user.pk, entries=entries)
+        return len(entries)
+
+
+def insert_rows(rows):
+    """Insert DailyProgress value tuples (in INSERT_COLUMNS order).
+
+    ``bulk_create`` spends most of its time compiling SQL value by value, so
+    rows go out as plain multi-row INSERT ... RETURNING statements instead.
+    Returns the rows as ImportedEntry tuples carrying their new ids.
+    """
+    opts = DailyProgress._meta
+    quote = connection.ops.quote_name
+    columns = ', '.join(quote(opts.get_field(name.removesuffix('_id')).column) for name in INSERT_COLUMNS)
+    width = len(INSERT_COLUMNS)
+    batch_size = max(1, connection.features.max_query_params // width)
+    adapt_date = connection.ops.adapt_datefield_value
+    date_index = INSERT_COLUMNS.index('date')
+    entries = []
+    with connection.cursor() as cursor:
+        for start in range(0, len(rows), batch_size):
+            batch = rows[start:start + batch_size]
+            placeholders = ', '.join(['(' + ', '.join(['%s'] * width) + ')'] * len(batch))
+            params = []
+            for row in batch:
+                params.extend(row[:date_index])
+                params.append(adapt_date(row[date_index]))
+                params.extend(row[date_index + 1:])
+            cursor.execute(
+                f"INSERT INTO {quote(opts.db_table)} ({columns}) VALUES {placeholders} "
+                f"RETURNING {quote(opts.pk.column)}", params)
+            # Rows come back in insertion order on both SQLite and PostgreSQL.
+            entries.extend(ImportedEntry(pk, *row) for (pk,), row in zip(cursor.fetchall(), batch))
+    return entries
+
+
+def import_progress(user, fileobj, fmt, chunk_size=CHUNK_SIZE, on_chunk=None):
+    """Import from a binary or text file object; returns an ImportResult."""
+    if isinstance(fileobj.read(0), bytes):
+        fileobj = io.TextIOWrapper(fileobj, encoding='utf-8-sig', newline='')
+    return ProgressImporter(user, chunk_size).run(fileobj, fmt, on_chunk)
@@ -0,0 +1,206 @@
+"""Background jobs queued in the database, run by ``manage.py run_jobs``.
+
+Tasks are plain functions registered with ``@task``; they receive the Job
+and its ``args`` as keyword arguments, may call ``report`` to publish their
+progress, and return a JSON-serialisable result that is stored on the job.
+
+A worker claims the oldest due job by moving it from queued to running. On
+PostgreSQL the row is picked with ``SELECT ... FOR UPDATE SKIP LOCKED``, so
+workers never wait on each other. SQLite has no row locks, and there the
+claim is a compare-and-set ``UPDATE ... WHERE status = 'queued'`` that only
+one worker can win. Running jobs carry a heartbeat, which the worker
+refreshes on every poll; a job whose heartbeat is older than the lease
+belonged to a worker that died and goes back to the queue. Failed attempts
+are retried with exponential backoff until ``max_attempts`` is reached.
+"""
+import os
+import random
+import socket
+import threading
+import traceback
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from datetime import timedelta
+from multiprocessing import get_context
+
+import django
+from django.conf import settings
+from django.db import close_old_connections, connection
+from django.db.models import F
+from django.utils import timezone
+
+from .db import run_with_retry
+from .models import Job
+
+TASKS = {}
+BACKOFF = 10  # Seconds before the first retry; doubles with every attempt.
+MAX_BACKOFF = 60 * 60
+PURGE_INTERVAL = 60 * 60
+
+
+def task(name=None, max_attempts=3):
+    """Register a function as a task under ``name`` (default: its own name)."""
+    def register(func):
+        func.max_attempts = max_attempts
+        TASKS[name or func.__name__] = func
+        return func
+    return register
+
+
+def enqueue(task_name, user=None, delay=0, **args):
+    """Queue ``task_name`` to run with ``args``; returns the new Job."""
+    if task_name not in TASKS:
+        raise KeyError(f"Unknown task {task_name!r}.")
+    return Job.objects.create(
+        task=task_name, user=user, args=args, max_attempts=TASKS[task_name].max_attempts,
+        run_after=timezone.now() + timedelta(seconds=delay))
+
+
+def report(job, progress, message=''):
+    """Record how far ``job`` has got, as a percentage and a short message."""
+    job.progress = max(0, min(100, int(progress)))
+    job.message = message[:200]
+    Job.objects.filter(pk=job.pk).update(progress=job.progress, message=job.message, heartbeat=timezone.now())
+
+
+def worker_name():
+    return f'{socket.gethostname()}:{os.getpid()}'
+
+
+def claim(worker):
+    """Mark the oldest due job as running for ``worker``; returns it, or None when nothing is due."""
+    def take():
+        now = timezone.now()
+        due = Job.objects.filter(status=Job.QUEUED, run_after__lte=now).order_by('run_after', 'pk')
+        running = {'status': Job.RUNNING, 'locked_by': worker, 'heartbeat': now, 'started_at': now,
+                   'attempts': F('attempts') + 1}
+        if connection.features.has_select_for_update_skip_locked:
+            job_id = due.select_for_update(skip_locked=True).values_list('pk', flat=True).first()
+            if job_id is not None:
+                Job.objects.filter(pk=job_id).update(**running)
+        else:
+            # A few candidates, in case other workers win the race for the first.
+            for job_id in due.values_list('pk', flat=True)[:5]:
+                if Job.objects.filter(pk=job_id, status=Job.QUEUED).update(**running):
+                    break
+            else:
+                job_id = None
+        return None if job_id is None else Job.objects.get(pk=job_id)
+
+    return run_with_retry(take)
+
+
+def _backoff(attempts):
+    return min(MAX_BACKOFF, BACKOFF * 2 ** (attempts - 1)) * random.uniform(0.5, 1.5)
+
+
+def execute(job_id, worker):
+    """Run a claimed job and store its result, or schedule its retry."""
+    # Even reads can meet a table lock on shared-cache SQLite (as in the tests), so this is retried too.
+    job = run_with_retry(lambda: Job.objects.get(pk=job_id))
+    mine = Job.objects.filter(pk=job_id, status=Job.RUNNING, locked_by=worker)
+    try:
+        func = TASKS.get(job.task)
+        if func is None:
+            raise LookupError(f"Unknown task {job.task!r}.")
+        result = func(job, **job.args)
+    except Exception:
+        now = timezone.now()
+        error = traceback.format_exc()
+        if job.attempts < job.max_attempts:
+            outcome = {'status': Job.QUEUED, 'heartbeat': None, 'error': error,
+                       'run_after': now + timedelta(seconds=_backoff(job.attempts))}
+        else:
+            outcome = {'status': Job.FAILED, 'error': error, 'finished_at': now}
+    else:
+        outcome = {'status': Job.SUCCEEDED, 'progress': 100, 'result': result, 'error': '',
+                   'finished_at': timezone.now()}
+    # Losing this write to a busy database would leave the job running until its lease ran out.
+    run_with_retry(lambda: mine.update(locked_by='', **outcome))
+
+
+def requeue_stale(lease=None):
+    """Return running jobs whose worker stopped sending heartbeats to the queue; returns how many."""
+    now = timezone.now()
+    lease = settings.TRACKER_JOB_LEASE if lease is None else lease
+    stale = Job.objects.filter(status=Job.RUNNING, heartbeat__lt=now - timedelta(seconds=lease))
+    error = "The worker running this job stopped responding."
+    requeued = stale.filter(attempts__lt=F('max_attempts')).update(
+        status=Job.QUEUED, locked_by='', heartbeat=None, run_after=now, error=error)
+    failed = stale.update(status=Job.FAILED, locked_by='', error=error, finished_at=now)
+    return requeued + failed
+
+
+def purge(days=None):
+    """Delete jobs that finished more than ``days`` ago; returns how many."""
+    days = settings.TRACKER_JOB_RETENTION_DAYS if days is None else days
+    cutoff = timezone.now() - timedelta(days=days)
+    deleted, _ = Job.objects.filter(status__in=(Job.SUCCEEDED, Job.FAILED), finished_at__lt=cutoff).delete()
+    return deleted
+
+
+def _execute_in_pool(job_id, worker):
+    try:
+        execute(job_id, worker)
+    finally:
+        # Pool threads and processes never see request_finished.
+        close_old_connections()
+
+
+class Worker:
+    """Claims due jobs and runs up to ``concurrency`` of them at once in a thread or process pool."""
+
+    def __init__(self, concurrency=2, pool='thread', poll_interval=1.0, name=None, log=print):
+        self.concurrency = concurrency
+        self.pool = pool
+        self.poll_interval = poll_interval
+        self.name = name or worker_name()
+        self.log = log
+        self.stopping = threading.Event()
+
+    def executor(self):
+        if self.pool == 'process':
+            # Spawned rather than forked, so children never inherit the parent's open connections.
+            return ProcessPoolExecutor(self.concurrency, mp_context=get_context('spawn'), initializer=django.setup)
+        return ThreadPoolExecutor(self.concurrency, thread_name_prefix='job')
+
+    def housekeeping(self, running_ids):
+        """Requeue the jobs of dead workers and renew the heartbeat of this worker's own."""
+        requeue_stale()
+        if running_ids:
+            Job.objects.filter(pk__in=list(running_ids), locked_by=self.name).update(heartbeat=timezone.now())
+
+    def stop(self):
+        """Stop claiming jobs; the ones already running are finished."""
+        self.stopping.set()
+
+    def run(self, burst=False):
+        """Work until stopped, or with ``burst`` until the queue is empty. Returns the number of jobs run."""
+        running = {}
+        done = 0
+        purged_at = None
+        with self.executor() as executor:
+            while not self.stopping.is_set():
+                now = timezone.now()
+                if purged_at is None or (now - purged_at).total_seconds() > PURGE_INTERVAL:
+                    run_with_retry(purge)
+                    purged_at = now
+                run_with_retry(lambda: self.housekeeping(running.values()))
+                while len(running) < self.concurrency and not self.stopping.is_set():
+                    job = claim(self.name)
+                    if job is None:
+                        break
+                    running[executor.submit(_execute_in_pool, job.pk, self.name)] = job.pk
+                if not running:
+                    if burst:
+                        break
+                    self.stopping.wait(self.poll_interval)
+                    continue
+                finished, _ = wait(running, timeout=self.poll_interval, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    job_id = running.pop(future)
+                    if future.exception() is not None:
+                        # The job stays running until its lease runs out, then it is retried.
+                        self.log(f"Job #{job_id} could not be run: {future.exception()!r}")
+                    done += 1
+            done += len(running)
+        return done
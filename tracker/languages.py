@@ -0,0 +1,66 @@
+"""Resolving language names to a user's Language rows.
+
+Names are unique per user regardless of case (the ``language_unique_user_name``
+constraint). Missing languages are created with INSERT ... ON CONFLICT DO
+NOTHING and then read back, so concurrent requests naming the same new
+language end up sharing one row instead of racing to create two.
+"""
+from django.db.models.functions import Lower
+
+from . import caching
+from .models import Language
+
+# Keep IN (...) lists well under SQLite's bound parameter limit.
+LOOKUP_CHUNK_SIZE = 500
+
+
+def normalize(name):
+    return ' '.join(name.split())
+
+
+class LanguageResolver:
+    """Maps names to one user's languages, creating the missing ones.
+
+    Resolutions are memoized, so a resolver kept for a request or a bulk
+    import asks the database about each name only once.
+    """
+
+    def __init__(self, user):
+        self.user = user
+        self.languages = {}
+
+    def resolve(self, name):
+        """The user's Language called ``name``, created if needed."""
+        return self.resolve_many([name])[normalize(name)]
+
+    def resolve_many(self, names):
+        """Map every normalized name in ``names`` to a Language."""
+        wanted = {normalize(name) for name in names} - {''}
+        missing = {name.lower(): name for name in wanted if name.lower() not in self.languages}
+        if missing:
+            self._fetch(missing)
+            new = [Language(user=self.user, name=missing[key]) for key in missing.keys() - self.languages.keys()]
+            if new:
+                Language.objects.bulk_create(new, ignore_conflicts=True)
+                # bulk_create skips the signals that normally retire the cached choices and fragments.
+                caching.bump_version(self.user.pk)
+                self._fetch(missing)
+            unresolved = missing.keys() - self.languages.keys()
+            if unresolved:
+                # The database folds case differently for some non-ASCII names
+                # (SQLite's LOWER() only knows ASCII); compare in Python instead.
+                for language in Language.objects.filter(user=self.user).order_by('pk'):
+                    key = language.name.lower()
+                    if key in unresolved:
+                        self.languages.setdefault(key, language)
+        return {name: self.languages[name.lower()] for name in wanted}
+
+    def _fetch(self, missing):
+        keys = [key for key in missing if key not in self.languages]
+        for start in range(0, len(keys), LOOKUP_CHUNK_SIZE):
+            rows = (Language.objects.filter(user=self.user)
+                    .annotate(lowered_name=Lower('name'))
+                    .filter(lowered_name__in=keys[start:start + LOOKUP_CHUNK_SIZE])
+                    .order_by('pk'))
+            for language in rows:
+                self.languages.setdefault(language.lowered_name, language)
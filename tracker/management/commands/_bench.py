@@ -0,0 +1,44 @@
+"""Helpers shared by the ``bench_*`` management commands.
+
+Benchmarks seed their own data inside a transaction that is always rolled
+back, so they can be pointed at a development database without leaving
+anything behind.
+"""
+import statistics
+import time
+from contextlib import contextmanager
+
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+
+
+class Rollback(Exception):
+    """Raised to unwind the benchmark transaction."""
+
+
+@contextmanager
+def rolled_back():
+    """Run the block in a transaction that is discarded afterwards."""
+    try:
+        with transaction.atomic():
+            yield
+            raise Rollback
+    except Rollback:
+        pass
+
+
+def measure(fn, repeat=5):
+    """Call ``fn`` ``repeat`` times; return (median ms, p99 ms, queries per call)."""
+    timings = []
+    with CaptureQueriesContext(connection) as ctx:
+        for _ in range(repeat):
+            start = time.perf_counter()
+            fn()
+            timings.append((time.perf_counter() - start) * 1000)
+    timings.sort()
+    return statistics.median(timings), percentile(timings, 0.99), len(ctx.captured_queries) // repeat
+
+
+def percentile(ordered, fraction):
+    """The value at ``fraction`` (0-1) of the sorted list ``ordered``."""
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
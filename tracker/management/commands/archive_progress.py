@@ -0,0 +1,36 @@
+import datetime
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from tracker import archive
+
+
+class Command(BaseCommand):
+    help = ("Move sessions older than TRACKER_ARCHIVE_AFTER_DAYS days to the archive table in batches, "
+            "or move archived sessions back with --unarchive.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--before', type=datetime.date.fromisoformat,
+                            help="Archive sessions dated before this day.")
+        parser.add_argument('--days', type=int, help="Archive sessions older than this many days.")
+        parser.add_argument('--unarchive', action='store_true', help="Move archived sessions back.")
+        parser.add_argument('--since', type=datetime.date.fromisoformat,
+                            help="With --unarchive, only sessions dated on or after this day.")
+        parser.add_argument('--user', type=int, help="Only process this user id.")
+        parser.add_argument('--batch-size', type=int, default=archive.BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        def on_batch(moved):
+            self.stdout.write(f"  {moved:,} session(s) moved")
+
+        if options['unarchive']:
+            moved = archive.unarchive(options['since'], options['user'], options['batch_size'], on_batch)
+            self.stdout.write(self.style.SUCCESS(f"Moved {moved:,} session(s) back from the archive."))
+            return
+        before = options['before']
+        if options['days'] is not None:
+            before = timezone.localdate() - datetime.timedelta(days=options['days'])
+        before = before or archive.horizon()
+        moved = archive.archive(before, options['user'], options['batch_size'], on_batch)
+        self.stdout.write(self.style.SUCCESS(f"Archived {moved:,} session(s) dated before {before}."))
@@ -0,0 +1,81 @@
+import datetime
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.test import Client, override_settings
+from django.urls import reverse
+
+from tracker import api, rollups
+from tracker.models import DailyProgress, Goal, Language, Milestone, Topic
+from ._bench import measure, rolled_back
+
+
+class Command(BaseCommand):
+    help = "Response size and latency of the JSON API for a large progress history, per JSON encoder."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--entries', type=int, default=10000, help="Progress entries (default: 10000).")
+        parser.add_argument('--repeat', type=int, default=50)
+
+    def handle(self, *args, **options):
+        encoders = {'orjson': api.orjson, 'json': None} if api.orjson else {'json': None}
+        self.stdout.write(f"{'request':<28}{'encoder':>8}{'bytes':>10}{'median ms':>11}{'p99 ms':>9}{'queries':>9}")
+        with rolled_back(), override_settings(ALLOWED_HOSTS=['testserver']):
+            user = self.seed(options['entries'])
+            client = Client()
+            client.force_login(user)
+            page_size = settings.TRACKER_API_MAX_PAGE_SIZE
+            requests = [
+                ('progress page', reverse('api_list', args=['progress']), {'page_size': page_size}),
+                ('progress history', None, None),
+                ('stats', reverse('api_stats'), None),
+                ('goals', reverse('api_list', args=['goals']), {'page_size': page_size}),
+            ]
+            for label, url, params in requests:
+                for encoder, module in encoders.items():
+                    with mock.patch.object(api, 'orjson', module):
+                        if url is None:
+                            run = lambda: self.walk(client, page_size)
+                        else:
+                            run = lambda: len(client.get(url, params, secure=True).content)
+                        size = run()
+                        median, p99, queries = measure(run, options['repeat'])
+                    self.stdout.write(f"{label:<28}{encoder:>8}{size:>10}{median:>11.2f}{p99:>9.2f}{queries:>9}")
+
+            url = reverse('api_list', args=['progress'])
+            etag = client.get(url, {'page_size': page_size}, secure=True)['ETag']
+            run = lambda: client.get(url, {'page_size': page_size}, secure=True, headers={'if-none-match': etag})
+            assert run().status_code == 304
+            median, p99, queries = measure(run, options['repeat'])
+            self.stdout.write(f"{'progress page, 304':<28}{'-':>8}{0:>10}{median:>11.2f}{p99:>9.2f}{queries:>9}")
+
+    def walk(self, client, page_size):
+        """Fetch the whole progress history page by page; returns the bytes received."""
+        url, params, size = reverse('api_list', args=['progress']), {'page_size': page_size}, 0
+        while url:
+            response = client.get(url, params, secure=True)
+            size += len(response.content)
+            url, params = response.json()['next'], None
+        return size
+
+    def seed(self, entries):
+        user = User.objects.create_user(username='bench-api')
+        languages = Language.objects.bulk_create(Language(user=user, name=f"Language {i}") for i in range(10))
+        topics = Topic.objects.bulk_create(
+            Topic(user=user, language=language, name=f"Topic {i}") for language in languages for i in range(10))
+        today = datetime.date.today()
+        DailyProgress.objects.bulk_create(
+            DailyProgress(user=user, language=topics[i % len(topics)].language, topic=topics[i % len(topics)],
+                          date=today - datetime.timedelta(days=i % 730),
+                          what_i_learned=f"Worked through exercise {i} and took notes on the tricky parts.",
+                          time_spent_minutes=15 + i % 90, confidence_level=i % 5 + 1)
+            for i in range(entries))
+        Goal.objects.bulk_create(
+            Goal(user=user, title=f"Goal {i}", target_date=today + datetime.timedelta(days=i)) for i in range(100))
+        Milestone.objects.bulk_create(
+            Milestone(user=user, language=languages[i % len(languages)], title=f"Milestone {i}", is_completed=True)
+            for i in range(100))
+        rollups.rebuild(user.pk)
+        return user
@@ -0,0 +1,77 @@
+import datetime
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+
+from tracker import archive, rollups
+from tracker.importers import insert_rows
+from tracker.models import DailyProgress, ArchivedProgress, Language, Topic
+from tracker.pagination import MergedKeysetPaginator
+from ._bench import measure, rolled_back
+
+
+class Command(BaseCommand):
+    help = ("Time the hot-path progress queries with the whole history in DailyProgress, "
+            "then again after moving the oldest 90% of it to the archive table.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=20)
+        parser.add_argument('--rows', type=int, default=20000, help="Sessions per user.")
+        parser.add_argument('--years', type=int, default=5, help="Length of each user's history.")
+        parser.add_argument('--fraction', type=float, default=0.9, help="Share of the rows to archive.")
+        parser.add_argument('--repeat', type=int, default=20)
+
+    def handle(self, *args, **options):
+        with rolled_back():
+            users = self.seed(options['users'], options['rows'], options['years'])
+            user, today = users[0], datetime.date.today()
+            recent = today - datetime.timedelta(days=30)
+            sources = [model.objects.filter(user=user).select_related('language', 'topic')
+                       for model in archive.sources(DailyProgress)]
+            paginator = MergedKeysetPaginator(sources, ('-date', '-id'), 25)
+            entry = {'user': user, 'language': Language.objects.filter(user=user).first(),
+                     'what_i_learned': "benchmark", 'time_spent_minutes': 30}
+            queries = [
+                ("progress list, first page", lambda: paginator.page()),
+                ("last 30 days of one user",
+                 lambda: list(DailyProgress.objects.filter(user=user, date__gte=recent))),
+                ("count the table", lambda: DailyProgress.objects.count()),
+                ("log a session", lambda: DailyProgress.objects.create(date=today, **entry)),
+                ("edit a recent session", lambda: DailyProgress.objects.filter(
+                    user=user, date=today).first().save()),
+            ]
+            before = self.run(queries, options['repeat'])
+            total = DailyProgress.objects.count()
+            cutoff = (DailyProgress.objects.order_by('-date')
+                      .values_list('date', flat=True)[int(total * (1 - options['fraction']))])
+            moved = archive.archive(cutoff)
+            after = self.run(queries, options['repeat'])
+            self.stdout.write(f"Archived {moved:,} of {total:,} sessions dated before {cutoff}; "
+                              f"{DailyProgress.objects.count():,} left in DailyProgress, "
+                              f"{ArchivedProgress.objects.count():,} archived.")
+            assert rollups.verify(user.pk) == []
+        self.stdout.write(f"{'query':<30}{'queries':>8}{'before ms':>11}{'after ms':>10}{'before p99':>12}"
+                          f"{'after p99':>11}")
+        for (name, _), (median, p99, count), (median_after, p99_after, _) in zip(queries, before, after):
+            self.stdout.write(f"{name:<30}{count:>8}{median:>11.2f}{median_after:>10.2f}"
+                              f"{p99:>12.2f}{p99_after:>11.2f}")
+
+    def run(self, queries, repeat):
+        return [measure(query, repeat) for _, query in queries]
+
+    def seed(self, user_count, rows, years):
+        today = datetime.date.today()
+        users = []
+        for i in range(user_count):
+            user = User.objects.create_user(username=f'bench-archive-{i}')
+            languages = Language.objects.bulk_create(Language(user=user, name=f"Language {n}") for n in range(3))
+            topics = Topic.objects.bulk_create(Topic(user=user, language=languages[n % 3], name=f"Topic {n}")
+                                               for n in range(30))
+            insert_rows([
+                (user.pk, topics[n % 30].language_id, topics[n % 30].pk,
+                 today - datetime.timedelta(days=n * years * 365 // rows), f"Session {n}", 30, n % 5 + 1)
+                for n in range(rows)
+            ])
+            rollups.rebuild(user.pk)
+            users.append(user)
+        return users
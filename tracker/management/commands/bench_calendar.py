@@ -0,0 +1,39 @@
+import datetime
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+
+from tracker import rollups
+from tracker.models import DailyProgress, Language
+from tracker.streaks import study_calendar, streaks, year_arrays, year_heatmap
+from ._bench import measure, rolled_back
+
+
+class Command(BaseCommand):
+    help = "Time the streak and heatmap computation for years of daily history."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--years', default='1,5,10', help="Comma separated history lengths in years.")
+        parser.add_argument('--repeat', type=int, default=20)
+
+    def handle(self, *args, **options):
+        today = datetime.date.today()
+        self.stdout.write(f"{'years':>6} {'days':>6} {'queries':>8} {'load ms':>8} {'compute ms':>11} {'total ms':>9}")
+        for years in [int(years) for years in options['years'].split(',')]:
+            with rolled_back():
+                user = User.objects.create_user(username='bench-calendar')
+                languages = Language.objects.bulk_create(Language(user=user, name=f"Language {i}") for i in range(3))
+                days = years * 365
+                # Six days in seven, so there are streaks to break.
+                DailyProgress.objects.bulk_create(
+                    DailyProgress(user=user, language=languages[n % 3], date=today - datetime.timedelta(days=n),
+                                  what_i_learned="benchmark", time_spent_minutes=10 + n % 120)
+                    for n in range(days) if n % 7)
+                rollups.rebuild(user.pk)
+                arrays = year_arrays(user, today)
+                load, _, _ = measure(lambda: year_arrays(user, today), options['repeat'])
+                compute, _, _ = measure(
+                    lambda: (streaks(arrays, today), year_heatmap(today.year, arrays[today.year], today)),
+                    options['repeat'])
+                total, _, queries = measure(lambda: study_calendar(user, today), options['repeat'])
+            self.stdout.write(f"{years:>6} {days:>6} {queries:>8} {load:>8.2f} {compute:>11.2f} {total:>9.2f}")
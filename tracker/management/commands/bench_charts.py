@@ -0,0 +1,55 @@
+import datetime
+import json
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+
+from tracker import charts, rollups
+from tracker.importers import insert_rows
+from tracker.models import Language, Topic
+from ._bench import measure, rolled_back
+
+
+class Command(BaseCommand):
+    help = "Time the trend chart series for a long daily history, and the size of what reaches the browser."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--years', type=int, default=10)
+        parser.add_argument('--languages', type=int, default=5)
+        parser.add_argument('--sessions-per-day', type=int, default=4)
+        parser.add_argument('--points', type=int, default=charts.DEFAULT_POINTS)
+        parser.add_argument('--repeat', type=int, default=10)
+
+    def handle(self, *args, **options):
+        today = datetime.date.today()
+        self.stdout.write(f"{'metric':<11}{'buckets':>8}{'raw points':>11}{'sent':>6}{'queries':>8}"
+                          f"{'median ms':>10}{'p99 ms':>8}{'raw KB':>8}{'sent KB':>8}")
+        with rolled_back():
+            user = self.seed(options['years'], options['languages'], options['sessions_per_day'])
+            start, end = charts.date_range(user, 'all', today)
+            for metric in charts.METRICS:
+                for granularity in charts.GRANULARITIES:
+                    def series(points):
+                        return charts.trend(user, metric, start, end, granularity, points)
+                    raw, sent = series(10 ** 9), series(options['points'])
+                    median, p99, queries = measure(lambda: series(options['points']), options['repeat'])
+                    raw_points = sum(len(line.points) for line in raw)
+                    sent_points = sum(len(line.points) for line in sent)
+                    size = lambda lines: len(json.dumps([line.points for line in lines], default=str)) / 1024
+                    self.stdout.write(f"{metric:<11}{granularity:>8}{raw_points:>11}{sent_points:>6}{queries:>8}"
+                                      f"{median:>10.2f}{p99:>8.2f}{size(raw):>8.0f}{size(sent):>8.0f}")
+
+    def seed(self, years, language_count, per_day):
+        user = User.objects.create_user(username='bench-charts')
+        languages = Language.objects.bulk_create(Language(user=user, name=f"Language {i}")
+                                                 for i in range(language_count))
+        topics = Topic.objects.bulk_create(Topic(user=user, language=languages[i % language_count], name=f"Topic {i}")
+                                           for i in range(language_count * 4))
+        today = datetime.date.today()
+        insert_rows([
+            (user.pk, topics[n % len(topics)].language_id, topics[n % len(topics)].pk,
+             today - datetime.timedelta(days=n // per_day), f"Session {n}", 10 + n % 90, n % 5 + 1)
+            for n in range(years * 365 * per_day)
+        ])
+        rollups.rebuild(user.pk)
+        return user
@@ -0,0 +1,56 @@
+import datetime
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db.models import Sum
+
+from tracker import rollups
+from tracker.models import Language, DailyProgress
+from tracker.stats import dashboard_stats
+from ._bench import rolled_back, measure
+
+
+def legacy_language_totals(user):
+    """The old dashboard loop: one aggregate query per language."""
+    totals = []
+    for lang in Language.objects.filter(user=user):
+        total = DailyProgress.objects.filter(user=user, language=lang).aggregate(
+            Sum('time_spent_minutes'))['time_spent_minutes__sum'] or 0
+        totals.append((lang.name, total))
+    return totals
+
+
+class Command(BaseCommand):
+    help = "Benchmark dashboard statistics as the number of languages grows."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', default='1,10,50,100,250,500',
+                            help="Comma separated language counts to test.")
+        parser.add_argument('--entries', type=int, default=20,
+                            help="Progress entries per language.")
+        parser.add_argument('--repeat', type=int, default=5)
+
+    def handle(self, *args, **options):
+        sizes = [int(size) for size in options['sizes'].split(',')]
+        self.stdout.write(f"{'languages':>10} {'queries':>8} {'median ms':>10} "
+                          f"{'legacy q':>9} {'legacy ms':>10}")
+        for size in sizes:
+            with rolled_back():
+                user = self.seed(size, options['entries'])
+                median, _, queries = measure(lambda: dashboard_stats(user), options['repeat'])
+                legacy_median, _, legacy_queries = measure(
+                    lambda: legacy_language_totals(user), options['repeat'])
+            self.stdout.write(f"{size:>10} {queries:>8} {median:>10.2f} "
+                              f"{legacy_queries:>9} {legacy_median:>10.2f}")
+
+    def seed(self, languages, entries):
+        user = User.objects.create_user(username='bench-dashboard')
+        created = Language.objects.bulk_create(
+            Language(user=user, name=f"Language {i}") for i in range(languages))
+        today = datetime.date.today()
+        DailyProgress.objects.bulk_create(
+            DailyProgress(user=user, language=language, date=today - datetime.timedelta(days=day),
+                          what_i_learned="benchmark", time_spent_minutes=30)
+            for language in created for day in range(entries))
+        rollups.rebuild(user.pk)
+        return user
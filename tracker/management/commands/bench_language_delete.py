@@ -0,0 +1,64 @@
+import datetime
+import time
+import tracemalloc
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from tracker import deletion, rollups, search
+from tracker.importers import insert_rows
+from tracker.models import Language, Topic
+from ._bench import rolled_back
+from .bench_urls import QueryCounter
+
+
+class Command(BaseCommand):
+    help = ("Time deleting one language with a large history: chunked set-based deletion vs. the ORM cascade. "
+            "Peak memory is Python allocations as seen by tracemalloc, which also slows both paths down.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', default='500000', help="Comma separated session counts for the chunked path.")
+        parser.add_argument('--orm-rows', default='5000',
+                            help="Comma separated session counts for Language.delete(); it sends signals per row.")
+        parser.add_argument('--topics', type=int, default=50)
+        parser.add_argument('--chunk-size', type=int, default=deletion.CHUNK_SIZE)
+
+    def handle(self, *args, **options):
+        self.stdout.write(f"{'path':<9}{'rows':>9}{'seconds':>9}{'rows/s':>10}{'queries':>9}{'peak MB':>9}")
+        runs = [('chunked', int(rows)) for rows in options['rows'].split(',') if rows]
+        runs += [('orm', int(rows)) for rows in options['orm_rows'].split(',') if rows]
+        for path, rows in runs:
+            with rolled_back():
+                language = self.seed(rows, options['topics'])
+                if path == 'chunked':
+                    delete = lambda: deletion.delete_language(language, options['chunk_size'])
+                else:
+                    delete = language.delete
+                tracemalloc.start()
+                start = time.perf_counter()
+                queries = QueryCounter()
+                with connection.execute_wrapper(queries):
+                    delete()
+                elapsed = time.perf_counter() - start
+                peak = tracemalloc.get_traced_memory()[1] / 2 ** 20
+                tracemalloc.stop()
+                assert not Language.objects.filter(pk=language.pk).exists()
+            self.stdout.write(f"{path:<9}{rows:>9}{elapsed:>9.2f}{rows / elapsed:>10,.0f}"
+                              f"{queries.count:>9}{peak:>9.1f}")
+
+    def seed(self, rows, topic_count):
+        user = User.objects.create_user(username='bench-delete')
+        language = Language.objects.create(user=user, name='Doomed')
+        Language.objects.create(user=user, name='Kept')
+        topics = Topic.objects.bulk_create(Topic(user=user, language=language, name=f"Topic {i}")
+                                           for i in range(topic_count))
+        today = datetime.date.today()
+        insert_rows([
+            (user.pk, language.pk, topics[n % topic_count].pk, today - datetime.timedelta(days=n % 3650),
+             f"Session {n}", 30, n % 5 + 1)
+            for n in range(rows)
+        ])
+        rollups.rebuild(user.pk)
+        search.rebuild(user.pk)
+        return language
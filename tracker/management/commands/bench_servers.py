@@ -0,0 +1,193 @@
+import asyncio
+import datetime
+import os
+import shutil
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from django.conf import settings
+from django.contrib.auth import BACKEND_SESSION_KEY, HASH_SESSION_KEY, SESSION_KEY
+from django.contrib.auth.models import User
+from django.contrib.sessions.backends.db import SessionStore
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.urls import reverse
+
+from tracker import rollups
+from tracker.models import DailyProgress, Goal, Language, Milestone, Resource, Topic
+
+MODES = ('wsgi', 'asgi')
+
+
+def use_database(path):
+    connection.close()
+    connection.settings_dict.update({'NAME': str(path), 'OPTIONS': {}})
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+async def fetch(reader, writer, path, session_key):
+    """One keep-alive HTTP/1.1 GET; returns the status code."""
+    writer.write(f"GET {path} HTTP/1.1\r\nHost: 127.0.0.1\r\nCookie: sessionid={session_key}\r\n\r\n".encode())
+    await writer.drain()
+    head = await reader.readuntil(b'\r\n\r\n')
+    lines = head.decode('latin-1').split('\r\n')
+    status = int(lines[0].split()[1])
+    headers = dict(line.split(': ', 1) for line in lines[1:] if ': ' in line)
+    headers = {name.lower(): value for name, value in headers.items()}
+    if headers.get('transfer-encoding') == 'chunked':
+        while True:
+            size = int((await reader.readline()).split(b';')[0], 16)
+            await reader.readexactly(size + 2)
+            if not size:
+                break
+    else:
+        await reader.readexactly(int(headers.get('content-length', 0)))
+    return status
+
+
+async def load(port, visitors, concurrency, total):
+    """Run ``total`` requests over ``concurrency`` keep-alive connections.
+
+    Each connection is one of ``visitors``, a list of (session key, pages) pairs.
+    """
+    latencies, errors = [], 0
+    remaining = iter(range(total))
+
+    async def client(n):
+        nonlocal errors
+        reader, writer = await asyncio.open_connection('127.0.0.1', port)
+        session_key, pages = visitors[n % len(visitors)]
+        try:
+            for i in remaining:
+                start = time.perf_counter()
+                status = await fetch(reader, writer, pages[i % len(pages)], session_key)
+                latencies.append((time.perf_counter() - start) * 1000)
+                errors += status != 200
+        finally:
+            writer.close()
+
+    began = time.perf_counter()
+    await asyncio.gather(*(client(n) for n in range(concurrency)))
+    return time.perf_counter() - began, sorted(latencies), errors
+
+
+class Command(BaseCommand):
+    help = ("Serve a scratch database with gunicorn in WSGI (threaded) and ASGI (uvicorn) mode and "
+            "load the dashboard and language pages at increasing concurrency.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--concurrency', default='50,100,200',
+                            help="Comma-separated concurrent client counts (default: 50,100,200).")
+        parser.add_argument('--requests', type=int, default=2000, help="Requests per run (default: 2000).")
+        parser.add_argument('--modes', default=','.join(MODES), help="Comma-separated server modes.")
+        parser.add_argument('--workers', type=int, default=2, help="gunicorn worker processes (default: 2).")
+        parser.add_argument('--threads', type=int, default=4, help="Threads per WSGI worker (default: 4).")
+        parser.add_argument('--users', type=int, default=20, help="Seeded users to spread the load over.")
+        parser.add_argument('--cached', action='store_true',
+                            help="Keep the fragment cache on (by default every request hits the database).")
+
+    def handle(self, *args, **options):
+        modes = options['modes'].split(',')
+        if set(modes) - set(MODES):
+            raise CommandError(f"Unknown mode in {options['modes']!r}; expected {', '.join(MODES)}.")
+        levels = [int(level) for level in options['concurrency'].split(',')]
+        original = dict(connection.settings_dict)
+        scratch = Path(tempfile.mkdtemp(prefix='bench-servers-'))
+        database = scratch / 'bench.sqlite3'
+        try:
+            use_database(database)
+            call_command('migrate', verbosity=0)
+            visitors = self.seed(options['users'])
+        finally:
+            connection.close()
+            connection.settings_dict.clear()
+            connection.settings_dict.update(original)
+
+        env = {
+            **os.environ,
+            'DATABASE_URL': f'sqlite:///{database}',
+            'SQLITE_PRODUCTION': 'True',
+            'TRACKER_CACHE_DISABLED': str(not options['cached']),
+            'WEB_CONCURRENCY': str(options['workers']),
+            'GUNICORN_THREADS': str(options['threads']),
+            # DEBUG=False would redirect the plain-HTTP benchmark to HTTPS.
+            'DEBUG': 'True',
+        }
+        self.stdout.write(f"{'mode':<6}{'clients':>8}{'req/s':>9}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'errors':>8}")
+        try:
+            for mode in modes:
+                port = free_port()
+                server = subprocess.Popen(
+                    [sys.executable, '-m', 'gunicorn', '--config', str(settings.BASE_DIR / 'gunicorn.conf.py'),
+                     '--log-level', 'warning'],
+                    cwd=settings.BASE_DIR, env={**env, 'SERVER_MODE': mode, 'PORT': str(port)})
+                try:
+                    self.wait_for(port, server)
+                    # Warm up imports, templates and connections in every worker.
+                    asyncio.run(load(port, visitors, options['workers'] * 4, 200))
+                    for level in levels:
+                        elapsed, latencies, errors = asyncio.run(
+                            load(port, visitors, level, options['requests']))
+                        p95 = latencies[int(len(latencies) * 0.95)]
+                        p99 = latencies[int(len(latencies) * 0.99)]
+                        self.stdout.write(f"{mode:<6}{level:>8}{len(latencies) / elapsed:>9.0f}"
+                                          f"{statistics.median(latencies):>9.1f}{p95:>9.1f}{p99:>9.1f}{errors:>8}")
+                finally:
+                    server.terminate()
+                    server.wait()
+        finally:
+            shutil.rmtree(scratch, ignore_errors=True)
+
+    def wait_for(self, port, server, timeout=30):
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if server.poll() is not None:
+                raise CommandError("gunicorn exited during startup.")
+            try:
+                socket.create_connection(('127.0.0.1', port), timeout=1).close()
+                return
+            except OSError:
+                time.sleep(0.2)
+        raise CommandError(f"gunicorn did not start listening on port {port}.")
+
+    def seed(self, users):
+        """Users with a year of history each, as (session key, pages to load) pairs."""
+        visitors = []
+        today = datetime.date.today()
+        for n in range(users):
+            user = User.objects.create_user(username=f'bench-server-{n}')
+            languages = Language.objects.bulk_create(Language(user=user, name=f"Language {i}") for i in range(8))
+            topics = Topic.objects.bulk_create(
+                Topic(user=user, language=language, name=f"Topic {i}") for language in languages for i in range(10))
+            DailyProgress.objects.bulk_create(
+                DailyProgress(user=user, language=topics[i % len(topics)].language, topic=topics[i % len(topics)],
+                              date=today - datetime.timedelta(days=i % 365), what_i_learned=f"Note {i}",
+                              time_spent_minutes=30) for i in range(500))
+            Resource.objects.bulk_create(
+                Resource(user=user, language=languages[i % len(languages)], title=f"Resource {i}",
+                         link=f"https://example.com/{i}") for i in range(40))
+            Milestone.objects.bulk_create(
+                Milestone(user=user, language=languages[i % len(languages)], title=f"Milestone {i}",
+                          is_completed=i % 2 == 0) for i in range(40))
+            Goal.objects.bulk_create(
+                Goal(user=user, title=f"Goal {i}", target_date=today + datetime.timedelta(days=i)) for i in range(20))
+            rollups.rebuild(user.pk)
+            session = SessionStore()
+            session[SESSION_KEY] = str(user.pk)
+            session[BACKEND_SESSION_KEY] = 'django.contrib.auth.backends.ModelBackend'
+            session[HASH_SESSION_KEY] = user.get_session_auth_hash()
+            session.create()
+            visitors.append((session.session_key, [
+                reverse('dashboard'), reverse('language_detail', args=[languages[n % len(languages)].pk])]))
+        return visitors
@@ -0,0 +1,103 @@
+import multiprocessing
+import shutil
+import tempfile
+import time
+from pathlib import Path
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.db import OperationalError, connection
+
+from tracker.db import is_lock_error, run_with_retry
+from tracker.models import DailyProgress, Language
+from tracker.stats import dashboard_stats
+
+PROFILES = {
+    # How the app ran before: default connection options, autocommit writes.
+    'default': ({}, False),
+    # SQLITE_PRODUCTION=True: tuned PRAGMAs, IMMEDIATE transactions, retried writes.
+    'production': (settings.SQLITE_PRODUCTION_OPTIONS, True),
+}
+
+
+def use_database(path, options):
+    connection.close()
+    connection.settings_dict.update({'NAME': str(path), 'OPTIONS': dict(options)})
+
+
+def write_sessions(path, options, retry, writes, user_id, language_id, start, results):
+    use_database(path, options)
+    user = User.objects.get(pk=user_id)
+    ok = locked = 0
+    start.wait()
+    for i in range(writes):
+        def create():
+            DailyProgress.objects.create(user_id=user_id, language_id=language_id, what_i_learned=f"Session {i}",
+                                         time_spent_minutes=30)
+        try:
+            run_with_retry(create) if retry else create()
+            ok += 1
+        except OperationalError as exc:
+            if not is_lock_error(exc):
+                raise
+            locked += 1
+        # Each write is followed by the page view its redirect leads to.
+        dashboard_stats(user)
+    connection.close()
+    results.put((ok, locked))
+
+
+class Command(BaseCommand):
+    help = ("Measure concurrent write throughput on a scratch SQLite database with the default "
+            "and the production connection profile.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', default='1,2,4,8',
+                            help="Comma-separated worker process counts (default: 1,2,4,8).")
+        parser.add_argument('--writes', type=int, default=200, help="Writes per worker (default: 200).")
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'sqlite':
+            self.stderr.write("This benchmark only applies to SQLite.")
+            return
+        worker_counts = [int(count) for count in options['workers'].split(',')]
+        original = dict(connection.settings_dict)
+        scratch = Path(tempfile.mkdtemp(prefix='bench-sqlite-'))
+        try:
+            template = scratch / 'template.sqlite3'
+            use_database(template, {})
+            call_command('migrate', verbosity=0)
+            user = User.objects.create_user(username='bench-writer')
+            language = Language.objects.create(user=user, name='Python')
+            connection.close()
+
+            self.stdout.write(f"{'profile':<12}{'workers':>8}{'writes/s':>12}{'locked':>8}")
+            context = multiprocessing.get_context('fork')
+            for profile, (db_options, retry) in PROFILES.items():
+                for workers in worker_counts:
+                    path = scratch / f'{profile}-{workers}.sqlite3'
+                    shutil.copy(template, path)
+                    start, results = context.Event(), context.Queue()
+                    processes = [
+                        context.Process(target=write_sessions, args=(
+                            path, db_options, retry, options['writes'], user.pk, language.pk, start, results))
+                        for _ in range(workers)
+                    ]
+                    for process in processes:
+                        process.start()
+                    began = time.perf_counter()
+                    start.set()
+                    outcomes = [results.get() for _ in processes]
+                    elapsed = time.perf_counter() - began
+                    for process in processes:
+                        process.join()
+                    written = sum(ok for ok, _ in outcomes)
+                    locked = sum(count for _, count in outcomes)
+                    self.stdout.write(f"{profile:<12}{workers:>8}{written / elapsed:>12.0f}{locked:>8}")
+        finally:
+            connection.close()
+            connection.settings_dict.clear()
+            connection.settings_dict.update(original)
+            shutil.rmtree(scratch, ignore_errors=True)
@@ -0,0 +1,192 @@
+import datetime
+import json
+import statistics
+import subprocess
+import threading
+import time
+from pathlib import Path
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.backends.signals import connection_created
+from django.test import Client, override_settings
+from django.urls import reverse
+
+from tracker import api, caching, charts
+from tracker.exporters import DATASETS, FORMATS
+from tracker.models import Language, Topic, DailyProgress, Resource, Milestone, Goal, Job
+from tracker.seeding import PASSWORD, SeedOptions, seed_user
+from tracker.urls import urlpatterns
+from ._bench import percentile, rolled_back
+
+# URL name prefix -> model whose first row (by pk) fills a ``<int:pk>``.
+PK_MODELS = {
+    'language': Language, 'topic': Topic, 'progress': DailyProgress,
+    'goal': Goal, 'milestone': Milestone, 'resource': Resource, 'job': Job,
+}
+# URL name -> the keyword arguments to request it with, besides ``pk``.
+SLUG_KWARGS = {
+    'autocomplete': [{'kind': 'language'}, {'kind': 'topic'}],
+    'export_data': [{'dataset': dataset, 'fmt': fmt} for dataset in DATASETS for fmt in FORMATS],
+    'api_list': [{'resource': resource} for resource in api.RESOURCES],
+    'chart_data': [{'metric': metric} for metric in charts.METRICS],
+}
+# URL name -> query string parameters.
+PARAMS = {
+    'search': {'q': 'functions'},
+    'autocomplete': {'q': 'p'},
+}
+
+
+def routes(user):
+    """(label, url, params) for every named route in tracker/urls.py, filled in for ``user``."""
+    for pattern in urlpatterns:
+        converters = pattern.pattern.converters
+        if not converters:
+            kwargs_list = [{}]
+        elif pattern.name in SLUG_KWARGS:
+            kwargs_list = SLUG_KWARGS[pattern.name]
+        elif set(converters) == {'pk'}:
+            model = PK_MODELS[pattern.name.split('_')[0]]
+            pk = model.objects.filter(user=user).order_by('pk').values_list('pk', flat=True).first()
+            if pk is None:
+                continue  # Seeded users have no background jobs, for one.
+            kwargs_list = [{'pk': pk}]
+        else:
+            raise CommandError(f"Don't know how to request {pattern.name!r}; add it to SLUG_KWARGS.")
+        for kwargs in kwargs_list:
+            extra = ','.join(str(value) for name, value in kwargs.items() if name != 'pk')
+            label = f'{pattern.name}[{extra}]' if extra else pattern.name
+            yield label, reverse(pattern.name, kwargs=kwargs), PARAMS.get(pattern.name)
+
+
+class QueryCounter:
+    """Counts the queries of every connection, including those the async views open on worker threads."""
+
+    def __init__(self):
+        self.count = 0
+        self.lock = threading.Lock()
+
+    def __call__(self, execute, sql, params, many, context):
+        with self.lock:
+            self.count += 1
+        return execute(sql, params, many, context)
+
+    def install(self, sender, connection, **kwargs):
+        connection.execute_wrappers.append(self)
+
+
+def body_size(response):
+    if response.streaming:
+        return sum(len(chunk) for chunk in response.streaming_content)
+    return len(response.content)
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=settings.BASE_DIR,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+class Command(BaseCommand):
+    help = ("Log in as the seed_data users and GET every route in tracker/urls.py with the test client, "
+            "reporting latency percentiles, queries and bytes per request.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--prefix', default='loadtest', help="Username prefix given to seed_data.")
+        parser.add_argument('--users', type=int, default=3, help="How many of those users to drive (default: 3).")
+        parser.add_argument('--repeat', type=int, default=10, help="Requests per route and user (default: 10).")
+        parser.add_argument('--cold', action='store_true',
+                            help="Invalidate the user's cached fragments and choices before every request.")
+        parser.add_argument('--seed', action='store_true',
+                            help="Generate the users in a transaction that is rolled back afterwards, "
+                                 "instead of using existing ones.")
+        parser.add_argument('--output', help="Write the results to this JSON file.")
+        parser.add_argument('--compare', help="A previous --output file to compare against.")
+
+    def handle(self, *args, **options):
+        if options['seed']:
+            with rolled_back():
+                users = [seed_user(f"{options['prefix']}-{i}", SeedOptions()) for i in range(options['users'])]
+                results = self.run(users, options)
+        else:
+            users = list(User.objects.filter(username__startswith=f"{options['prefix']}-")
+                         .order_by('pk')[:options['users']])
+            if not users:
+                raise CommandError(f"No {options['prefix']}-* users; run seed_data first, or pass --seed.")
+            results = self.run(users, options)
+
+        previous = {}
+        if options['compare']:
+            previous = json.loads(Path(options['compare']).read_text())['routes']
+        self.report(results, previous)
+        if options['output']:
+            Path(options['output']).write_text(json.dumps({
+                'commit': git_commit(),
+                'created': datetime.datetime.now(datetime.timezone.utc).isoformat(timespec='seconds'),
+                'options': {name: options[name] for name in ('users', 'repeat', 'cold')},
+                'database': connection.vendor,
+                'routes': results,
+            }, indent=2))
+            self.stdout.write(self.style.SUCCESS(f"Saved {len(results)} routes to {options['output']}."))
+
+    def run(self, users, options):
+        samples = {}
+        counter = QueryCounter()
+        connection_created.connect(counter.install)
+        connection.execute_wrappers.append(counter)
+        try:
+            with override_settings(ALLOWED_HOSTS=['testserver']):
+                for user in users:
+                    self.drive(user, options, samples, counter)
+        finally:
+            connection.execute_wrappers.remove(counter)
+            connection_created.disconnect(counter.install)
+        results = {}
+        for label, sample in samples.items():
+            timings = sorted(sample['ms'])
+            results[label] = {
+                'p50_ms': round(statistics.median(timings), 3),
+                'p95_ms': round(percentile(timings, 0.95), 3),
+                'p99_ms': round(percentile(timings, 0.99), 3),
+                'queries': round(statistics.mean(sample['queries']), 2),
+                'max_queries': max(sample['queries']),
+                'bytes': round(statistics.mean(sample['bytes'])),
+                'status': sorted(sample['status']),
+            }
+        return results
+
+    def drive(self, user, options, samples, counter):
+        client = Client()
+        if not client.login(username=user.username, password=PASSWORD):
+            raise CommandError(f"Cannot log in as {user.username}; was it created by seed_data?")
+        for label, url, params in routes(user):
+            sample = samples.setdefault(label, {'ms': [], 'queries': [], 'bytes': [], 'status': set()})
+            for _ in range(options['repeat']):
+                if options['cold']:
+                    caching.bump_version(user.pk)
+                queries = counter.count
+                start = time.perf_counter()
+                response = client.get(url, params, secure=True)
+                size = body_size(response)
+                sample['ms'].append((time.perf_counter() - start) * 1000)
+                sample['queries'].append(counter.count - queries)
+                sample['bytes'].append(size)
+                sample['status'].add(response.status_code)
+
+    def report(self, results, previous):
+        header = f"{'route':<34}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'queries':>9}{'bytes':>10}{'status':>9}"
+        self.stdout.write(header + (f"{'p50 before':>12}{'change':>9}" if previous else ''))
+        for label, result in results.items():
+            status = ','.join(str(code) for code in result['status'])
+            line = (f"{label:<34}{result['p50_ms']:>9.2f}{result['p95_ms']:>9.2f}{result['p99_ms']:>9.2f}"
+                    f"{result['queries']:>9.1f}{result['bytes']:>10}{status:>9}")
+            if label in previous:
+                before = previous[label]['p50_ms']
+                change = (result['p50_ms'] - before) / before * 100 if before else 0.0
+                line += f"{before:>12.2f}{change:>+8.0f}%"
+            self.stdout.write(line)
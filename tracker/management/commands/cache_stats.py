@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from tracker import caching
+
+
+class Command(BaseCommand):
+    help = ("Show the hit rate of the page fragment cache, summed over every process using this database "
+            "(each adds its counts every TRACKER_CACHE_STATS_FLUSH_SECONDS).")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--reset', action='store_true', help="Reset the counters afterwards.")
+
+    def handle(self, *args, **options):
+        stats = caching.stats()
+        self.stdout.write(
+            f"hits={stats['hits']} misses={stats['misses']} hit rate={stats['hit_rate']:.1%}")
+        if options['reset']:
+            caching.reset_stats()
+            self.stdout.write(self.style.SUCCESS("Counters reset."))
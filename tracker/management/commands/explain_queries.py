@@ -0,0 +1,150 @@
+import re
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import Count, Sum
+
+from tracker import archive
+from tracker.models import Language, Topic, DailyProgress, DailyRollup, Resource, Milestone, Goal
+from tracker.pagination import KeysetPaginator, MergedKeysetPaginator
+from tracker.stats import language_minutes, topic_minutes, with_language_stats, with_section_counts
+
+# Plan lines that mean a query is not fully index-backed, per backend.
+PLAN_PROBLEMS = {
+    'sqlite': [
+        (re.compile(r'\bSCAN (?!CONSTANT ROW)(\w+)'), "full scan"),
+        (re.compile(r'USE TEMP B-TREE FOR (.+)'), "temporary B-tree"),
+    ],
+    'postgresql': [
+        (re.compile(r'Seq Scan on (\w+)'), "sequential scan"),
+        (re.compile(r'(?<!Incremental )\bSort\b'), "sort"),
+    ],
+}
+
+# Queries whose plan problems are inherent, with the reason they are acceptable.
+EXPECTED_PROBLEMS = {
+    'language_detail: topic times': "ordered by its own aggregate, over one language's rollup rows",
+}
+
+
+def middle_row(queryset, ordering):
+    """The row halfway through ``queryset``, to key a deep page on; None if it is empty."""
+    return queryset.order_by(*ordering)[queryset.count() // 2:][:1].first()
+
+
+def keyset_pages(name, queryset, ordering, page_size):
+    """The queries for the first page of a keyset-paginated list and for a deep one."""
+    paginator = KeysetPaginator(queryset, ordering, page_size)
+    queries = [(f'{name}: first page', paginator.forward_queryset())]
+    middle = middle_row(queryset, ordering)
+    if middle is not None:
+        queries.append((f'{name}: deep page', paginator.forward_queryset(paginator._key(middle))))
+    return queries
+
+
+def merged_pages(name, querysets, ordering, page_size):
+    """Like ``keyset_pages`` for a list merged from several tables: one query per table and page."""
+    paginator = MergedKeysetPaginator(querysets, ordering, page_size)
+    # Deep pages are keyed on the middle of the last table, the archive, which holds most of the history.
+    middle = next(filter(None, (middle_row(queryset, ordering) for queryset in reversed(querysets))), None)
+    queries = []
+    for queryset in querysets:
+        table = f'{name} ({queryset.model._meta.model_name})'
+        queries.append((f'{table}: first page', paginator._slice(queryset, None, forward=True)))
+        if middle is not None:
+            queries.append((f'{table}: deep page', paginator._slice(queryset, paginator._key(middle), forward=True)))
+    return queries
+
+
+def hot_queries(user, page_size=25):
+    """The main query of every view, as run for ``user``.
+
+    The querysets come from the helpers the views themselves use, so the plans
+    are those of the annotated and paginated queries actually sent.
+    """
+    queries = [
+        ('dashboard: language totals', Language.objects.filter(user=user).annotate(
+            minutes=language_minutes(user)).order_by('pk')),
+        ('dashboard: session count', DailyRollup.objects.filter(user=user).values('user').annotate(
+            sessions=Sum('session_count')).order_by()),
+        ('dashboard: upcoming goals', Goal.objects.filter(
+            user=user, is_completed=False).order_by('target_date')[:5]),
+        ('dashboard: recent milestones', Milestone.objects.filter(
+            user=user, is_completed=True).select_related('language').order_by('-date_created')[:5]),
+        ('language_list', with_language_stats(Language.objects.filter(user=user), user)),
+    ]
+    # The language with the most topics, as the detail page's heaviest case.
+    languages = with_section_counts(Language.objects.all(), user).filter(user=user)
+    language = languages.order_by('-topic_count', 'pk').first()
+    if language is not None:
+        queries += [
+            ('language_detail: language', languages.filter(pk=language.pk)),
+            ('language_detail: topic times', topic_minutes(language)),
+        ]
+        for section in ('topics', 'resources', 'milestones'):
+            queries += keyset_pages(f'language_detail: {section}', getattr(language, section).all(), ('id',),
+                                    page_size)
+    # The progress list and API page through the sessions and their archive together.
+    sessions = [model.objects.filter(user=user).select_related('language', 'topic')
+                for model in archive.sources(DailyProgress)]
+    queries += merged_pages('progress_list', sessions, ('-date', '-id'), page_size)
+    paginated = [
+        ('topic_list', Topic.objects.filter(user=user).select_related('language'), ('id',)),
+        ('goal_list', Goal.objects.filter(user=user), ('id',)),
+        ('milestone_list', Milestone.objects.filter(user=user).select_related('language'), ('id',)),
+        ('resource_list', Resource.objects.filter(user=user).select_related('language'), ('id',)),
+    ]
+    for name, queryset, ordering in paginated:
+        queries += keyset_pages(name, queryset, ordering, page_size)
+    return queries
+
+
+class Command(BaseCommand):
+    help = "EXPLAIN the main query of every view and report full scans and temporary sorts."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', help="Username to run the queries as (default: the heaviest user).")
+        parser.add_argument('--verbose-plans', action='store_true', help="Print every query plan.")
+        parser.add_argument('--strict', action='store_true', help="Exit with an error if any problem is found.")
+
+    def handle(self, *args, **options):
+        vendor = connection.vendor
+        if vendor not in PLAN_PROBLEMS:
+            raise CommandError(f"EXPLAIN analysis is not supported for the {vendor} backend.")
+        user = self.get_user(options['user'])
+        problems = 0
+        for name, queryset in hot_queries(user):
+            plan = queryset.explain()
+            found = [
+                f"{label}: {match.group(0).strip()}"
+                for pattern, label in PLAN_PROBLEMS[vendor]
+                for match in pattern.finditer(plan)
+            ]
+            expected = EXPECTED_PROBLEMS.get(name)
+            if found and expected:
+                found.append(f"expected: {expected}")
+                status = self.style.NOTICE('NOTE')
+            elif found:
+                problems += len(found)
+                status = self.style.WARNING('CHECK')
+            else:
+                status = self.style.SUCCESS('OK')
+            self.stdout.write(f"{status:<7} {name}")
+            for line in found:
+                self.stdout.write(f"        {line}")
+            if options['verbose_plans']:
+                self.stdout.write("\n".join(f"        | {line}" for line in plan.splitlines()))
+        if problems and options['strict']:
+            raise CommandError(f"{problems} plan problem(s) found.")
+
+    def get_user(self, username):
+        if username:
+            try:
+                return User.objects.get(username=username)
+            except User.DoesNotExist:
+                raise CommandError(f"No user named {username!r}.")
+        user = User.objects.annotate(entries=Count('daily_progress')).order_by('-entries').first()
+        if user is None:
+            raise CommandError("There are no users to explain queries for.")
+        return user
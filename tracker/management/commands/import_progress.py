@@ -0,0 +1,37 @@
+import sys
+import time
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+
+from tracker.importers import CHUNK_SIZE, FORMATS, detect_format, import_progress
+
+
+class Command(BaseCommand):
+    help = "Import study sessions for a user from a CSV or JSON Lines file ('-' reads stdin)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('username')
+        parser.add_argument('path')
+        parser.add_argument('--format', choices=FORMATS, help="Defaults to detecting from the file name.")
+        parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE)
+
+    def handle(self, *args, **options):
+        try:
+            user = User.objects.get(username=options['username'])
+        except User.DoesNotExist:
+            raise CommandError(f"No user named {options['username']!r}.")
+        path = options['path']
+        fmt = options['format'] or detect_format(path)
+        start = time.perf_counter()
+        if path == '-':
+            result = import_progress(user, sys.stdin.buffer, fmt, options['chunk_size'])
+        else:
+            with open(path, 'rb') as fileobj:
+                result = import_progress(user, fileobj, fmt, options['chunk_size'])
+        elapsed = time.perf_counter() - start
+        for line, message in result.errors:
+            self.stderr.write(f"line {line}: {message}")
+        rate = (result.imported + result.failed) / elapsed if elapsed else 0
+        self.stdout.write(self.style.SUCCESS(
+            f"Imported {result.imported} row(s), {result.failed} failed, in {elapsed:.2f}s ({rate:,.0f} rows/s)."))
@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from tracker import rollups
+
+
+class Command(BaseCommand):
+    help = "Rebuild the DailyRollup table from DailyProgress, or verify that it is consistent."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', type=int, help="Only process this user id.")
+        parser.add_argument('--verify', action='store_true',
+                            help="Report mismatched buckets instead of rebuilding.")
+
+    def handle(self, *args, **options):
+        user_id = options['user']
+        if options['verify']:
+            mismatches = rollups.verify(user_id)
+            for bucket, expected, actual in mismatches:
+                self.stdout.write(f"{bucket}: expected {expected}, stored {actual}")
+            if mismatches:
+                raise CommandError(f"{len(mismatches)} rollup bucket(s) out of date.")
+            self.stdout.write(self.style.SUCCESS("Rollups are consistent."))
+            return
+        written = rollups.rebuild(user_id)
+        self.stdout.write(self.style.SUCCESS(f"Wrote {written} rollup rows."))
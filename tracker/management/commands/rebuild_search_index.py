@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from tracker import search
+from tracker.models import SearchDocument
+
+
+class Command(BaseCommand):
+    help = "Recreate the full-text search documents from the tracker tables."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', type=int, help="Only process this user id.")
+
+    def handle(self, *args, **options):
+        search.rebuild(options['user'])
+        documents = SearchDocument.objects.all()
+        if options['user'] is not None:
+            documents = documents.filter(user_id=options['user'])
+        self.stdout.write(self.style.SUCCESS(f"Indexed {documents.count()} document(s)."))
@@ -0,0 +1,27 @@
+import signal
+
+from django.core.management.base import BaseCommand
+
+from tracker.jobs import Worker
+
+
+class Command(BaseCommand):
+    help = "Run queued background jobs (imports, rebuilds) until stopped with SIGINT or SIGTERM."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--concurrency', type=int, default=2, help="Jobs run at the same time.")
+        parser.add_argument('--pool', choices=('thread', 'process'), default='thread',
+                            help="Run jobs in threads, or in processes for CPU-bound work.")
+        parser.add_argument('--poll-interval', type=float, default=1.0,
+                            help="Seconds between looks at the queue when it is empty.")
+        parser.add_argument('--burst', action='store_true', help="Exit once the queue is empty.")
+
+    def handle(self, *args, **options):
+        worker = Worker(options['concurrency'], options['pool'], options['poll_interval'],
+                        log=self.stderr.write)
+        for signum in (signal.SIGINT, signal.SIGTERM):
+            signal.signal(signum, lambda *_: worker.stop())
+        self.stdout.write(f"Worker {worker.name}: up to {options['concurrency']} job(s) at a time "
+                          f"in a {options['pool']} pool.")
+        done = worker.run(burst=options['burst'])
+        self.stdout.write(self.style.SUCCESS(f"Ran {done} job(s)."))
@@ -0,0 +1,42 @@
+import time
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+
+from tracker.models import DailyProgress
+from tracker.seeding import PASSWORD, SeedOptions, seed_user
+
+
+class Command(BaseCommand):
+    help = "Generate users with a realistic study history for load testing."
+
+    def add_arguments(self, parser):
+        defaults = SeedOptions()
+        parser.add_argument('--users', type=int, default=10, help="Users to create (default: 10).")
+        parser.add_argument('--prefix', default='loadtest', help="Username prefix (default: loadtest).")
+        parser.add_argument('--languages', type=int, default=defaults.languages)
+        parser.add_argument('--topics', type=int, default=defaults.topics_per_language, help="Topics per language.")
+        parser.add_argument('--years', type=float, default=defaults.years, help="Years of daily progress.")
+        parser.add_argument('--study-days', type=float, default=defaults.study_days,
+                            help="Fraction of days with study sessions (default: %(default)s).")
+        parser.add_argument('--resources', type=int, default=defaults.resources)
+        parser.add_argument('--milestones', type=int, default=defaults.milestones)
+        parser.add_argument('--goals', type=int, default=defaults.goals)
+        parser.add_argument('--seed', type=int, default=0, help="Random seed; the same seed gives the same data.")
+
+    def handle(self, *args, **options):
+        seed_options = SeedOptions(
+            languages=options['languages'], topics_per_language=options['topics'], years=options['years'],
+            study_days=options['study_days'], resources=options['resources'], milestones=options['milestones'],
+            goals=options['goals'])
+        usernames = [f"{options['prefix']}-{i}" for i in range(options['users'])]
+        existing = set(User.objects.filter(username__in=usernames).values_list('username', flat=True))
+        if existing:
+            raise CommandError(f"{len(existing)} user(s) already exist, e.g. {min(existing)}; use another --prefix.")
+        started = time.perf_counter()
+        for username in usernames:
+            user = seed_user(username, seed_options, options['seed'])
+            entries = DailyProgress.objects.filter(user=user).count()
+            self.stdout.write(f"{username}: {entries} progress entries")
+        self.stdout.write(self.style.SUCCESS(
+            f"Created {len(usernames)} user(s) in {time.perf_counter() - started:.1f}s; password {PASSWORD!r}."))
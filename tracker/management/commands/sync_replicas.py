@@ -0,0 +1,37 @@
+import sqlite3
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from tracker.replicas import PRIMARY
+
+
+class Command(BaseCommand):
+    help = ("Copy the primary SQLite database over each SQLite replica in DATABASE_REPLICA_URLS, "
+            "for trying the replica setup locally. PostgreSQL replicas are kept in sync by the server.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('aliases', nargs='*', help="Replicas to copy to (default: all of them).")
+
+    def handle(self, *args, **options):
+        aliases = options['aliases'] or settings.TRACKER_REPLICAS
+        if not aliases:
+            raise CommandError("No replicas configured; set DATABASE_REPLICA_URLS.")
+        unknown = set(aliases) - set(settings.TRACKER_REPLICAS)
+        if unknown:
+            raise CommandError(f"Not a replica: {', '.join(sorted(unknown))}.")
+        primary = connections[PRIMARY]
+        if primary.vendor != 'sqlite' or any(connections[alias].vendor != 'sqlite' for alias in aliases):
+            raise CommandError("Only SQLite databases can be copied; see the README for PostgreSQL.")
+        primary.ensure_connection()
+        for alias in aliases:
+            replica = connections[alias]
+            replica.close()
+            target = sqlite3.connect(replica.settings_dict['NAME'], uri=True)
+            try:
+                # The online backup API copies a consistent snapshot while the primary stays in use.
+                primary.connection.backup(target)
+            finally:
+                target.close()
+            self.stdout.write(self.style.SUCCESS(f"Copied {PRIMARY} to {alias}."))
@@ -0,0 +1,58 @@
+# Generated by Django 5.2.18 on 2026-10-18 18:52
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Max, Min, Sum
+
+
+def populate_rollups(apps, schema_editor):
+    DailyProgress = apps.get_model('tracker', 'DailyProgress')
+    DailyRollup = apps.get_model('tracker', 'DailyRollup')
+    rows = (
+        DailyProgress.objects.filter(user__isnull=False)
+        .values('user_id', 'language_id', 'topic_id', 'date')
+        .annotate(
+            total_minutes=Sum('time_spent_minutes'),
+            session_count=Count('id'),
+            confidence_sum=Sum('confidence_level'),
+            confidence_min=Min('confidence_level'),
+            confidence_max=Max('confidence_level'),
+        )
+        .order_by()
+    )
+    DailyRollup.objects.bulk_create(
+        (DailyRollup(day=row.pop('date'), **row) for row in rows.iterator()),
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tracker', '0002_dailyprogress_user_goal_user_language_user_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('total_minutes', models.PositiveIntegerField(default=0)),
+                ('session_count', models.PositiveIntegerField(default=0)),
+                ('confidence_sum', models.PositiveIntegerField(default=0)),
+                ('confidence_min', models.PositiveIntegerField(default=0)),
+                ('confidence_max', models.PositiveIntegerField(default=0)),
+                ('language', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='rollups', to='tracker.language')),
+                ('topic', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='rollups', to='tracker.topic')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_rollups', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['user', 'day'], name='rollup_user_day_idx')],
+                'constraints': [models.UniqueConstraint(condition=models.Q(('topic__isnull', False)), fields=('user', 'language', 'topic', 'day'), name='rollup_unique_topic_day'), models.UniqueConstraint(condition=models.Q(('topic__isnull', True)), fields=('user', 'language', 'day'), name='rollup_unique_language_day')],
+            },
+        ),
+        migrations.RunPython(populate_rollups, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 5.2.18 on 2026-10-18 18:56
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tracker', '0003_dailyrollup'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='dailyprogress',
+            index=models.Index(fields=['user', 'date', 'id'], name='progress_user_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='dailyprogress',
+            index=models.Index(fields=['user', 'language'], name='progress_user_language_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='dailyrollup',
+            index=models.Index(fields=['user', 'language', 'day'], name='rollup_user_language_day_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='goal',
+            index=models.Index(condition=models.Q(('is_completed', False)), fields=['user', 'target_date'], name='goal_user_open_target_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='milestone',
+            index=models.Index(condition=models.Q(('is_completed', True)), fields=['user', 'date_created'], name='milestone_user_done_date_idx'),
+        ),
+    ]
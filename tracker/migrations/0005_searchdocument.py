@@ -0,0 +1,89 @@
+# Generated by Django 5.2.18 on 2026-10-18 19:06
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+SQLITE_FORWARD = [
+    """CREATE VIRTUAL TABLE tracker_searchdocument_fts USING fts5(
+        title, body, content='tracker_searchdocument', content_rowid='id', tokenize='porter unicode61')""",
+    """CREATE TRIGGER tracker_searchdocument_ai AFTER INSERT ON tracker_searchdocument BEGIN
+        INSERT INTO tracker_searchdocument_fts(rowid, title, body) VALUES (new.id, new.title, new.body);
+    END""",
+    """CREATE TRIGGER tracker_searchdocument_ad AFTER DELETE ON tracker_searchdocument BEGIN
+        INSERT INTO tracker_searchdocument_fts(tracker_searchdocument_fts, rowid, title, body)
+        VALUES ('delete', old.id, old.title, old.body);
+    END""",
+    """CREATE TRIGGER tracker_searchdocument_au AFTER UPDATE ON tracker_searchdocument BEGIN
+        INSERT INTO tracker_searchdocument_fts(tracker_searchdocument_fts, rowid, title, body)
+        VALUES ('delete', old.id, old.title, old.body);
+        INSERT INTO tracker_searchdocument_fts(rowid, title, body) VALUES (new.id, new.title, new.body);
+    END""",
+]
+SQLITE_BACKWARD = [
+    "DROP TRIGGER IF EXISTS tracker_searchdocument_au",
+    "DROP TRIGGER IF EXISTS tracker_searchdocument_ad",
+    "DROP TRIGGER IF EXISTS tracker_searchdocument_ai",
+    "DROP TABLE IF EXISTS tracker_searchdocument_fts",
+]
+POSTGRESQL_FORWARD = [
+    """CREATE INDEX tracker_searchdocument_vector_idx ON tracker_searchdocument
+        USING GIN (to_tsvector('english'::regconfig, title || ' ' || body))""",
+]
+POSTGRESQL_BACKWARD = [
+    "DROP INDEX IF EXISTS tracker_searchdocument_vector_idx",
+]
+
+
+def run_for_vendor(statements):
+    def run(apps, schema_editor):
+        for sql in statements.get(schema_editor.connection.vendor, []):
+            schema_editor.execute(sql)
+    return run
+
+
+def populate_documents(apps, schema_editor):
+    SearchDocument = apps.get_model('tracker', 'SearchDocument')
+    sources = [
+        ('progress', apps.get_model('tracker', 'DailyProgress'), lambda obj: ('', obj.what_i_learned)),
+        ('topic', apps.get_model('tracker', 'Topic'), lambda obj: (obj.name, obj.description)),
+        ('milestone', apps.get_model('tracker', 'Milestone'), lambda obj: (obj.title, obj.details)),
+        ('resource', apps.get_model('tracker', 'Resource'), lambda obj: (obj.title, '')),
+    ]
+    for kind, model, fields in sources:
+        documents = (
+            SearchDocument(user_id=obj.user_id, kind=kind, object_id=obj.pk, title=title, body=body)
+            for obj in model.objects.filter(user__isnull=False).iterator()
+            for title, body in [fields(obj)]
+        )
+        SearchDocument.objects.bulk_create(documents, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tracker', '0004_access_pattern_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SearchDocument',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('progress', 'Progress'), ('topic', 'Topic'), ('milestone', 'Milestone'), ('resource', 'Resource')], max_length=20)),
+                ('object_id', models.BigIntegerField()),
+                ('title', models.CharField(blank=True, max_length=200)),
+                ('body', models.TextField(blank=True)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='search_documents', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('kind', 'object_id'), name='search_unique_object')],
+            },
+        ),
+        migrations.RunPython(
+            run_for_vendor({'sqlite': SQLITE_FORWARD, 'postgresql': POSTGRESQL_FORWARD}),
+            run_for_vendor({'sqlite': SQLITE_BACKWARD, 'postgresql': POSTGRESQL_BACKWARD}),
+        ),
+        migrations.RunPython(populate_documents, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,92 @@
+# Generated by Django 5.2.18 on 2026-10-18 19:12
+
+import django.db.models.functions.text
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Max, Min, Sum
+
+# Models with a ``language`` foreign key and a ``user`` of their own.
+RELATED_MODELS = ('Topic', 'DailyProgress', 'Resource', 'Milestone')
+
+
+def _repoint(related, source, target, **filters):
+    for model in related:
+        model.objects.filter(language=source, **filters).update(language=target)
+
+
+def _rebuild_rollups(apps, user_ids):
+    DailyProgress = apps.get_model('tracker', 'DailyProgress')
+    DailyRollup = apps.get_model('tracker', 'DailyRollup')
+    for user_id in user_ids:
+        DailyRollup.objects.filter(user_id=user_id).delete()
+        rows = (
+            DailyProgress.objects.filter(user_id=user_id)
+            .values('user_id', 'language_id', 'topic_id', 'date')
+            .annotate(
+                total_minutes=Sum('time_spent_minutes'),
+                session_count=Count('id'),
+                confidence_sum=Sum('confidence_level'),
+                confidence_min=Min('confidence_level'),
+                confidence_max=Max('confidence_level'),
+            )
+            .order_by()
+        )
+        DailyRollup.objects.bulk_create(
+            (DailyRollup(day=row.pop('date'), **row) for row in rows.iterator()),
+            batch_size=1000,
+        )
+
+
+def merge_duplicate_languages(apps, schema_editor):
+    """Fold languages that differ only by case into the oldest one per user.
+
+    The "new language" form field used to create languages without a user;
+    each user whose rows point at such a language gets the rows moved to a
+    language of their own first.
+    """
+    Language = apps.get_model('tracker', 'Language')
+    related = [apps.get_model('tracker', name) for name in RELATED_MODELS]
+    touched_users = set()
+
+    owned = {}
+    for language in Language.objects.filter(user__isnull=False).order_by('pk').only('pk', 'user_id', 'name'):
+        key = (language.user_id, language.name.lower())
+        keeper = owned.setdefault(key, language)
+        if keeper is not language:
+            _repoint(related, language, keeper)
+            language.delete()
+            touched_users.add(language.user_id)
+
+    for orphan in Language.objects.filter(user__isnull=True).order_by('pk'):
+        user_ids = set()
+        for model in related:
+            user_ids.update(model.objects.filter(language=orphan, user__isnull=False)
+                            .values_list('user_id', flat=True).distinct())
+        for user_id in sorted(user_ids):
+            key = (user_id, orphan.name.lower())
+            if key not in owned:
+                owned[key] = Language.objects.create(
+                    user_id=user_id, name=orphan.name, description=orphan.description,
+                    difficulty_level=orphan.difficulty_level, date_started=orphan.date_started)
+            _repoint(related, orphan, owned[key], user_id=user_id)
+            touched_users.add(user_id)
+        if not any(model.objects.filter(language=orphan).exists() for model in related):
+            orphan.delete()
+
+    _rebuild_rollups(apps, sorted(touched_users))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tracker', '0005_searchdocument'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RunPython(merge_duplicate_languages, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='language',
+            constraint=models.UniqueConstraint(models.F('user'), django.db.models.functions.text.Lower('name'), name='language_unique_user_name'),
+        ),
+    ]
@@ -0,0 +1,84 @@
+# Generated by Django 5.2.18 on 2026-10-18 19:37
+
+import datetime
+
+from django.conf import settings
+from django.db import migrations, models
+
+# A copy of the SM-2 step in tracker/reviews.py as it was when this migration
+# was written, so later changes to the app code do not change what it does.
+DEFAULT_EASE = 2.5
+MIN_EASE = 1.3
+PASSING_CONFIDENCE = 3
+STATE_FIELDS = ('review_repetitions', 'review_interval', 'ease_factor', 'last_reviewed', 'next_review')
+NEW_STATE = (0, 0, DEFAULT_EASE, None, None)
+
+
+def _review(state, confidence, day):
+    repetitions, interval, ease = state[:3]
+    if confidence >= PASSING_CONFIDENCE:
+        if repetitions == 0:
+            interval = 1
+        elif repetitions == 1:
+            interval = 6
+        else:
+            interval = round(interval * ease)
+        repetitions += 1
+    else:
+        interval, repetitions = 1, 0
+    ease = max(MIN_EASE, ease + 0.1 - (5 - confidence) * (0.08 + (5 - confidence) * 0.02))
+    return repetitions, interval, round(ease, 4), day, day + datetime.timedelta(days=interval)
+
+
+def schedule_reviews(apps, schema_editor):
+    """Replay every topic's progress history through the review scheduler."""
+    Topic = apps.get_model('tracker', 'Topic')
+    DailyProgress = apps.get_model('tracker', 'DailyProgress')
+    states = {}
+    history = (DailyProgress.objects.filter(topic__isnull=False).order_by('topic_id', 'date', 'id')
+               .values_list('topic_id', 'confidence_level', 'date'))
+    for topic_id, confidence, day in history.iterator(chunk_size=2000):
+        states[topic_id] = _review(states.get(topic_id, NEW_STATE), confidence, day)
+    topics = [Topic(pk=topic_id, **dict(zip(STATE_FIELDS, state))) for topic_id, state in states.items()]
+    Topic.objects.bulk_update(topics, STATE_FIELDS, batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tracker', '0006_merge_duplicate_languages'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='topic',
+            name='ease_factor',
+            field=models.FloatField(default=2.5),
+        ),
+        migrations.AddField(
+            model_name='topic',
+            name='last_reviewed',
+            field=models.DateField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='topic',
+            name='next_review',
+            field=models.DateField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='topic',
+            name='review_interval',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='topic',
+            name='review_repetitions',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddIndex(
+            model_name='topic',
+            index=models.Index(fields=['user', 'next_review'], name='topic_user_next_review_idx'),
+        ),
+        migrations.RunPython(schedule_reviews, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-18 19:53
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tracker', '0008_job'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='dailyprogress',
+            index=models.Index(fields=['date'], name='progress_date_idx'),
+        ),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 5.2.18 on 2026-10-18 20:33
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tracker', '0011_dataversion'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UploadChunk',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('index', models.PositiveIntegerField()),
+                ('data', models.BinaryField()),
+                ('job', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='upload_chunks', to='tracker.job')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('job', 'index'), name='uploadchunk_job_index_uniq')],
+            },
+        ),
+    ]
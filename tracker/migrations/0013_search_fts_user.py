@@ -0,0 +1,56 @@
+from django.db import migrations
+
+# The SQLite full-text index gains the document's user_id as a third column,
+# so a search can restrict its MATCH to one user's documents inside the index
+# (see tracker/search.py) instead of joining every user's hits to filter them.
+DROP = [
+    "DROP TRIGGER IF EXISTS tracker_searchdocument_au",
+    "DROP TRIGGER IF EXISTS tracker_searchdocument_ad",
+    "DROP TRIGGER IF EXISTS tracker_searchdocument_ai",
+    "DROP TABLE IF EXISTS tracker_searchdocument_fts",
+]
+
+
+def fts_statements(columns):
+    new = ', '.join(f'new.{column}' for column in columns)
+    old = ', '.join(f'old.{column}' for column in columns)
+    names = ', '.join(columns)
+    return DROP + [
+        f"""CREATE VIRTUAL TABLE tracker_searchdocument_fts USING fts5(
+            {names}, content='tracker_searchdocument', content_rowid='id', tokenize='porter unicode61')""",
+        f"""CREATE TRIGGER tracker_searchdocument_ai AFTER INSERT ON tracker_searchdocument BEGIN
+            INSERT INTO tracker_searchdocument_fts(rowid, {names}) VALUES (new.id, {new});
+        END""",
+        f"""CREATE TRIGGER tracker_searchdocument_ad AFTER DELETE ON tracker_searchdocument BEGIN
+            INSERT INTO tracker_searchdocument_fts(tracker_searchdocument_fts, rowid, {names})
+            VALUES ('delete', old.id, {old});
+        END""",
+        f"""CREATE TRIGGER tracker_searchdocument_au AFTER UPDATE ON tracker_searchdocument BEGIN
+            INSERT INTO tracker_searchdocument_fts(tracker_searchdocument_fts, rowid, {names})
+            VALUES ('delete', old.id, {old});
+            INSERT INTO tracker_searchdocument_fts(rowid, {names}) VALUES (new.id, {new});
+        END""",
+        "INSERT INTO tracker_searchdocument_fts(tracker_searchdocument_fts) VALUES ('rebuild')",
+    ]
+
+
+def run_on_sqlite(statements):
+    def run(apps, schema_editor):
+        if schema_editor.connection.vendor == 'sqlite':
+            for sql in statements:
+                schema_editor.execute(sql)
+    return run
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tracker', '0012_uploadchunk'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            run_on_sqlite(fts_statements(['title', 'body', 'user_id'])),
+            run_on_sqlite(fts_statements(['title', 'body'])),
+        ),
+    ]
@@ -1,4 +1,6 @@
 from django.db import models
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models.functions import Lower
 from django.utils import timezone
 from django.contrib.auth.models import User
 
@@ -15,6 +17,12 @@ class Language(models.Model):
     difficulty_level = models.CharField(max_length=20, choices=DIFFICULTY_CHOICES, default='Beginner')
     date_started = models.DateField(default=timezone.now)
 
+    class Meta:
+        constraints = [
+            # One language per name and user, whatever the case; see tracker/languages.py.
+            models.UniqueConstraint('user', Lower('name'), name='language_unique_user_name'),
+        ]
+
     def __str__(self):
         return self.name
 
@@ -24,6 +32,18 @@ class Topic(models.Model):
     language = models.ForeignKey(Language, on_delete=models.CASCADE, related_name='topics')
     name = models.CharField(max_length=200)
     description = models.TextField(blank=True)
+    # Spaced-repetition schedule, maintained by tracker.reviews.
+    review_repetitions = models.PositiveIntegerField(default=0)
+    review_interval = models.PositiveIntegerField(default=0)
+    ease_factor = models.FloatField(default=2.5)
+    last_reviewed = models.DateField(null=True, blank=True)
+    next_review = models.DateField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            # The dashboard's "due for review" queue is a range scan of this index.
+            models.Index(fields=['user', 'next_review'], name='topic_user_next_review_idx'),
+        ]
 
     def __str__(self):
         return f"{self.name} ({self.language.name})"
@@ -40,10 +60,59 @@ class DailyProgress(models.Model):
 
     class Meta:
         verbose_name_plural = "Daily Progress"
+        indexes = [
+            # progress_list pages on (date, id) newest first; rollup refreshes filter on (user, date).
+            models.Index(fields=['user', 'date', 'id'], name='progress_user_date_idx'),
+            models.Index(fields=['user', 'language'], name='progress_user_language_idx'),
+            # The admin's date drill-down across all users.
+            models.Index(fields=['date'], name='progress_date_idx'),
+        ]
+
+    is_archived = False
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        loaded = dict(zip(field_names, values))
+        if 'user_id' in loaded and 'date' in loaded:
+            # Remembered so rollups can refresh the day an edited entry moves away from.
+            instance._loaded_bucket = (loaded['user_id'], loaded['date'])
+        if 'topic_id' in loaded:
+            # Remembered so the review schedule of the topic an entry leaves is replayed.
+            instance._loaded_topic_id = loaded['topic_id']
+        return instance
 
     def __str__(self):
         return f"{self.date} - {self.language.name}"
 
+class ArchivedProgress(models.Model):
+    """A DailyProgress row older than the archive horizon, moved here by ``tracker.archive``.
+
+    Rows keep their DailyProgress id. Only the indexes the readers of old
+    history need are kept, and the rows still count in the rollups.
+    """
+    id = models.BigIntegerField(primary_key=True)
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='archived_progress', null=True,
+                             blank=True, db_index=False)
+    language = models.ForeignKey(Language, on_delete=models.CASCADE, related_name='+')
+    topic = models.ForeignKey(Topic, on_delete=models.SET_NULL, related_name='+', null=True, blank=True)
+    date = models.DateField()
+    what_i_learned = models.TextField()
+    time_spent_minutes = models.PositiveIntegerField()
+    confidence_level = models.PositiveIntegerField(choices=[(i, i) for i in range(1, 6)], default=3)
+
+    is_archived = True
+
+    class Meta:
+        verbose_name_plural = "Archived Progress"
+        indexes = [
+            # Covers the user filter too, so the user foreign key has no index of its own.
+            models.Index(fields=['user', 'date', 'id'], name='archive_user_date_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.date} - {self.language.name} (archived)"
+
 class Resource(models.Model):
     """Learning resources like tutorials, articles, and courses."""
     RESOURCE_TYPES = [
@@ -72,6 +141,13 @@ class Milestone(models.Model):
     is_completed = models.BooleanField(default=False)
     date_created = models.DateField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            # Partial, so the dashboard's "recent completed milestones" query reads it in order.
+            models.Index(fields=['user', 'date_created'], condition=models.Q(is_completed=True),
+                         name='milestone_user_done_date_idx'),
+        ]
+
     def __str__(self):
         return self.title
 
@@ -83,5 +159,158 @@ class Goal(models.Model):
     target_date = models.DateField()
     is_completed = models.BooleanField(default=False)
 
+    class Meta:
+        indexes = [
+            # Partial, so the dashboard's "upcoming goals" query reads it in order.
+            models.Index(fields=['user', 'target_date'], condition=models.Q(is_completed=False),
+                         name='goal_user_open_target_idx'),
+        ]
+
     def __str__(self):
         return self.title
+
+class DailyRollup(models.Model):
+    """Per-day totals of a user's DailyProgress, bucketed by language and topic.
+
+    Rows are maintained by ``tracker.rollups`` whenever progress entries change,
+    so statistics can be read without rescanning every logged session.
+    """
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='daily_rollups')
+    language = models.ForeignKey(Language, on_delete=models.CASCADE, related_name='rollups')
+    topic = models.ForeignKey(Topic, on_delete=models.CASCADE, related_name='rollups', null=True, blank=True)
+    day = models.DateField()
+    total_minutes = models.PositiveIntegerField(default=0)
+    session_count = models.PositiveIntegerField(default=0)
+    confidence_sum = models.PositiveIntegerField(default=0)
+    confidence_min = models.PositiveIntegerField(default=0)
+    confidence_max = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'language', 'topic', 'day'],
+                                    condition=models.Q(topic__isnull=False), name='rollup_unique_topic_day'),
+            models.UniqueConstraint(fields=['user', 'language', 'day'],
+                                    condition=models.Q(topic__isnull=True), name='rollup_unique_language_day'),
+        ]
+        indexes = [
+            models.Index(fields=['user', 'day'], name='rollup_user_day_idx'),
+            models.Index(fields=['user', 'language', 'day'], name='rollup_user_language_day_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.day} - {self.language_id}/{self.topic_id}: {self.total_minutes} min"
+
+class SearchDocument(models.Model):
+    """Searchable text of a progress entry, topic, milestone or resource.
+
+    Kept in sync by ``tracker.search``. On SQLite the table is mirrored into an
+    FTS5 index by triggers created in migration 0005, and on PostgreSQL it has
+    a GIN index over its tsvector; a migration that rebuilds this table on
+    SQLite must recreate those triggers.
+    """
+    KINDS = [
+        ('progress', 'Progress'),
+        ('topic', 'Topic'),
+        ('milestone', 'Milestone'),
+        ('resource', 'Resource'),
+    ]
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='search_documents')
+    kind = models.CharField(max_length=20, choices=KINDS)
+    object_id = models.BigIntegerField()
+    title = models.CharField(max_length=200, blank=True)
+    body = models.TextField(blank=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['kind', 'object_id'], name='search_unique_object'),
+        ]
+
+    def __str__(self):
+        return f"{self.kind} #{self.object_id}"
+
+class Job(models.Model):
+    """A unit of background work, claimed and run by ``manage.py run_jobs``.
+
+    See ``tracker.jobs`` for the queue itself and ``tracker.tasks`` for what
+    can be enqueued. ``args`` and ``result`` must be JSON serialisable.
+    """
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    SUCCEEDED = 'succeeded'
+    FAILED = 'failed'
+    STATUSES = [
+        (QUEUED, 'Queued'),
+        (RUNNING, 'Running'),
+        (SUCCEEDED, 'Succeeded'),
+        (FAILED, 'Failed'),
+    ]
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='jobs', null=True, blank=True)
+    task = models.CharField(max_length=100)
+    args = models.JSONField(default=dict, blank=True, encoder=DjangoJSONEncoder)
+    status = models.CharField(max_length=10, choices=STATUSES, default=QUEUED)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    max_attempts = models.PositiveSmallIntegerField(default=3)
+    run_after = models.DateTimeField(default=timezone.now)
+    locked_by = models.CharField(max_length=100, blank=True)
+    heartbeat = models.DateTimeField(null=True, blank=True)
+    progress = models.PositiveSmallIntegerField(default=0)  # Percent.
+    message = models.CharField(max_length=200, blank=True)
+    result = models.JSONField(null=True, blank=True, encoder=DjangoJSONEncoder)
+    error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            # The worker's claim query: the oldest due job still queued.
+            models.Index(fields=['status', 'run_after'], name='job_status_run_after_idx'),
+        ]
+
+    @property
+    def is_finished(self):
+        return self.status in (self.SUCCEEDED, self.FAILED)
+
+    def __str__(self):
+        return f"{self.task} #{self.pk} ({self.status})"
+
+
+class CacheCounter(models.Model):
+    """A fragment cache counter (hits or misses) summed over every process; see tracker/caching.py."""
+    name = models.CharField(max_length=20, primary_key=True)
+    value = models.BigIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.name}: {self.value}"
+
+
+class UploadChunk(models.Model):
+    """A piece of a file uploaded for a background job (see tracker/uploads.py).
+
+    Kept in the database rather than MEDIA_ROOT so the worker can read it
+    without sharing a filesystem with the web process.
+    """
+    job = models.ForeignKey(Job, on_delete=models.CASCADE, related_name='upload_chunks')
+    index = models.PositiveIntegerField()
+    data = models.BinaryField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['job', 'index'], name='uploadchunk_job_index_uniq'),
+        ]
+
+    def __str__(self):
+        return f"{self.job_id}: chunk {self.index}"
+
+
+class DataVersion(models.Model):
+    """The version of a user's tracker data, bumped on every write to it (see tracker/caching.py).
+
+    Kept in the database so every web worker and the job runner see the same
+    version, whatever cache each of them has.
+    """
+    user = models.OneToOneField(User, on_delete=models.CASCADE, primary_key=True, related_name='+')
+    version = models.BigIntegerField()
+
+    def __str__(self):
+        return f"{self.user_id}: {self.version}"
@@ -0,0 +1,187 @@
+"""Keyset (cursor) pagination for the list views.
+
+Pages are addressed by the ordering key of the row at their edge instead of
+an offset, so fetching page N is a single indexed range scan no matter how
+deep into the history it is. Cursors are signed, opaque tokens.
+"""
+from django.conf import settings
+from django.core import signing
+from django.db.models import Q
+from django.utils.functional import SimpleLazyObject
+
+CURSOR_SALT = 'tracker.pagination'
+
+
+class KeysetPage:
+    """One page of results plus the cursors of its neighbours."""
+
+    def __init__(self, object_list, next_cursor=None, previous_cursor=None):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+        self.next_query = ''
+        self.previous_query = ''
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+    @property
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+
+class KeysetPaginator:
+    """Paginate ``queryset`` by ``ordering``, e.g. ``('-date', '-id')``.
+
+    The ordering must be total (end with a unique field such as ``id``) and
+    its fields must not be nullable.
+    """
+
+    def __init__(self, queryset, ordering, per_page):
+        self.queryset = queryset
+        self.ordering = tuple(ordering)
+        self.per_page = per_page
+        self.fields = [name.lstrip('-') for name in self.ordering]
+
+    def _key(self, obj):
+        if isinstance(obj, dict):  # Rows of a .values() queryset.
+            return [obj[name] for name in self.fields]
+        return [getattr(obj, name) for name in self.fields]
+
+    def _encode(self, direction, obj):
+        values = [value.isoformat() if hasattr(value, 'isoformat') else value for value in self._key(obj)]
+        return signing.dumps({'d': direction, 'k': values}, salt=CURSOR_SALT)
+
+    def _decode(self, cursor):
+        try:
+            data = signing.loads(cursor, salt=CURSOR_SALT)
+            direction, values = data['d'], data['k']
+        except (signing.BadSignature, KeyError, TypeError):
+            return None, None
+        if direction not in ('n', 'p') or len(values) != len(self.fields):
+            return None, None
+        opts = self.queryset.model._meta
+        fields = [opts.pk if name == 'pk' else opts.get_field(name) for name in self.fields]
+        return direction, [field.to_python(value) for field, value in zip(fields, values)]
+
+    def _after(self, values, forward):
+        """Rows strictly after ``values`` in the (possibly reversed) ordering."""
+        condition = Q()
+        for i, name in enumerate(self.ordering):
+            descending = name.startswith('-')
+            lookup = 'lt' if descending == forward else 'gt'
+            term = Q(**{f'{self.fields[i]}__{lookup}': values[i]})
+            for j in range(i):
+                term &= Q(**{self.fields[j]: values[j]})
+            condition |= term
+        return condition
+
+    def _slice(self, queryset, values, forward):
+        """``queryset``'s page after ``values``, in reverse order when going backward."""
+        ordering = self.ordering if forward else [
+            name[1:] if name.startswith('-') else f'-{name}' for name in self.ordering]
+        queryset = queryset.order_by(*ordering)
+        if values is not None:
+            queryset = queryset.filter(self._after(values, forward))
+        return queryset[:self.per_page + 1]
+
+    def forward_queryset(self, values=None):
+        """The query for the page following the row with ordering key ``values``."""
+        return self._slice(self.queryset, values, forward=True)
+
+    def fetch(self, values, forward):
+        return list(self._slice(self.queryset, values, forward))
+
+    def page(self, cursor=None):
+        direction, values = self._decode(cursor) if cursor else (None, None)
+        if direction == 'p':
+            rows = self.fetch(values, forward=False)
+            has_more = len(rows) > self.per_page
+            rows = rows[:self.per_page][::-1]
+            return KeysetPage(
+                rows,
+                next_cursor=self._encode('n', rows[-1]) if rows else None,
+                previous_cursor=self._encode('p', rows[0]) if rows and has_more else None,
+            )
+        rows = self.fetch(values, forward=True)
+        has_more = len(rows) > self.per_page
+        rows = rows[:self.per_page]
+        return KeysetPage(
+            rows,
+            next_cursor=self._encode('n', rows[-1]) if rows and has_more else None,
+            previous_cursor=self._encode('p', rows[0]) if rows and values is not None else None,
+        )
+
+
+class MergedKeysetPaginator(KeysetPaginator):
+    """Paginate the rows of several querysets with the same fields as one list.
+
+    Every page takes up to a page of rows from each queryset, through the same
+    keyset conditions, and merges them; for a table split into hot and archived
+    rows (see tracker/archive.py).
+    """
+
+    def __init__(self, querysets, ordering, per_page):
+        super().__init__(querysets[0], ordering, per_page)
+        self.querysets = querysets
+
+    def fetch(self, values, forward):
+        rows = []
+        for queryset in self.querysets:
+            rows += self._slice(queryset, values, forward)
+        # One stable sort per field, least significant first.
+        for name in reversed(self.ordering):
+            field = name.lstrip('-')
+            rows.sort(key=lambda row: row[field] if isinstance(row, dict) else getattr(row, field),
+                      reverse=name.startswith('-') == forward)
+        return rows[:self.per_page + 1]
+
+
+def get_page_size(request, maximum=None):
+    """Page size from ``?page_size=``, bounded by the TRACKER_*_PAGE_SIZE settings."""
+    default = getattr(settings, 'TRACKER_PAGE_SIZE', 25)
+    maximum = maximum or getattr(settings, 'TRACKER_MAX_PAGE_SIZE', 200)
+    try:
+        size = int(request.GET.get('page_size', default))
+    except ValueError:
+        size = default
+    return max(1, min(size, maximum))
+
+
+def paginate(request, queryset, ordering, max_page_size=None, param='cursor'):
+    """Return the KeysetPage selected by the request's ``param`` parameter.
+
+    ``queryset`` may be a list of querysets to page through together. Pages of
+    several lists on one view each take their own ``param``; their links keep
+    the other lists' cursors.
+    """
+    per_page = get_page_size(request, max_page_size)
+    if isinstance(queryset, list):
+        paginator = MergedKeysetPaginator(queryset, ordering, per_page)
+    else:
+        paginator = KeysetPaginator(queryset, ordering, per_page)
+    page = paginator.page(request.GET.get(param))
+    for attr, cursor in (('next_query', page.next_cursor), ('previous_query', page.previous_cursor)):
+        if cursor:
+            params = request.GET.copy()
+            params[param] = cursor
+            setattr(page, attr, params.urlencode())
+    return page
+
+
+def lazy_paginate(request, queryset, ordering, param='cursor'):
+    """Like ``paginate``, but the page is only fetched when first used.
+
+    Templates that serve the list from a cached fragment then skip the query.
+    The page itself iterates over its objects, so it can stand in for
+    ``object_list`` in the template context.
+    """
+    return SimpleLazyObject(lambda: paginate(request, queryset, ordering, param=param))
+
@@ -0,0 +1,146 @@
+"""Sending the read-heavy pages to read replicas.
+
+Views wrapped in ``read_from_replica`` read the tracker models from one of
+the replicas in TRACKER_REPLICAS (picked at random) on GET and HEAD
+requests. Everything else goes to the primary: writes, other requests,
+reads of the auth and session tables, and reads inside a transaction.
+
+Replicas trail the primary, so after any POST (or other unsafe request) the
+response sets a cookie that keeps that browser's reads on the primary for
+TRACKER_REPLICA_PIN_SECONDS. That keeps the page shown after a redirect from
+missing the write that caused it. Pages and values cached while reading from a
+replica stay cached until the user's next write, so the window should be
+longer than the replicas' usual lag.
+
+A replica that cannot be reached, or whose query fails, is skipped for
+TRACKER_REPLICA_RETRY_SECONDS. The page is then read again from the primary.
+"""
+import random
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+from inspect import iscoroutinefunction
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, connection, connections
+from django.utils.deprecation import MiddlewareMixin
+
+from .db import SAFE_METHODS
+
+PRIMARY = DEFAULT_DB_ALIAS
+PIN_COOKIE = 'tracker_primary'
+REPLICATED_APPS = {'tracker'}
+
+_reading_from = ContextVar('tracker_replica', default=None)
+# Replica alias -> time.monotonic() until which it is skipped.
+_down = {}
+
+
+def mark_down(alias):
+    _down[alias] = time.monotonic() + settings.TRACKER_REPLICA_RETRY_SECONDS
+
+
+def is_primary(alias):
+    """Whether ``alias`` points at the primary's database, as a test mirror does."""
+    keys = ('ENGINE', 'NAME', 'HOST', 'PORT')
+    replica, primary = connections[alias].settings_dict, connections[PRIMARY].settings_dict
+    return all(replica.get(key) == primary.get(key) for key in keys)
+
+
+def choose_replica():
+    """The alias of a reachable replica, or None when there is none."""
+    now = time.monotonic()
+    aliases = [alias for alias in settings.TRACKER_REPLICAS if _down.get(alias, 0) <= now and not is_primary(alias)]
+    random.shuffle(aliases)
+    for alias in aliases:
+        try:
+            connections[alias].ensure_connection()
+        except DatabaseError:
+            mark_down(alias)
+        else:
+            return alias
+    return None
+
+
+def replica_for(request):
+    """The replica to serve ``request`` from, or None for the primary."""
+    if request.method not in SAFE_METHODS or PIN_COOKIE in request.COOKIES or connection.in_atomic_block:
+        return None
+    return choose_replica()
+
+
+@contextmanager
+def reading_from(alias):
+    """Send the tracker models' reads to ``alias`` inside the block."""
+    token = _reading_from.set(alias)
+    try:
+        yield
+    finally:
+        _reading_from.reset(token)
+
+
+def read_from_replica(view):
+    """Serve a view's safe requests from a replica, falling back to the primary if it fails."""
+    if iscoroutinefunction(view):
+        @wraps(view)
+        async def async_wrapper(request, *args, **kwargs):
+            alias = await sync_to_async(replica_for)(request)
+            if alias is not None:
+                try:
+                    with reading_from(alias):
+                        return await view(request, *args, **kwargs)
+                except DatabaseError:
+                    mark_down(alias)
+            return await view(request, *args, **kwargs)
+        return async_wrapper
+
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        alias = replica_for(request)
+        if alias is not None:
+            try:
+                with reading_from(alias):
+                    return view(request, *args, **kwargs)
+            except DatabaseError:
+                mark_down(alias)
+        return view(request, *args, **kwargs)
+    return wrapper
+
+
+class PinToPrimaryMiddleware(MiddlewareMixin):
+    """Keeps a browser's reads on the primary for a while after it writes."""
+
+    def process_response(self, request, response):
+        if request.method not in SAFE_METHODS and settings.TRACKER_REPLICAS:
+            response.set_cookie(PIN_COOKIE, '1', max_age=settings.TRACKER_REPLICA_PIN_SECONDS,
+                                httponly=True, samesite='Lax')
+        return response
+
+
+class ReplicaRouter:
+    """Routes the tracker models' reads to the replica chosen by ``read_from_replica``, and the rest to the primary.
+
+    Model instances remember the database they were read from; returning the
+    primary explicitly keeps them from being saved to, or followed into, a
+    replica outside the view that read them.
+    """
+
+    def db_for_read(self, model, **hints):
+        if model._meta.app_label in REPLICATED_APPS:
+            return _reading_from.get() or PRIMARY
+        return PRIMARY
+
+    def db_for_write(self, model, **hints):
+        return PRIMARY
+
+    def allow_relation(self, obj1, obj2, **hints):
+        databases = {PRIMARY, *settings.TRACKER_REPLICAS}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Replicas get their tables from the primary.
+        return False if db in settings.TRACKER_REPLICAS else None
@@ -0,0 +1,136 @@
+"""Spaced-repetition review schedule of topics (SM-2).
+
+Every progress entry for a topic counts as a review graded by its
+``confidence_level``. Confidence 3 or more (SM-2 quality 3-5) grows the
+interval: one day, then six, then the previous interval times the topic's
+ease factor. Confidence 1 or 2 starts the topic over at one day. The ease
+factor moves with every grade and never drops below 1.3.
+
+The schedule lives on the Topic row, with ``next_review`` indexed per user,
+so the due queue is one index range scan. A new entry dated on or after the
+topic's last review advances the schedule by one step. Edits, deletions and
+back-dated entries replay the topic's history instead, since SM-2 steps
+cannot be undone.
+"""
+import datetime
+import heapq
+from dataclasses import dataclass, replace
+
+from .models import Topic, DailyProgress, ArchivedProgress
+
+DEFAULT_EASE = 2.5
+MIN_EASE = 1.3
+PASSING_CONFIDENCE = 3
+STATE_FIELDS = ('review_repetitions', 'review_interval', 'ease_factor', 'last_reviewed', 'next_review')
+
+
+@dataclass(frozen=True)
+class ReviewState:
+    repetitions: int = 0
+    interval: int = 0
+    ease: float = DEFAULT_EASE
+    last_reviewed: datetime.date = None
+    next_review: datetime.date = None
+
+    @classmethod
+    def of(cls, topic):
+        return cls(*(getattr(topic, name) for name in STATE_FIELDS))
+
+    def as_fields(self):
+        return dict(zip(STATE_FIELDS, (self.repetitions, self.interval, self.ease,
+                                       self.last_reviewed, self.next_review)))
+
+    def review(self, confidence, day):
+        """The state after a review on ``day`` graded ``confidence`` (1-5)."""
+        quality = confidence  # SM-2 grades 0-5; confidence is collected as 1-5.
+        if quality >= PASSING_CONFIDENCE:
+            if self.repetitions == 0:
+                interval = 1
+            elif self.repetitions == 1:
+                interval = 6
+            else:
+                interval = round(self.interval * self.ease)
+            repetitions = self.repetitions + 1
+        else:
+            interval, repetitions = 1, 0
+        ease = max(MIN_EASE, self.ease + 0.1 - (5 - quality) * (0.08 + (5 - quality) * 0.02))
+        return replace(self, repetitions=repetitions, interval=interval, ease=round(ease, 4),
+                       last_reviewed=day, next_review=day + datetime.timedelta(days=interval))
+
+
+def _is_next(state, day):
+    return state.last_reviewed is None or day >= state.last_reviewed
+
+
+def record(entry):
+    """Advance the schedule of ``entry``'s topic for a newly created entry."""
+    if entry.topic_id is None:
+        return
+    if DailyProgress.topic.is_cached(entry) and entry.topic is not None:
+        state = ReviewState.of(entry.topic)  # Loaded moments ago while validating the form.
+    else:
+        row = Topic.objects.filter(pk=entry.topic_id).values_list(*STATE_FIELDS).first()
+        if row is None:
+            return
+        state = ReviewState(*row)
+    if not _is_next(state, entry.date):
+        replay([entry.topic_id])
+        return
+    state = state.review(entry.confidence_level, entry.date)
+    Topic.objects.filter(pk=entry.topic_id).update(**state.as_fields())
+    if DailyProgress.topic.is_cached(entry) and entry.topic is not None:
+        for name, value in state.as_fields().items():
+            setattr(entry.topic, name, value)
+
+
+def record_many(entries):
+    """Advance the schedules for bulk-created ``entries`` (anything with the model's attributes)."""
+    by_topic = {}
+    for entry in entries:
+        if entry.topic_id is not None:
+            by_topic.setdefault(entry.topic_id, []).append(entry)
+    if not by_topic:
+        return
+    topics = Topic.objects.filter(pk__in=by_topic).only('pk', *STATE_FIELDS).in_bulk()
+    changed, stale = [], []
+    for topic_id, topic_entries in by_topic.items():
+        topic = topics.get(topic_id)
+        if topic is None:
+            continue
+        topic_entries.sort(key=lambda entry: (entry.date, entry.id))
+        state = ReviewState.of(topic)
+        if not _is_next(state, topic_entries[0].date):
+            stale.append(topic_id)
+            continue
+        for entry in topic_entries:
+            state = state.review(entry.confidence_level, entry.date)
+        for name, value in state.as_fields().items():
+            setattr(topic, name, value)
+        changed.append(topic)
+    Topic.objects.bulk_update(changed, STATE_FIELDS, batch_size=500)
+    replay(stale)
+
+
+def replay(topic_ids):
+    """Recompute the schedules of ``topic_ids`` from their whole history."""
+    topic_ids = {topic_id for topic_id in topic_ids if topic_id is not None}
+    if not topic_ids:
+        return
+    states = {topic_id: ReviewState() for topic_id in topic_ids}
+    # Archived sessions (tracker/archive.py) are part of the history too.
+    histories = [
+        model.objects.filter(topic_id__in=topic_ids).order_by('date', 'id')
+        .values_list('date', 'id', 'topic_id', 'confidence_level').iterator(chunk_size=2000)
+        for model in (ArchivedProgress, DailyProgress)
+    ]
+    for day, _, topic_id, confidence in heapq.merge(*histories):
+        states[topic_id] = states[topic_id].review(confidence, day)
+    for topic_id, state in states.items():
+        Topic.objects.filter(pk=topic_id).update(**state.as_fields())
+
+
+def due(user, day, limit=10):
+    """``user``'s topics due for review on or before ``day``, most overdue first."""
+    return list(
+        Topic.objects.filter(user=user, next_review__lte=day)
+        .select_related('language').order_by('next_review', 'id')[:limit])
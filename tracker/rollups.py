@@ -0,0 +1,201 @@
+"""Maintenance of the DailyRollup table.
+
+A rollup bucket is identified by (user, language, topic, day). Rather than
+applying deltas, the buckets touched by a write are recomputed from the
+DailyProgress rows of that user and day, which keeps min/max confidence
+correct when entries are edited, moved or deleted.
+
+Sessions moved to ArchivedProgress (see tracker/archive.py) still count:
+buckets are written from DailyProgress and the archive's totals for the
+same buckets are merged into them.
+
+Writers of one user's buckets take a lock on that user's row first, so two
+of them never delete and recreate the same bucket at once; the second waits
+for the first to commit and then recomputes from what it wrote.
+"""
+from django.contrib.auth.models import User
+from django.db import connection, transaction
+from django.db.models import Count, Max, Min, Sum
+
+from .models import DailyProgress, ArchivedProgress, DailyRollup
+
+# Keep IN (...) lists well under SQLite's bound parameter limit.
+DAY_CHUNK_SIZE = 500
+INSERT_BATCH_SIZE = 1000
+
+
+def _aggregate(queryset):
+    """Group DailyProgress (or ArchivedProgress) rows into rollup buckets."""
+    return (
+        queryset.filter(user__isnull=False)
+        .values('user_id', 'language_id', 'topic_id', 'date')
+        .annotate(
+            total_minutes=Sum('time_spent_minutes'),
+            session_count=Count('id'),
+            confidence_sum=Sum('confidence_level'),
+            confidence_min=Min('confidence_level'),
+            confidence_max=Max('confidence_level'),
+        )
+        .order_by()
+    )
+
+
+def _to_rollup(row):
+    return DailyRollup(
+        user_id=row['user_id'],
+        language_id=row['language_id'],
+        topic_id=row['topic_id'],
+        day=row['date'],
+        total_minutes=row['total_minutes'],
+        session_count=row['session_count'],
+        confidence_sum=row['confidence_sum'],
+        confidence_min=row['confidence_min'],
+        confidence_max=row['confidence_max'],
+    )
+
+
+def _lock(user_id):
+    """Hold ``user_id``'s bucket writers off until the current transaction ends.
+
+    The buckets a write creates do not exist yet, so locking them would not
+    keep a concurrent refresh from inserting the same ones; the user's row is
+    locked instead. SQLite runs one write transaction at a time anyway.
+    """
+    if connection.features.has_select_for_update:
+        list(User.objects.select_for_update().filter(pk=user_id).values_list('pk', flat=True))
+
+
+def refresh(user_id, days):
+    """Recompute every rollup bucket of ``user_id`` on the given ``days``."""
+    if user_id is None:
+        return
+    days = sorted(set(days))
+    with transaction.atomic():
+        _lock(user_id)
+        for start in range(0, len(days), DAY_CHUNK_SIZE):
+            chunk = days[start:start + DAY_CHUNK_SIZE]
+            DailyRollup.objects.filter(user_id=user_id, day__in=chunk).delete()
+            rows = _aggregate(DailyProgress.objects.filter(user_id=user_id, date__in=chunk))
+            DailyRollup.objects.bulk_create([_to_rollup(row) for row in rows])
+            _merge([_values(row) for row in
+                    _aggregate(ArchivedProgress.objects.filter(user_id=user_id, date__in=chunk))])
+
+
+def add(user_id, entries):
+    """Fold newly inserted ``entries`` into the rollups of ``user_id``.
+
+    Used by bulk inserts, where recomputing every touched day would rescan
+    the user's history once per chunk. Existing buckets are merged with an
+    upsert; buckets are never shrunk, so this is only valid for new rows.
+    """
+    if user_id is None:
+        return
+    buckets = {}
+    for entry in entries:
+        key = (entry.language_id, entry.topic_id, entry.date)
+        minutes, sessions, total, low, high = buckets.get(key, (0, 0, 0, 5, 1))
+        level = entry.confidence_level
+        buckets[key] = (minutes + entry.time_spent_minutes, sessions + 1, total + level,
+                        min(low, level), max(high, level))
+    with transaction.atomic():
+        _lock(user_id)
+        _merge([(user_id, language_id, topic_id, day, *values)
+                for (language_id, topic_id, day), values in buckets.items()])
+
+
+def _values(row):
+    return (row['user_id'], row['language_id'], row['topic_id'], row['date'], row['total_minutes'],
+            row['session_count'], row['confidence_sum'], row['confidence_min'], row['confidence_max'])
+
+
+def _merge(rows):
+    """Add bucket totals, as ``_values`` tuples, to the rollups with an upsert."""
+    if not rows:
+        return
+    table = connection.ops.quote_name(DailyRollup._meta.db_table)
+    least, greatest = ('MIN', 'MAX') if connection.vendor == 'sqlite' else ('LEAST', 'GREATEST')
+    merge = (
+        'DO UPDATE SET total_minutes = {t}.total_minutes + excluded.total_minutes, '
+        'session_count = {t}.session_count + excluded.session_count, '
+        'confidence_sum = {t}.confidence_sum + excluded.confidence_sum, '
+        'confidence_min = {least}({t}.confidence_min, excluded.confidence_min), '
+        'confidence_max = {greatest}({t}.confidence_max, excluded.confidence_max)'
+    ).format(t=table, least=least, greatest=greatest)
+    columns = ('user_id, language_id, topic_id, day, total_minutes, session_count, '
+               'confidence_sum, confidence_min, confidence_max')
+    # One statement per partial unique index, since ON CONFLICT names its target.
+    statements = {
+        True: f'INSERT INTO {table} ({columns}) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s) '
+              f'ON CONFLICT (user_id, language_id, topic_id, day) WHERE topic_id IS NOT NULL {merge}',
+        False: f'INSERT INTO {table} ({columns}) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s) '
+               f'ON CONFLICT (user_id, language_id, day) WHERE topic_id IS NULL {merge}',
+    }
+    params = {True: [], False: []}
+    for row in rows:
+        params[row[2] is not None].append(row)
+    with transaction.atomic(), connection.cursor() as cursor:
+        for has_topic, batch in params.items():
+            if batch:
+                cursor.executemany(statements[has_topic], batch)
+
+
+def rebuild(user_id=None):
+    """Recompute rollups from scratch, for one user or for everyone.
+
+    Returns the number of rollup rows written.
+    """
+    progress, archived = DailyProgress.objects.all(), ArchivedProgress.objects.all()
+    rollups = DailyRollup.objects.all()
+    if user_id is not None:
+        progress, archived = progress.filter(user_id=user_id), archived.filter(user_id=user_id)
+        rollups = rollups.filter(user_id=user_id)
+    with transaction.atomic():
+        if user_id is not None:
+            _lock(user_id)
+        rollups.delete()
+        for source, to_rollup, write in ((progress, _to_rollup, DailyRollup.objects.bulk_create),
+                                         (archived, _values, _merge)):
+            batch = []
+            for row in _aggregate(source).iterator(chunk_size=INSERT_BATCH_SIZE):
+                batch.append(to_rollup(row))
+                if len(batch) >= INSERT_BATCH_SIZE:
+                    write(batch)
+                    batch = []
+            write(batch)
+        return rollups.count()
+
+
+def _bucket(row):
+    return (row['user_id'], row['language_id'], row['topic_id'], row['date'])
+
+
+def verify(user_id=None):
+    """Compare the rollup table with DailyProgress and ArchivedProgress.
+
+    Returns a list of ``(bucket, expected, actual)`` tuples for every bucket
+    whose stored totals differ from the source rows; empty when consistent.
+    """
+    sources = [DailyProgress.objects.all(), ArchivedProgress.objects.all()]
+    rollups = DailyRollup.objects.all()
+    if user_id is not None:
+        sources = [source.filter(user_id=user_id) for source in sources]
+        rollups = rollups.filter(user_id=user_id)
+    fields = ('total_minutes', 'session_count', 'confidence_sum', 'confidence_min', 'confidence_max')
+    expected = {}
+    for source in sources:
+        for row in _aggregate(source).iterator():
+            values = tuple(row[f] for f in fields)
+            if _bucket(row) in expected:
+                minutes, sessions, total, low, high = expected[_bucket(row)]
+                values = (minutes + values[0], sessions + values[1], total + values[2],
+                          min(low, values[3]), max(high, values[4]))
+            expected[_bucket(row)] = values
+    actual = {}
+    for row in rollups.values('user_id', 'language_id', 'topic_id', 'day', *fields).iterator():
+        row['date'] = row.pop('day')
+        actual[_bucket(row)] = tuple(row[f] for f in fields)
+    return [
+        (bucket, expected.get(bucket), actual.get(bucket))
+        for bucket in sorted(expected.keys() | actual.keys(), key=str)
+        if expected.get(bucket) != actual.get(bucket)
+    ]
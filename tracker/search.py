@@ -0,0 +1,204 @@
+"""Full-text search over a user's notes.
+
+Every progress entry, topic, milestone and resource has one SearchDocument
+row holding its searchable text. Queries run against SQLite's FTS5 index or
+PostgreSQL's tsvector GIN index (both created in migration 0005, the FTS5
+one rebuilt with a user column in 0013) and fall back to ``icontains`` on
+other backends.
+"""
+import re
+from dataclasses import dataclass
+
+from django.db import connection, transaction
+from django.db.models import Q
+from django.utils.html import escape
+from django.utils.safestring import mark_safe
+
+from . import archive
+from .models import Topic, DailyProgress, Resource, Milestone, SearchDocument
+
+# Kind -> (model, function returning the (title, body) to index).
+SOURCES = {
+    'progress': (DailyProgress, lambda obj: ('', obj.what_i_learned)),
+    'topic': (Topic, lambda obj: (obj.name, obj.description)),
+    'milestone': (Milestone, lambda obj: (obj.title, obj.details)),
+    'resource': (Resource, lambda obj: (obj.title, '')),
+}
+KIND_FOR_MODEL = {model: kind for kind, (model, _) in SOURCES.items()}
+# Related objects to join when loading hits for display.
+DISPLAY_RELATED = {
+    'progress': ('language', 'topic'),
+    'topic': ('language',),
+    'milestone': ('language',),
+    'resource': ('language',),
+}
+# Highlight markers; escaped text cannot contain them, so they are safe to
+# swap for <mark> tags afterwards.
+MARK_START, MARK_END = '\x02', '\x03'
+SNIPPET_WORDS = 24
+INDEX_BATCH_SIZE = 1000
+
+
+@dataclass
+class SearchHit:
+    kind: str
+    object: object
+    title: str
+    snippet: str
+
+
+@dataclass
+class SearchPage:
+    hits: list
+    number: int
+    has_next: bool
+
+    @property
+    def has_previous(self):
+        return self.number > 1
+
+
+def _document(kind, obj):
+    title, body = SOURCES[kind][1](obj)
+    return SearchDocument(user_id=obj.user_id, kind=kind, object_id=obj.id,
+                          title=(title or '')[:200], body=body or '')
+
+
+def index(instance, created=False):
+    """Create or refresh the search document of a saved model instance."""
+    kind = KIND_FOR_MODEL[type(instance)]
+    if instance.user_id is None:
+        return
+    document = _document(kind, instance)
+    if not created:
+        updated = SearchDocument.objects.filter(kind=kind, object_id=instance.pk).update(
+            user_id=document.user_id, title=document.title, body=document.body)
+        if updated:
+            return
+    document.save(force_insert=True)
+
+
+def unindex(kind, object_ids):
+    SearchDocument.objects.filter(kind=kind, object_id__in=object_ids).delete()
+
+
+def index_many(kind, objects):
+    """Add documents for newly created objects (anything with the model's attributes)."""
+    SearchDocument.objects.bulk_create(
+        [_document(kind, obj) for obj in objects if obj.user_id is not None], batch_size=INDEX_BATCH_SIZE)
+
+
+def rebuild(user_id=None):
+    """Recreate every search document, for one user or for everyone."""
+    with transaction.atomic():
+        documents = SearchDocument.objects.all()
+        if user_id is not None:
+            documents = documents.filter(user_id=user_id)
+        documents.delete()
+        for kind, (source, _) in SOURCES.items():
+            for model in archive.sources(source):
+                objects = model.objects.filter(user__isnull=False)
+                if user_id is not None:
+                    objects = objects.filter(user_id=user_id)
+                batch = []
+                for obj in objects.iterator(chunk_size=INDEX_BATCH_SIZE):
+                    batch.append(obj)
+                    if len(batch) >= INDEX_BATCH_SIZE:
+                        index_many(kind, batch)
+                        batch = []
+                index_many(kind, batch)
+
+
+def _terms(query):
+    return re.findall(r'\w+', query.lower())[:16]
+
+
+def _highlight(text):
+    return mark_safe(escape(text).replace(MARK_START, '<mark>').replace(MARK_END, '</mark>'))
+
+
+def _sqlite_search(user_id, terms, limit, offset):
+    # Quote every term so user input cannot inject FTS5 query syntax; the last
+    # one is a prefix match so results appear while a word is being typed. The
+    # index's user_id column (migration 0013) keeps the match to the user's own
+    # documents, so other users' hits are never read; it weighs 0 in the rank.
+    match = f'user_id : "{int(user_id)}" AND {{title body}} : (' + ' '.join(f'"{term}"' for term in terms) + '*)'
+    sql = f"""
+        SELECT d.kind, d.object_id,
+               highlight(tracker_searchdocument_fts, 0, %s, %s),
+               snippet(tracker_searchdocument_fts, 1, %s, %s, '…', {SNIPPET_WORDS})
+        FROM tracker_searchdocument_fts
+        JOIN tracker_searchdocument d ON d.id = tracker_searchdocument_fts.rowid
+        WHERE tracker_searchdocument_fts MATCH %s
+        ORDER BY bm25(tracker_searchdocument_fts, 1.0, 1.0, 0.0)
+        LIMIT %s OFFSET %s
+    """
+    params = [MARK_START, MARK_END, MARK_START, MARK_END, match, limit, offset]
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        return cursor.fetchall()
+
+
+def _postgresql_search(user_id, terms, limit, offset):
+    tsquery = ' & '.join(terms) + ':*'
+    options = f'StartSel={MARK_START}, StopSel={MARK_END}'
+    sql = """
+        SELECT kind, object_id,
+               ts_headline('english', title, query, %s),
+               ts_headline('english', body, query, %s)
+        FROM tracker_searchdocument, to_tsquery('english', %s) query
+        WHERE user_id = %s AND to_tsvector('english'::regconfig, title || ' ' || body) @@ query
+        ORDER BY ts_rank(to_tsvector('english'::regconfig, title || ' ' || body), query) DESC
+        LIMIT %s OFFSET %s
+    """
+    params = [f'{options}, HighlightAll=true', f'{options}, MaxWords={SNIPPET_WORDS}, MinWords=10',
+              tsquery, user_id, limit, offset]
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        return cursor.fetchall()
+
+
+def _fallback_search(user_id, terms, limit, offset):
+    condition = Q()
+    for term in terms:
+        condition &= Q(title__icontains=term) | Q(body__icontains=term)
+    documents = SearchDocument.objects.filter(condition, user_id=user_id).order_by('-pk')[offset:offset + limit]
+    return [(doc.kind, doc.object_id, doc.title, doc.body[:200]) for doc in documents]
+
+
+BACKENDS = {
+    'sqlite': _sqlite_search,
+    'postgresql': _postgresql_search,
+}
+
+
+def search(user, query, page=1, per_page=20):
+    """Ranked, highlighted results for ``query`` among ``user``'s documents."""
+    terms = _terms(query)
+    if not terms:
+        return SearchPage([], page, False)
+    backend = BACKENDS.get(connection.vendor, _fallback_search)
+    rows = backend(user.pk, terms, per_page + 1, (page - 1) * per_page)
+    has_next = len(rows) > per_page
+    rows = rows[:per_page]
+
+    # Load the matching objects for display with one query per kind, and one
+    # more for the archived progress entries among them.
+    ids_by_kind = {}
+    for kind, object_id, _, _ in rows:
+        ids_by_kind.setdefault(kind, []).append(object_id)
+    objects = {}
+    for kind, ids in ids_by_kind.items():
+        for model in archive.sources(SOURCES[kind][0]):
+            missing = [object_id for object_id in ids if (kind, object_id) not in objects]
+            if not missing:
+                break
+            for obj in model.objects.filter(user=user, pk__in=missing).select_related(*DISPLAY_RELATED[kind]):
+                objects[kind, obj.pk] = obj
+
+    hits = [
+        SearchHit(kind, objects[kind, object_id], _highlight(title), _highlight(snippet))
+        for kind, object_id, title, snippet in rows
+        if (kind, object_id) in objects
+    ]
+    return SearchPage(hits, page, has_next)
@@ -0,0 +1,127 @@
+"""Synthetic study histories for load testing and benchmarks.
+
+Data is generated from a seeded random generator, so the same options always
+produce the same rows, and written with ``bulk_create``. The rollup table and
+search index are rebuilt and the review schedules replayed afterwards, as
+bulk writes skip the signals that normally maintain them.
+"""
+import datetime
+import random
+from dataclasses import dataclass
+
+from django.contrib.auth.models import User
+from django.db import transaction
+
+from . import caching, reviews, rollups, search
+from .models import Language, Topic, DailyProgress, Resource, Milestone, Goal
+
+BATCH_SIZE = 2000
+PASSWORD = 'load-test-pass'
+
+LANGUAGE_NAMES = [
+    'Python', 'JavaScript', 'TypeScript', 'Rust', 'Go', 'Java', 'Kotlin', 'Swift', 'C', 'C++', 'C#',
+    'Ruby', 'Elixir', 'Haskell', 'Scala', 'Clojure', 'SQL', 'Bash', 'Lua', 'Zig', 'OCaml', 'Dart',
+]
+TOPIC_NAMES = [
+    'Syntax', 'Data types', 'Control flow', 'Functions', 'Closures', 'Modules', 'Error handling', 'Testing',
+    'Generics', 'Concurrency', 'Async I/O', 'Memory model', 'Iterators', 'Macros', 'Packaging', 'Debugging',
+    'Standard library', 'Performance', 'Pattern matching', 'Type system', 'Networking', 'Databases',
+]
+VERBS = ['Read about', 'Practised', 'Built a small demo of', 'Debugged', 'Reviewed notes on', 'Refactored code using']
+DETAILS = [
+    'and wrote down the edge cases.', 'with exercises from the book.', 'until the tests passed.',
+    'and compared it with what I already know.', 'then explained it back to myself.', 'from the official docs.',
+]
+
+
+@dataclass(frozen=True)
+class SeedOptions:
+    """How much history each generated user gets."""
+    languages: int = 5
+    topics_per_language: int = 10
+    years: float = 1
+    study_days: float = 0.6  # Fraction of days with at least one session.
+    resources: int = 30
+    milestones: int = 20
+    goals: int = 15
+
+
+def _language_name(i):
+    if i < len(LANGUAGE_NAMES):
+        return LANGUAGE_NAMES[i]
+    return f"{LANGUAGE_NAMES[i % len(LANGUAGE_NAMES)]} {i // len(LANGUAGE_NAMES) + 1}"
+
+
+def _topic_name(i):
+    if i < len(TOPIC_NAMES):
+        return TOPIC_NAMES[i]
+    return f"{TOPIC_NAMES[i % len(TOPIC_NAMES)]} {i // len(TOPIC_NAMES) + 1}"
+
+
+def _progress(rng, user, languages, topics_by_language, options, today):
+    """Yield the user's sessions: most days studied, one to three sessions, a few favourite languages."""
+    weights = [1 / (rank + 1) for rank in range(len(languages))]
+    for offset in range(int(options.years * 365), -1, -1):
+        if rng.random() >= options.study_days:
+            continue
+        day = today - datetime.timedelta(days=offset)
+        for _ in range(rng.choice((1, 1, 1, 2, 2, 3))):
+            language = rng.choices(languages, weights)[0]
+            topics = topics_by_language[language.pk]
+            topic = rng.choice(topics) if topics and rng.random() < 0.9 else None
+            yield DailyProgress(
+                user=user, language=language, topic=topic, date=day,
+                what_i_learned=f"{rng.choice(VERBS)} {(topic or language).name.lower()} {rng.choice(DETAILS)}",
+                time_spent_minutes=rng.randint(10, 180), confidence_level=rng.randint(1, 5))
+
+
+def _in_batches(objects, model):
+    batch = []
+    for obj in objects:
+        batch.append(obj)
+        if len(batch) >= BATCH_SIZE:
+            model.objects.bulk_create(batch)
+            batch = []
+    model.objects.bulk_create(batch)
+
+
+def seed_user(username, options=SeedOptions(), seed=0):
+    """Create ``username`` with a generated history; returns the user.
+
+    The password is ``PASSWORD``.
+    """
+    rng = random.Random(f'{seed}:{username}')
+    today = datetime.date.today()
+    start = today - datetime.timedelta(days=int(options.years * 365))
+    with transaction.atomic():
+        user = User.objects.create_user(username=username, password=PASSWORD)
+        languages = Language.objects.bulk_create(
+            Language(user=user, name=_language_name(i), difficulty_level=rng.choice(Language.DIFFICULTY_CHOICES)[0],
+                     date_started=start + datetime.timedelta(days=rng.randint(0, 60)))
+            for i in range(options.languages))
+        topics = Topic.objects.bulk_create(
+            Topic(user=user, language=language, name=_topic_name(i), description=f"{_topic_name(i)} in {language.name}")
+            for language in languages for i in range(options.topics_per_language))
+        topics_by_language = {language.pk: [] for language in languages}
+        for topic in topics:
+            topics_by_language[topic.language_id].append(topic)
+        if languages:
+            _in_batches(_progress(rng, user, languages, topics_by_language, options, today), DailyProgress)
+            Resource.objects.bulk_create(
+                Resource(user=user, language=rng.choice(languages), title=f"Resource {i}",
+                         link=f"https://example.com/{username}/{i}",
+                         resource_type=rng.choice(Resource.RESOURCE_TYPES)[0])
+                for i in range(options.resources))
+            Milestone.objects.bulk_create(
+                Milestone(user=user, language=rng.choice(languages), title=f"Milestone {i}",
+                          details="Generated milestone.", is_completed=rng.random() < 0.6)
+                for i in range(options.milestones))
+        Goal.objects.bulk_create(
+            Goal(user=user, title=f"Goal {i}", target_date=today + datetime.timedelta(days=rng.randint(-90, 365)),
+                 is_completed=rng.random() < 0.3)
+            for i in range(options.goals))
+        rollups.rebuild(user.pk)
+        search.rebuild(user.pk)
+        reviews.replay(topic.pk for topic in topics)
+    caching.bump_version(user.pk)
+    return user
@@ -0,0 +1,129 @@
+"""Signal receivers keeping derived data in sync with the tracker models."""
+from django.db.models.signals import post_delete, post_save, pre_delete, pre_save
+from django.dispatch import Signal, receiver
+
+from . import caching, reviews, rollups, search
+from .models import ArchivedProgress, DailyProgress, DailyRollup, Goal, Language, Milestone, Resource, Topic
+
+# Sent after DailyProgress rows are written with bulk_create, which bypasses
+# the per-instance signals. Receives ``user_id`` and the created ``entries``.
+progress_bulk_saved = Signal()
+
+
+@receiver(pre_save, sender=DailyProgress)
+def remember_progress_bucket(sender, instance, raw=False, **kwargs):
+    """Record which user/day and topic an edited entry is leaving before it is saved."""
+    if raw or instance.pk is None or hasattr(instance, '_loaded_bucket'):
+        return
+    loaded = DailyProgress.objects.filter(pk=instance.pk).values_list('user_id', 'date', 'topic_id').first()
+    if loaded:
+        instance._loaded_bucket, instance._loaded_topic_id = loaded[:2], loaded[2]
+    else:
+        instance._loaded_bucket = None
+
+
+@receiver(post_save, sender=DailyProgress)
+def refresh_rollups_on_save(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    days = {instance.date}
+    previous = getattr(instance, '_loaded_bucket', None)
+    if previous:
+        old_user_id, old_date = previous
+        if old_user_id == instance.user_id:
+            days.add(old_date)
+        else:
+            rollups.refresh(old_user_id, [old_date])
+    rollups.refresh(instance.user_id, days)
+    instance._loaded_bucket = (instance.user_id, instance.date)
+
+
+@receiver(progress_bulk_saved)
+def add_bulk_entries_to_rollups(sender, user_id, entries, **kwargs):
+    rollups.add(user_id, entries)
+
+
+@receiver(post_delete, sender=DailyProgress)
+def refresh_rollups_on_delete(sender, instance, **kwargs):
+    rollups.refresh(instance.user_id, [instance.date])
+
+
+@receiver(post_save, sender=DailyProgress)
+def update_review_schedule_on_save(sender, instance, created=False, raw=False, **kwargs):
+    if raw:
+        return
+    if created:
+        reviews.record(instance)
+    else:
+        # An edit can change the grade, date or topic of an earlier review.
+        reviews.replay({instance.topic_id, getattr(instance, '_loaded_topic_id', None)})
+    instance._loaded_topic_id = instance.topic_id
+
+
+@receiver(progress_bulk_saved)
+def add_bulk_entries_to_review_schedule(sender, user_id, entries, **kwargs):
+    reviews.record_many(entries)
+
+
+@receiver(post_delete, sender=DailyProgress)
+def update_review_schedule_on_delete(sender, instance, **kwargs):
+    reviews.replay([instance.topic_id])
+
+
+@receiver(pre_delete, sender=Topic)
+def remember_topic_days(sender, instance, **kwargs):
+    """Deleting a topic moves its sessions to the topic-less bucket of each day."""
+    instance._rollup_days = list(
+        DailyRollup.objects.filter(topic=instance).values_list('user_id', 'day').distinct()
+    )
+
+
+@receiver(post_delete, sender=Topic)
+def refresh_rollups_for_topic(sender, instance, **kwargs):
+    days_by_user = {}
+    for user_id, day in getattr(instance, '_rollup_days', ()):
+        days_by_user.setdefault(user_id, []).append(day)
+    for user_id, days in days_by_user.items():
+        rollups.refresh(user_id, days)
+
+
+def index_for_search(sender, instance, created=False, raw=False, **kwargs):
+    if not raw:
+        search.index(instance, created)
+
+
+def unindex_for_search(sender, instance, **kwargs):
+    search.unindex(search.KIND_FOR_MODEL[sender], [instance.pk])
+
+
+for model in search.KIND_FOR_MODEL:
+    post_save.connect(index_for_search, sender=model, dispatch_uid=f'search-index-{model.__name__}')
+    post_delete.connect(unindex_for_search, sender=model, dispatch_uid=f'search-unindex-{model.__name__}')
+
+
+@receiver(pre_delete, sender=Language)
+def unindex_archived_progress(sender, instance, **kwargs):
+    """Archived sessions keep their documents but have no delete signals, so the cascade
+    can remove them in one statement; their documents go with the language instead."""
+    search.unindex('progress', ArchivedProgress.objects.filter(language=instance).values('pk'))
+
+
+@receiver(progress_bulk_saved)
+def index_bulk_entries_for_search(sender, user_id, entries, **kwargs):
+    search.index_many('progress', entries)
+
+
+
+def bump_data_version(sender, instance, raw=False, **kwargs):
+    if not raw:
+        caching.bump_version(instance.user_id)
+
+
+for model in (Language, Topic, DailyProgress, Resource, Milestone, Goal):
+    post_save.connect(bump_data_version, sender=model, dispatch_uid=f'data-version-save-{model.__name__}')
+    post_delete.connect(bump_data_version, sender=model, dispatch_uid=f'data-version-delete-{model.__name__}')
+
+
+@receiver(progress_bulk_saved)
+def bump_data_version_for_bulk_entries(sender, user_id, entries, **kwargs):
+    caching.bump_version(user_id)
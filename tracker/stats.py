@@ -0,0 +1,166 @@
+"""Aggregated statistics used by the dashboard and the language pages.
+
+Everything here is computed with a fixed number of grouped queries over the
+DailyRollup table, so the cost of a page load grows with the number of
+days studied rather than with the number of sessions or languages logged.
+"""
+from dataclasses import dataclass
+
+from django.db.models import Count, FloatField, Max, OuterRef, Q, Subquery, Sum
+from django.db.models.functions import Cast, Coalesce, NullIf
+
+from .db import gather_queries
+from .models import Language, Topic, DailyRollup, Resource, Milestone, Goal
+
+
+@dataclass(frozen=True)
+class LanguageTotal:
+    """Total study time logged against a single language."""
+    language_id: int
+    name: str
+    minutes: int
+
+
+@dataclass(frozen=True)
+class TopicTime:
+    """Study time logged against one topic of a language; ``topic_id`` is None for sessions without one."""
+    topic_id: int
+    name: str
+    minutes: int
+    sessions: int
+    share: float  # Percent of the language's minutes.
+
+
+@dataclass(frozen=True)
+class DashboardStats:
+    """Everything the dashboard needs, ready for a template or JSON encoder."""
+    total_languages: int
+    total_progress_entries: int
+    language_totals: list
+    upcoming_goals: list
+    recent_milestones: list
+
+    @property
+    def chart_labels(self):
+        return [total.name for total in self.language_totals]
+
+    @property
+    def chart_data(self):
+        return [total.minutes for total in self.language_totals]
+
+
+def language_minutes(user):
+    """Subquery expression summing a language's rollup minutes for ``user``."""
+    minutes = (
+        DailyRollup.objects.filter(user=user, language=OuterRef('pk'))
+        .values('language').annotate(total=Sum('total_minutes')).values('total')
+    )
+    return Coalesce(Subquery(minutes), 0)
+
+
+def language_totals(user):
+    """Per-language minutes for ``user`` in a single query."""
+    rows = (
+        Language.objects.filter(user=user)
+        .annotate(minutes=language_minutes(user))
+        .order_by('pk')
+        .values_list('pk', 'name', 'minutes')
+    )
+    return [LanguageTotal(pk, name, minutes) for pk, name, minutes in rows]
+
+
+def with_language_stats(languages, user):
+    """Annotate ``languages`` with their rollup totals, grouped in the same query.
+
+    Adds ``total_minutes``, ``session_count``, ``last_studied`` (None if never
+    studied) and ``average_confidence`` (None without sessions).
+    """
+    mine = Q(rollups__user=user)
+    sessions = Sum('rollups__session_count', filter=mine)
+    return languages.annotate(
+        total_minutes=Coalesce(Sum('rollups__total_minutes', filter=mine), 0),
+        session_count=Coalesce(sessions, 0),
+        last_studied=Max('rollups__day', filter=mine),
+        average_confidence=Cast(Sum('rollups__confidence_sum', filter=mine), FloatField()) / NullIf(sessions, 0),
+    )
+
+
+def _related_count(model):
+    rows = (
+        model.objects.filter(language=OuterRef('pk'))
+        .order_by().values('language').annotate(count=Count('pk')).values('count')
+    )
+    return Coalesce(Subquery(rows), 0)
+
+
+def with_section_counts(languages, user):
+    """Annotate ``languages`` with their topic, resource and milestone counts and rollup minutes.
+
+    Each is a subquery over an index on the language, so no related row is loaded
+    and the three tables are not joined into each other.
+    """
+    return languages.annotate(
+        topic_count=_related_count(Topic),
+        resource_count=_related_count(Resource),
+        milestone_count=_related_count(Milestone),
+        total_minutes=language_minutes(user),
+    )
+
+
+def topic_minutes(language, limit=10):
+    """The grouped rollup query behind ``topic_breakdown``."""
+    return (
+        DailyRollup.objects.filter(user_id=language.user_id, language=language)
+        .values('topic', 'topic__name')
+        .annotate(minutes=Sum('total_minutes'), sessions=Sum('session_count'))
+        .order_by('-minutes', 'topic')[:limit]
+    )
+
+
+def topic_breakdown(language, total_minutes, limit=10):
+    """The ``limit`` topics of ``language`` with the most study time, in one grouped query."""
+    return [
+        TopicTime(row['topic'], row['topic__name'] or "No topic", row['minutes'], row['sessions'],
+                  100 * row['minutes'] / total_minutes if total_minutes else 0)
+        for row in topic_minutes(language, limit)
+    ]
+
+
+def session_total(user):
+    return DailyRollup.objects.filter(user=user).aggregate(sessions=Coalesce(Sum('session_count'), 0))['sessions']
+
+
+def upcoming_goals(user, limit=5):
+    return list(Goal.objects.filter(user=user, is_completed=False).order_by('target_date')[:limit])
+
+
+def recent_milestones(user, limit=5):
+    return list(
+        Milestone.objects.filter(user=user, is_completed=True)
+        .select_related('language').order_by('-date_created')[:limit])
+
+
+def _build(totals, sessions, goals, milestones):
+    return DashboardStats(
+        total_languages=len(totals),
+        total_progress_entries=sessions,
+        language_totals=totals,
+        upcoming_goals=goals,
+        recent_milestones=milestones,
+    )
+
+
+def dashboard_stats(user, limit=5):
+    """Build the dashboard statistics for ``user`` in four queries."""
+    return _build(language_totals(user), session_total(user), upcoming_goals(user, limit),
+                  recent_milestones(user, limit))
+
+
+async def adashboard_stats(user, limit=5):
+    """Like ``dashboard_stats``, with the four independent queries run concurrently."""
+    return _build(*await gather_queries(
+        lambda: language_totals(user),
+        lambda: session_total(user),
+        lambda: upcoming_goals(user, limit),
+        lambda: recent_milestones(user, limit),
+    ))
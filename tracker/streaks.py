@@ -0,0 +1,127 @@
+"""Study streaks and the calendar heatmap.
+
+A user's per-day minutes are read from the DailyRollup table in one grouped
+query and laid out as one dense ``array`` per calendar year, indexed by day of
+the year. Streaks come from splitting the concatenated studied/not-studied
+bytes on the gaps, and weekly totals and intensity levels from slices of the
+arrays, so ten years of history take a few milliseconds.
+"""
+import datetime
+import statistics
+from array import array
+from bisect import bisect_right
+from dataclasses import dataclass
+from itertools import chain
+
+from django.db.models import Sum
+from django.utils import timezone
+
+from .models import DailyRollup
+
+LEVELS = 4
+
+
+@dataclass(frozen=True)
+class YearHeatmap:
+    """One calendar year as Monday-first week columns of (date, minutes, level) cells.
+
+    Cells before 1 January and after 31 December are None; days after today
+    have a level of None.
+    """
+    year: int
+    weeks: list
+    weekly_totals: list
+    total_minutes: int
+    study_days: int
+
+    @property
+    def columns(self):
+        """(week cells, week total) pairs, for templates."""
+        return list(zip(self.weeks, self.weekly_totals))
+
+
+@dataclass(frozen=True)
+class StudyCalendar:
+    current_streak: int
+    longest_streak: int
+    years: list  # YearHeatmap of the most recent years, newest first.
+
+    @property
+    def latest(self):
+        return self.years[0] if self.years else None
+
+
+def year_arrays(user, today):
+    """{year: array of minutes per day of the year} from the first studied year to this one."""
+    rows = (DailyRollup.objects.filter(user=user).values('day')
+            .annotate(minutes=Sum('total_minutes')).order_by().values_list('day', 'minutes'))
+    arrays = {}
+    for day, minutes in rows:
+        if day.year not in arrays:
+            arrays[day.year] = array('L', bytes(array('L').itemsize * _days_in_year(day.year)))
+        arrays[day.year][day.timetuple().tm_yday - 1] = minutes
+    if arrays:
+        for year in range(min(arrays), today.year + 1):
+            arrays.setdefault(year, array('L', bytes(array('L').itemsize * _days_in_year(year))))
+    return dict(sorted(arrays.items()))
+
+
+def _days_in_year(year):
+    return (datetime.date(year + 1, 1, 1) - datetime.date(year, 1, 1)).days
+
+
+def streaks(arrays, today):
+    """(current, longest) run of consecutive studied days up to ``today``.
+
+    The current streak is still alive when today has no session yet but
+    yesterday did.
+    """
+    studied = bytes(map(bool, chain.from_iterable(
+        minutes if year < today.year else minutes[:today.timetuple().tm_yday]
+        for year, minutes in arrays.items() if year <= today.year)))
+    longest = max(map(len, studied.split(b'\x00')), default=0)
+    if studied.endswith(b'\x00'):
+        studied = studied[:-1]
+    current = len(studied) - len(studied.rstrip(b'\x01'))
+    return current, longest
+
+
+def _thresholds(minutes):
+    """Cut points between the intensity levels: quartiles of the studied days."""
+    studied = sorted(value for value in minutes if value)
+    if len(studied) < 2:
+        return []
+    return statistics.quantiles(studied, n=LEVELS, method='inclusive')
+
+
+def year_heatmap(year, minutes, today):
+    first = datetime.date(year, 1, 1)
+    cuts = _thresholds(minutes)
+    levels = [min(bisect_right(cuts, value) + 1, LEVELS) if value else 0 for value in minutes]
+    last_index = (today - first).days
+    cells = [None] * first.weekday() + [
+        (first + datetime.timedelta(days=i), value, levels[i] if i <= last_index else None)
+        for i, value in enumerate(minutes)
+    ]
+    cells += [None] * (-len(cells) % 7)
+    padded = [0] * first.weekday() + list(minutes) + [0] * (-(first.weekday() + len(minutes)) % 7)
+    return YearHeatmap(
+        year=year,
+        weeks=[cells[i:i + 7] for i in range(0, len(cells), 7)],
+        weekly_totals=[sum(padded[i:i + 7]) for i in range(0, len(padded), 7)],
+        total_minutes=sum(minutes),
+        study_days=len(minutes) - minutes.tolist().count(0),
+    )
+
+
+def study_calendar(user, today=None, heatmap_years=1):
+    """Streaks over ``user``'s whole history and heatmaps of its last ``heatmap_years`` years."""
+    today = today or timezone.localdate()
+    arrays = year_arrays(user, today)
+    current, longest = streaks(arrays, today)
+    recent = [year for year in arrays if year <= today.year][-heatmap_years:]
+    return StudyCalendar(
+        current_streak=current,
+        longest_streak=longest,
+        years=[year_heatmap(year, arrays[year], today) for year in reversed(recent)],
+    )
@@ -0,0 +1,46 @@
+"""Background tasks, run by the job queue in tracker/jobs.py."""
+import dataclasses
+
+from django.contrib.auth.models import User
+
+from . import deletion, importers, rollups, search, uploads
+from .jobs import report, task
+from .models import Language
+
+
+@task(max_attempts=1)  # Chunks are committed as they go, so a retry would import them twice.
+def import_progress(job, format):
+    """Import the file stored for ``job`` by ``uploads.save``, then delete it."""
+    try:
+        with uploads.open(job) as fileobj:
+            def on_chunk(result):
+                reader = fileobj.raw
+                report(job, 100 * reader.tell() / reader.size if reader.size else 0,
+                       f"Imported {result.imported} session(s) so far.")
+            result = importers.import_progress(User.objects.get(pk=job.user_id), fileobj, format,
+                                               on_chunk=on_chunk)
+    finally:
+        uploads.delete(job)
+    return dataclasses.asdict(result)
+
+
+@task()
+def delete_language(job, language_id):
+    """Delete a language with a large history; see tracker/deletion.py."""
+    language = Language.objects.filter(pk=language_id).first()
+    if language is None:
+        return {}  # Finished by an earlier attempt.
+    def on_progress(done, total):
+        report(job, 100 * done / total, f"Deleted {done:,} of {total:,} rows.")
+    return deletion.delete_language(language, on_progress=on_progress)
+
+
+@task()
+def rebuild_rollups(job, user_id=None):
+    return {'rows': rollups.rebuild(user_id)}
+
+
+@task()
+def rebuild_search_index(job, user_id=None):
+    search.rebuild(user_id)
+    return {}
@@ -0,0 +1,40 @@
+"""Template tags for the per-user versioned fragment cache (see tracker/caching.py)."""
+from django import template
+
+from .. import caching
+
+register = template.Library()
+
+
+class CachedFragmentNode(template.Node):
+    def __init__(self, nodelist, name, vary_on):
+        self.nodelist = nodelist
+        self.name = name
+        self.vary_on = vary_on
+
+    def render(self, context):
+        user = context.get('user')
+        if user is None or not user.is_authenticated:
+            return self.nodelist.render(context)
+        name = self.name.resolve(context)
+        vary_on = [var.resolve(context) for var in self.vary_on]
+        value = caching.get_fragment(user.pk, name, vary_on)
+        if value is None:
+            value = self.nodelist.render(context)
+            caching.set_fragment(user.pk, name, value, vary_on)
+        return value
+
+
+@register.tag
+def cachedfragment(parser, token):
+    """Cache the enclosed template for the current user until their data changes.
+
+    Usage: ``{% cachedfragment "name" [vary_on ...] %} ... {% endcachedfragment %}``
+    """
+    bits = token.split_contents()
+    if len(bits) < 2:
+        raise template.TemplateSyntaxError(f"'{bits[0]}' tag requires a fragment name.")
+    nodelist = parser.parse(('endcachedfragment',))
+    parser.delete_first_token()
+    return CachedFragmentNode(nodelist, parser.compile_filter(bits[1]),
+                              [parser.compile_filter(bit) for bit in bits[2:]])
@@ -0,0 +1,65 @@
+"""Handing uploaded files to background jobs.
+
+The web process and the ``run_jobs`` worker may run on different machines
+(separate services on Render, say), so an upload waiting for a job is not
+saved under MEDIA_ROOT but in the database both of them already share, as
+``CHUNK_SIZE`` pieces in ``UploadChunk`` rows. ``save`` should run in the
+same transaction as the ``enqueue`` that creates the job, so no worker can
+claim the job before its file is complete. ``open`` reads it back one chunk
+at a time, and the chunks go with the job when it is deleted, or earlier
+through ``delete``.
+"""
+import io
+
+from django.db.models import Sum
+from django.db.models.functions import Length
+
+from .models import UploadChunk
+
+CHUNK_SIZE = 1024 * 1024
+
+
+def save(job, upload):
+    """Store a Django ``UploadedFile`` for ``job``, one row per chunk."""
+    # Not upload.chunks(): files kept in memory come back from it in one piece.
+    upload.seek(0)
+    for index, data in enumerate(iter(lambda: upload.read(CHUNK_SIZE), b'')):
+        UploadChunk.objects.create(job=job, index=index, data=data)
+
+
+def delete(job):
+    UploadChunk.objects.filter(job=job).delete()
+
+
+class UploadReader(io.RawIOBase):
+    """The file stored for a job, read sequentially without loading more than one chunk."""
+
+    def __init__(self, job):
+        self.chunks = UploadChunk.objects.filter(job=job).order_by('index')
+        self.size = self.chunks.aggregate(size=Sum(Length('data')))['size'] or 0
+        self.position = 0
+        self._index = 0
+        self._pending = memoryview(b'')
+
+    def readable(self):
+        return True
+
+    def tell(self):
+        return self.position
+
+    def readinto(self, buffer):
+        if not self._pending:
+            chunk = self.chunks.filter(index=self._index).values_list('data', flat=True).first()
+            if chunk is None:
+                return 0
+            self._pending, self._index = memoryview(chunk), self._index + 1
+        count = min(len(buffer), len(self._pending))
+        buffer[:count] = self._pending[:count]
+        self._pending = self._pending[count:]  # A view, so the chunk is not copied per read.
+        self.position += count
+        return count
+
+
+def open(job):
+    """A buffered binary file over the upload stored for ``job``; ``.raw`` is its UploadReader."""
+    return io.BufferedReader(UploadReader(job))
@@ -1,5 +1,5 @@
 from django.urls import path
-from . import views
+from . import api, views
 
 urlpatterns = [
     path('', views.landing, name='landing'),
@@ -23,9 +23,25 @@ urlpatterns = [
     # Progress
     path('progress/', views.progress_list, name='progress_list'),
     path('progress/create/', views.progress_create, name='progress_create'),
+    path('progress/import/', views.progress_import, name='progress_import'),
     path('progress/<int:pk>/update/', views.progress_update, name='progress_update'),
     path('progress/<int:pk>/delete/', views.progress_delete, name='progress_delete'),
 
+    # Search
+    path('search/', views.search, name='search'),
+    path('autocomplete/<slug:kind>/', views.autocomplete, name='autocomplete'),
+
+    # Background jobs
+    path('jobs/<int:pk>/', views.job_detail, name='job_detail'),
+    path('jobs/<int:pk>/status/', views.job_status, name='job_status'),
+
+    # Trend charts
+    path('charts/<slug:metric>/', views.chart_data, name='chart_data'),
+
+    # Export
+    path('export/', views.export_index, name='export_index'),
+    path('export/<slug:dataset>.<slug:fmt>', views.export_data, name='export_data'),
+
     # Goal URLs
     path('goals/', views.goal_list, name='goal_list'),
     path('goals/create/', views.goal_create, name='goal_create'),
@@ -43,4 +59,9 @@ urlpatterns = [
     path('resources/create/', views.resource_create, name='resource_create'),
     path('resources/<int:pk>/update/', views.resource_update, name='resource_update'),
     path('resources/<int:pk>/delete/', views.resource_delete, name='resource_delete'),
+
+    # Read-only JSON API
+    path('api/v1/', api.index, name='api_index'),
+    path('api/v1/stats/', api.stats, name='api_stats'),
+    path('api/v1/<slug:resource>/', api.resource_list, name='api_list'),
 ]
@@ -1,10 +1,28 @@
-from django.shortcuts import render, get_object_or_404, redirect
-from .models import Language, Topic, DailyProgress, Resource, Milestone, Goal
-from .forms import LanguageForm, TopicForm, DailyProgressForm, ResourceForm, MilestoneForm, GoalForm, CustomUserCreationForm
-from django.db.models import Sum, Count
+import zoneinfo
+
+from django.http import Http404, JsonResponse, StreamingHttpResponse
+from asgiref.sync import sync_to_async
+from django.shortcuts import aget_object_or_404, render, get_object_or_404, redirect
+from django.conf import settings
+from django.db import transaction
+from .models import Language, Topic, DailyProgress, Resource, Milestone, Goal, Job
+from .forms import LanguageForm, TopicForm, DailyProgressForm, ResourceForm, MilestoneForm, GoalForm, CustomUserCreationForm, ProgressImportForm
+from . import archive, caching, charts, choices, jobs, reviews, uploads
+from .db import gather_queries, retry_on_lock
+from .deletion import delete_language
+from .exporters import DATASETS, FORMATS, aiter_export, iter_export
+from .importers import detect_format, import_progress
+from .pagination import lazy_paginate, paginate
+from .replicas import read_from_replica
+from .search import search as search_notes
+from .stats import adashboard_stats, dashboard_stats, topic_breakdown, with_language_stats, with_section_counts
+from .streaks import study_calendar
 from django.contrib.auth import login
+from django.core.handlers.asgi import ASGIRequest
 from django.contrib.auth.decorators import login_required
-import json
+from django.views.decorators.cache import never_cache
+from django.utils.functional import SimpleLazyObject
+from django.utils import timezone
 
 
 # Public pages
@@ -32,111 +50,142 @@ def signup(request):
     return render(request, 'registration/signup.html', {'form': form})
 
 
+async def get_user(request):
+    """The user loaded by ``login_required``, shared with the sync ``request.user``."""
+    request.user = await request.auser()
+    return request.user
+
+
 # Dashboard
+DASHBOARD_FRAGMENTS = ('dashboard-summary', 'dashboard-goals', 'dashboard-milestones')
+
+
 @login_required
-def dashboard(request):
+@read_from_replica
+async def dashboard(request):
     """Main dashboard showing user's learning progress and statistics."""
-    languages = Language.objects.filter(user=request.user)
-    total_languages = languages.count()
-    total_progress_entries = DailyProgress.objects.filter(user=request.user).count()
-    upcoming_goals = Goal.objects.filter(user=request.user, is_completed=False).order_by('target_date')[:5]
-    recent_milestones = Milestone.objects.filter(user=request.user, is_completed=True).order_by('-date_created')[:5]
-
-    # Chart data
-    progress_data = []
-    labels = []
-    for lang in languages:
-        total_time = DailyProgress.objects.filter(user=request.user, language=lang).aggregate(Sum('time_spent_minutes'))['time_spent_minutes__sum'] or 0
-        progress_data.append(total_time)
-        labels.append(lang.name)
-
+    user = await get_user(request)
+    if await sync_to_async(caching.fragments_cached)(user.pk, DASHBOARD_FRAGMENTS):
+        # Only computed if a fragment is evicted before the template reads it.
+        stats = SimpleLazyObject(lambda: dashboard_stats(user))
+    else:
+        stats = await adashboard_stats(user)
+    today = timezone.localdate()
+    # Streaks end today, so the calendar is cached per day as well as per data version.
+    calendar = SimpleLazyObject(
+        lambda: caching.cached_value(user.pk, 'calendar', lambda: study_calendar(user, today), [today]))
     context = {
-        'total_languages': total_languages,
-        'total_progress_entries': total_progress_entries,
-        'upcoming_goals': upcoming_goals,
-        'recent_milestones': recent_milestones,
-        'chart_labels': json.dumps(labels),
-        'chart_data': json.dumps(progress_data),
+        'stats': stats,
+        'calendar': calendar,
+        'due_topics': SimpleLazyObject(lambda: reviews.due(user, today)),
+        'today': today,
     }
-    return render(request, 'dashboard.html', context)
+    return await sync_to_async(render)(request, 'dashboard.html', context)
 
 
 # Language management
 @login_required
+@read_from_replica
 def language_list(request):
-    languages = Language.objects.filter(user=request.user)
+    languages = with_language_stats(Language.objects.filter(user=request.user), request.user)
     return render(request, 'tracker/languages_list.html', {'languages': languages})
 
 @login_required
-def language_detail(request, pk):
-    language = get_object_or_404(Language, pk=pk, user=request.user)
-    return render(request, 'tracker/languages_detail.html', {'language': language})
+@read_from_replica
+async def language_detail(request, pk):
+    user = await get_user(request)
+    language = await aget_object_or_404(with_section_counts(Language.objects.all(), user), pk=pk, user=user)
+    # Each section pages on its own cursor parameter.
+    related = {
+        'topics': lambda: paginate(request, language.topics.all(), ('id',), param='topics'),
+        'resources': lambda: paginate(request, language.resources.all(), ('id',), param='resources'),
+        'milestones': lambda: paginate(request, language.milestones.all(), ('id',), param='milestones'),
+        'topic_times': lambda: topic_breakdown(language, language.total_minutes),
+    }
+    if await sync_to_async(caching.fragments_cached)(user.pk, ['language-detail'], [request.get_full_path()]):
+        context = {name: SimpleLazyObject(query) for name, query in related.items()}
+    else:
+        context = dict(zip(related, await gather_queries(*related.values())))
+    context['language'] = language
+    return await sync_to_async(render)(request, 'tracker/languages_detail.html', context)
 
 @login_required
+@retry_on_lock
 def language_create(request):
     if request.method == 'POST':
-        form = LanguageForm(request.POST)
+        form = LanguageForm(request.POST, user=request.user)
         if form.is_valid():
             language = form.save(commit=False)
             language.user = request.user
             language.save()
             return redirect('language_list')
     else:
-        form = LanguageForm()
+        form = LanguageForm(user=request.user)
     return render(request, 'tracker/languages_form.html', {'form': form})
 
 @login_required
+@retry_on_lock
 def language_update(request, pk):
     language = get_object_or_404(Language, pk=pk, user=request.user)
     if request.method == 'POST':
-        form = LanguageForm(request.POST, instance=language)
+        form = LanguageForm(request.POST, user=request.user, instance=language)
         if form.is_valid():
             form.save()
             return redirect('language_list')
     else:
-        form = LanguageForm(instance=language)
+        form = LanguageForm(user=request.user, instance=language)
     return render(request, 'tracker/languages_form.html', {'form': form})
 
 @login_required
 def language_delete(request, pk):
+    # Not @retry_on_lock: delete_language commits (and retries) chunk by chunk, which one
+    # transaction around the view would undo.
     language = get_object_or_404(Language, pk=pk, user=request.user)
     if request.method == 'POST':
-        language.delete()
+        sessions = sum(model.objects.filter(language=language).count() for model in archive.sources(DailyProgress))
+        if sessions > settings.TRACKER_DELETE_BACKGROUND_ROWS:
+            job = jobs.enqueue('delete_language', user=request.user, language_id=language.pk)
+            return redirect('job_detail', pk=job.pk)
+        delete_language(language)
         return redirect('language_list')
     return render(request, 'tracker/languages_confirm_delete.html', {'language': language})
 
 # Topics
 @login_required
+@read_from_replica
 def topic_list(request):
-    topics = Topic.objects.filter(user=request.user)
-    return render(request, 'tracker/topics_list.html', {'topics': topics})
+    page = lazy_paginate(request, Topic.objects.filter(user=request.user).select_related('language'), ('id',))
+    return render(request, 'tracker/topics_list.html', {'topics': page, 'page': page})
 
 @login_required
+@retry_on_lock
 def topic_create(request):
     if request.method == 'POST':
-        form = TopicForm(request.POST)
+        form = TopicForm(request.POST, user=request.user)
         if form.is_valid():
             topic = form.save(commit=False)
             topic.user = request.user
             topic.save()
             return redirect('topic_list')
     else:
-        form = TopicForm()
+        form = TopicForm(user=request.user)
     return render(request, 'tracker/topics_form.html', {'form': form})
 
 @login_required
+@retry_on_lock
 def topic_update(request, pk):
     topic = get_object_or_404(Topic, pk=pk, user=request.user)
     if request.method == 'POST':
-        form = TopicForm(request.POST, instance=topic)
+        form = TopicForm(request.POST, user=request.user, instance=topic)
         if form.is_valid():
             form.save()
             return redirect('topic_list')
     else:
-        form = TopicForm(instance=topic)
+        form = TopicForm(user=request.user, instance=topic)
     return render(request, 'tracker/topics_form.html', {'form': form})
 
 @login_required
+@retry_on_lock
 def topic_delete(request, pk):
     topic = get_object_or_404(Topic, pk=pk, user=request.user)
     if request.method == 'POST':
@@ -146,50 +195,199 @@ def topic_delete(request, pk):
 
 # Daily progress tracking
 @login_required
+@read_from_replica
 def progress_list(request):
-    progress_entries = DailyProgress.objects.filter(user=request.user).order_by('-date')
-    return render(request, 'tracker/progress_list.html', {'progress_entries': progress_entries})
+    entries = [model.objects.filter(user=request.user).select_related('language', 'topic')
+               for model in archive.sources(DailyProgress)]
+    page = lazy_paginate(request, entries, ('-date', '-id'))
+    return render(request, 'tracker/progress_list.html', {'progress_entries': page, 'page': page})
 
 @login_required
+@retry_on_lock
 def progress_create(request):
     if request.method == 'POST':
-        form = DailyProgressForm(request.POST)
+        form = DailyProgressForm(request.POST, user=request.user)
         if form.is_valid():
             progress = form.save(commit=False)
             progress.user = request.user
             progress.save()
             return redirect('progress_list')
     else:
-        form = DailyProgressForm()
+        # "Review now" links on the dashboard preselect the topic.
+        initial = {name: request.GET[name] for name in ('language', 'topic') if request.GET.get(name, '').isdigit()}
+        form = DailyProgressForm(user=request.user, initial=initial)
     return render(request, 'tracker/progress_form.html', {'form': form})
 
+def get_progress_or_404(request, pk, queryset=None):
+    """The user's progress entry ``pk``.
+
+    An archived entry is moved back from the archive on POST, and only read
+    (as an unsaved copy) otherwise, so opening its form changes nothing.
+    """
+    queryset = DailyProgress.objects.all() if queryset is None else queryset
+    progress = queryset.filter(pk=pk, user=request.user).first()
+    if progress is None and request.method != 'POST':
+        progress = archive.peek(request.user, pk)
+    elif progress is None and archive.restore(request.user, pk):
+        progress = queryset.filter(pk=pk, user=request.user).first()
+    if progress is None:
+        raise Http404("No progress entry matches the given query.")
+    return progress
+
 @login_required
+@retry_on_lock
 def progress_update(request, pk):
-    progress = get_object_or_404(DailyProgress, pk=pk, user=request.user)
+    progress = get_progress_or_404(request, pk)
     if request.method == 'POST':
-        form = DailyProgressForm(request.POST, instance=progress)
+        form = DailyProgressForm(request.POST, user=request.user, instance=progress)
         if form.is_valid():
             form.save()
             return redirect('progress_list')
     else:
-        form = DailyProgressForm(instance=progress)
+        form = DailyProgressForm(user=request.user, instance=progress)
     return render(request, 'tracker/progress_form.html', {'form': form})
 
 @login_required
+@retry_on_lock
 def progress_delete(request, pk):
-    progress = get_object_or_404(DailyProgress, pk=pk, user=request.user)
+    progress = get_progress_or_404(request, pk, DailyProgress.objects.select_related('language'))
     if request.method == 'POST':
         progress.delete()
         return redirect('progress_list')
     return render(request, 'tracker/progress_confirm_delete.html', {'progress': progress})
 
+@login_required
+def progress_import(request):
+    """Bulk import study sessions from an uploaded CSV or JSON Lines file."""
+    result = None
+    if request.method == 'POST':
+        form = ProgressImportForm(request.POST, request.FILES)
+        if form.is_valid():
+            upload = form.cleaned_data['file']
+            fmt = form.cleaned_data['format'] or detect_format(upload.name)
+            if upload.size > settings.TRACKER_IMPORT_BACKGROUND_BYTES:
+                with transaction.atomic():
+                    job = jobs.enqueue('import_progress', user=request.user, format=fmt)
+                    uploads.save(job, upload)
+                return redirect('job_detail', pk=job.pk)
+            result = import_progress(request.user, upload.file, fmt)
+    else:
+        form = ProgressImportForm()
+    return render(request, 'tracker/progress_import.html', {'form': form, 'result': result})
+
+@login_required
+def autocomplete(request, kind):
+    """JSON prefix search over the user's languages or topics for the entry forms."""
+    if kind not in ('language', 'topic'):
+        raise Http404("Unknown choice list.")
+    language = request.GET.get('language', '')
+    results = choices.autocomplete(request.user.pk, kind, request.GET.get('q', '').strip(),
+                                   language_id=int(language) if language.isdigit() else None)
+    return JsonResponse({'results': results})
+
+# Background jobs
+@login_required
+def job_detail(request, pk):
+    """A background job's progress, polled through ``job_status`` until it finishes."""
+    job = get_object_or_404(Job, pk=pk, user=request.user)
+    return render(request, 'tracker/job_detail.html', {'job': job})
+
+@login_required
+@never_cache
+def job_status(request, pk):
+    job = get_object_or_404(Job, pk=pk, user=request.user)
+    return JsonResponse({
+        'id': job.pk,
+        'task': job.task,
+        'status': job.status,
+        'finished': job.is_finished,
+        'attempts': job.attempts,
+        'progress': job.progress,
+        'message': job.message,
+        'result': job.result,
+    })
+
+# Trend charts
+def request_timezone(request):
+    """The IANA timezone the browser sent as ``?tz=``, or the site's."""
+    try:
+        return zoneinfo.ZoneInfo(request.GET.get('tz', ''))
+    except (zoneinfo.ZoneInfoNotFoundError, ValueError):
+        return timezone.get_current_timezone()
+
+@login_required
+def chart_data(request, metric):
+    """Bucketed, downsampled trend series for the dashboard charts; see tracker/charts.py."""
+    if metric not in charts.METRICS:
+        raise Http404("Unknown chart.")
+    granularity = request.GET.get('granularity', 'week')
+    range_name = request.GET.get('range', '1y')
+    filters = {name: request.GET.get(name, '') for name in ('language', 'topic')}
+    try:
+        points = int(request.GET.get('points', charts.DEFAULT_POINTS))
+    except ValueError:
+        points = None
+    if (granularity not in charts.GRANULARITIES or range_name not in charts.RANGES or points is None
+            or any(value and not value.isdigit() for value in filters.values())):
+        return JsonResponse({'detail': "Invalid chart parameters."}, status=400)
+    points = max(3, min(points, settings.TRACKER_CHART_MAX_POINTS))
+    language_id, topic_id = (int(value) if value else None for value in filters.values())
+    today = timezone.localdate(timezone=request_timezone(request))
+
+    def compute():
+        start, end = charts.date_range(request.user, range_name, today)
+        series = charts.trend(request.user, metric, start, end, granularity, points, language_id, topic_id)
+        return {
+            'metric': metric,
+            'granularity': granularity,
+            'start': start,
+            'end': end,
+            'series': [{'id': line.id, 'label': line.label, 'points': line.points} for line in series],
+        }
+
+    # "today" is part of the key, so relative ranges move on at midnight in the user's timezone.
+    data = caching.cached_value(request.user.pk, f'chart-{metric}', compute,
+                                [range_name, today, granularity, points, language_id, topic_id])
+    return JsonResponse(data)
+
+# Export
+@login_required
+def export_index(request):
+    """Links to every downloadable dataset."""
+    return render(request, 'tracker/export.html', {'datasets': DATASETS, 'formats': FORMATS})
+
+@login_required
+def export_data(request, dataset, fmt):
+    """Stream one dataset of the user's history as CSV or JSON Lines."""
+    if dataset not in DATASETS or fmt not in FORMATS:
+        raise Http404("Unknown export.")
+    # Each server only streams its own kind of iterator without buffering it first.
+    lines = aiter_export if isinstance(request, ASGIRequest) else iter_export
+    response = StreamingHttpResponse(lines(request.user, dataset, fmt), content_type=FORMATS[fmt])
+    response['Content-Disposition'] = f'attachment; filename="studytracker-{dataset}.{fmt}"'
+    return response
+
+# Search
+@login_required
+def search(request):
+    """Full-text search over the user's notes, topics, milestones and resources."""
+    query = request.GET.get('q', '').strip()
+    try:
+        page_number = max(1, int(request.GET.get('page', 1)))
+    except ValueError:
+        page_number = 1
+    results = search_notes(request.user, query, page_number) if query else None
+    return render(request, 'tracker/search.html', {'query': query, 'results': results})
+
 # Goals
 @login_required
+@read_from_replica
 def goal_list(request):
-    goals = Goal.objects.filter(user=request.user)
-    return render(request, 'tracker/goals_list.html', {'goals': goals})
+    page = lazy_paginate(request, Goal.objects.filter(user=request.user), ('id',))
+    return render(request, 'tracker/goals_list.html', {'goals': page, 'page': page})
 
 @login_required
+@retry_on_lock
 def goal_create(request):
     if request.method == 'POST':
         form = GoalForm(request.POST)
@@ -203,6 +401,7 @@ def goal_create(request):
     return render(request, 'tracker/goals_form.html', {'form': form})
 
 @login_required
+@retry_on_lock
 def goal_update(request, pk):
     goal = get_object_or_404(Goal, pk=pk, user=request.user)
     if request.method == 'POST':
@@ -215,6 +414,7 @@ def goal_update(request, pk):
     return render(request, 'tracker/goals_form.html', {'form': form})
 
 @login_required
+@retry_on_lock
 def goal_delete(request, pk):
     goal = get_object_or_404(Goal, pk=pk, user=request.user)
     if request.method == 'POST':
@@ -224,36 +424,40 @@ def goal_delete(request, pk):
 
 # Milestones
 @login_required
+@read_from_replica
 def milestone_list(request):
-    milestones = Milestone.objects.filter(user=request.user)
-    return render(request, 'tracker/milestones_list.html', {'milestones': milestones})
+    page = lazy_paginate(request, Milestone.objects.filter(user=request.user).select_related('language'), ('id',))
+    return render(request, 'tracker/milestones_list.html', {'milestones': page, 'page': page})
 
 @login_required
+@retry_on_lock
 def milestone_create(request):
     if request.method == 'POST':
-        form = MilestoneForm(request.POST)
+        form = MilestoneForm(request.POST, user=request.user)
         if form.is_valid():
             milestone = form.save(commit=False)
             milestone.user = request.user
             milestone.save()
             return redirect('milestone_list')
     else:
-        form = MilestoneForm()
+        form = MilestoneForm(user=request.user)
     return render(request, 'tracker/milestones_form.html', {'form': form})
 
 @login_required
+@retry_on_lock
 def milestone_update(request, pk):
     milestone = get_object_or_404(Milestone, pk=pk, user=request.user)
     if request.method == 'POST':
-        form = MilestoneForm(request.POST, instance=milestone)
+        form = MilestoneForm(request.POST, user=request.user, instance=milestone)
         if form.is_valid():
             form.save()
             return redirect('milestone_list')
     else:
-        form = MilestoneForm(instance=milestone)
+        form = MilestoneForm(user=request.user, instance=milestone)
     return render(request, 'tracker/milestones_form.html', {'form': form})
 
 @login_required
+@retry_on_lock
 def milestone_delete(request, pk):
     milestone = get_object_or_404(Milestone, pk=pk, user=request.user)
     if request.method == 'POST':
@@ -263,36 +467,40 @@ def milestone_delete(request, pk):
 
 # Learning resources
 @login_required
+@read_from_replica
 def resource_list(request):
-    resources = Resource.objects.filter(user=request.user)
-    return render(request, 'tracker/resources_list.html', {'resources': resources})
+    page = lazy_paginate(request, Resource.objects.filter(user=request.user).select_related('language'), ('id',))
+    return render(request, 'tracker/resources_list.html', {'resources': page, 'page': page})
 
 @login_required
+@retry_on_lock
 def resource_create(request):
     if request.method == 'POST':
-        form = ResourceForm(request.POST)
+        form = ResourceForm(request.POST, user=request.user)
         if form.is_valid():
             resource = form.save(commit=False)
             resource.user = request.user
             resource.save()
             return redirect('resource_list')
     else:
-        form = ResourceForm()
+        form = ResourceForm(user=request.user)
     return render(request, 'tracker/resources_form.html', {'form': form})
 
 @login_required
+@retry_on_lock
 def resource_update(request, pk):
     resource = get_object_or_404(Resource, pk=pk, user=request.user)
     if request.method == 'POST':
-        form = ResourceForm(request.POST, instance=resource)
+        form = ResourceForm(request.POST, user=request.user, instance=resource)
         if form.is_valid():
             form.save()
             return redirect('resource_list')
     else:
-        form = ResourceForm(instance=resource)
+        form = ResourceForm(user=request.user, instance=resource)
     return render(request, 'tracker/resources_form.html', {'form': form})
 
 @login_required
+@retry_on_lock
 def resource_delete(request, pk):
     resource = get_object_or_404(Resource, pk=pk, user=request.user)
     if request.method == 'POST':